@@ -0,0 +1,100 @@
+"""
+Cost of recording runs and of the dashboard's queries as the compliance
+history grows.
+
+    python benchmarks/bench_history.py --runs 100 1000 20000
+
+Fills a fresh history store with synthetic runs (a few organizations and
+policies, every DPDPA section) and times, at each size: recording one
+more run, the dashboard's aggregate queries (summary, trend, recent runs)
+and, for comparison, the same overall average computed by scanning the
+stored runs. The aggregate queries should stay flat while the scan grows
+with the history.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dpdpa_engine import classify_section, dpdpa_sections  # noqa: E402
+from history_store import ALL_POLICIES, ComplianceHistory  # noqa: E402
+from section_registry import section_registry  # noqa: E402
+
+ORGANIZATIONS = ["Acme Motors", "Bharat Health", "Kite Payments"]
+POLICIES = ["Privacy Policy", "HR Data Policy", "Cookie Notice", "Vendor Policy"]
+
+
+def synthetic_results(rng):
+    results = []
+    for section in dpdpa_sections:
+        spec = section_registry[section]
+        matched = spec.checklist[:rng.randint(0, len(spec.checklist))]
+        match_level, points, severity = classify_section(len(matched), len(spec.checklist), spec.scoring_bands)
+        results.append({"DPDPA Section": section, "DPDPA Section Meaning": spec.meaning, "Match Level": match_level,
+                        "Severity": severity, "Compliance Points": points,
+                        "Checklist Items Matched": list(matched),
+                        "Matched Sentences": [{"Sentence": f"Sentence about {item}.", "Checklist Item": item,
+                                               "Justification": "Stated directly."} for item in matched],
+                        "Unchecked Sentences": 0})
+    return results
+
+
+def fill(history, count, rng, start):
+    for n in range(count):
+        history.record_run(synthetic_results(rng), rng.choice(ORGANIZATIONS), rng.choice(POLICIES),
+                           finished=start + n * 600)
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def dashboard(history):
+    organization = history.organizations()[0]
+    history.policies(organization)
+    history.summary(organization, ALL_POLICIES)
+    history.trend(organization)
+    history.recent_runs(organization)
+
+
+def scan(history):
+    with history._lock:
+        history._conn.execute("SELECT organization, AVG(overall) FROM runs GROUP BY organization").fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, nargs="+", default=[100, 1000, 20000], help="history sizes")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    print(f"{'runs':>8} {'record (ms)':>12} {'dashboard (ms)':>15} {'scan (ms)':>10} {'db MB':>7}")
+    with tempfile.TemporaryDirectory(prefix="dpdpa-history-") as tmp:
+        history = ComplianceHistory(os.path.join(tmp, "history.sqlite3"))
+        stored = 0
+        start = time.time() - 90 * 86400
+        for count in sorted(args.runs):
+            fill(history, count - stored, rng, start + stored * 600)
+            stored = count
+            record = timed(lambda: history.record_run(synthetic_results(rng), ORGANIZATIONS[0], POLICIES[0]),
+                           args.repeat)
+            stored += args.repeat
+            size = os.path.getsize(history.path) / 1_000_000
+            print(f"{count:>8} {record:>12.2f} {timed(lambda: dashboard(history), args.repeat):>15.2f} "
+                  f"{timed(lambda: scan(history), args.repeat):>10.2f} {size:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
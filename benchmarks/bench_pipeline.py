@@ -0,0 +1,197 @@
+"""
+End-to-end benchmark of the compliance pipeline against the local mock
+chat-completions server (mock_openai_server.py); no API credit is used.
+
+    python benchmarks/bench_pipeline.py --sentences 50 500 5000 --modes baseline unified early-exit
+    python benchmarks/bench_pipeline.py --sentences 50000 --rate-limit-rate 0.05 --save before.json
+    python benchmarks/bench_pipeline.py --sentences 50000 --rate-limit-rate 0.05 --compare before.json
+
+Every mode analyzes the same synthetic policies over all DPDPA sections
+(analyze_policy, as the checker and the CLI do) with a cold verdict cache,
+and reports sentences/second, model calls issued (including 429/500
+answers), prompt and reply tokens per answered call and the share of
+prompt tokens the mock's simulated prompt cache served, peak Python
+memory, end-to-end time, per-call latency and the overall score, which
+should not move when only speed changes. --save
+writes the rows as JSON; --compare prints each row's change against such
+a file.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dpdpa_engine  # noqa: E402
+from bench_segmenter import CLAUSES, FILLERS, LIST_ITEMS  # noqa: E402
+from ingestion import Clause, PolicySentence, group_clauses  # noqa: E402
+from mock_openai_server import add_mock_arguments, mock_state, serve  # noqa: E402
+
+MODES = {
+    "baseline": {},
+    "unified": {"unified": True},
+    "early-exit": {"early_exit": True},
+    "prefilter": {"prefilter_threshold": 0.1},
+    "clause-level": {"clause_level": True},
+}
+
+
+def _fill(template, rng):
+    return template.format(data=rng.choice(FILLERS["data"]), purpose=rng.choice(FILLERS["purpose"]),
+                           sec=rng.randint(1, 44), amount=rng.randrange(100, 10_000, 50), days=rng.randint(1, 365))
+
+
+def synthetic_sentences(count, seed=0):
+    """count policy sentences built from the segmenter benchmark's clauses, with some list items and repeats."""
+    rng = random.Random(seed)
+    sentences = []
+    while len(sentences) < count:
+        if rng.random() < 0.05:
+            sentences.append(rng.choice(LIST_ITEMS))
+        else:
+            sentences.append(_fill(rng.choice(CLAUSES), rng))
+    return sentences
+
+
+def synthetic_clauses(count, seed=0):
+    """
+    A structured policy of about count sentences: numbered clauses of 3-10
+    sentences that each stay on one topic (one of the segmenter benchmark's
+    clause templates), like the sections of a real policy.
+    """
+    rng = random.Random(seed)
+    clauses, total = [], 0
+    while total < count:
+        template = rng.choice(CLAUSES)
+        texts = [_fill(template, rng) for _ in range(min(rng.randint(3, 10), count - total))]
+        clauses.append(Clause(f"{len(clauses) + 1}. {template.split(' ', 3)[2].strip(',').title()}", texts))
+        total += len(texts)
+    return clauses
+
+
+def run_once(sentences, run_options, state, cache_dir, trace_memory):
+    dpdpa_engine.configure(cache_path=os.path.join(cache_dir, f"verdicts-{time.monotonic_ns()}.sqlite3"))
+    state.reset()
+    telemetry = dpdpa_engine.new_run_telemetry()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    results, errors = dpdpa_engine.analyze_policy(sentences, telemetry=telemetry, **run_options)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    served = state.snapshot()
+    answered = max(1, served["ok"] + served["malformed"])
+    run = telemetry.summary()["Run"]
+    return {
+        "Sentences": len(sentences),
+        "Candidates": len(dpdpa_engine.candidate_sentences(sentences)),
+        "Seconds": round(elapsed, 3),
+        "Sentences/s": round(len(sentences) / elapsed, 1),
+        "Calls": served["requests"],
+        "429s": served["rate_limited"],
+        "500s": served["errors"],
+        "Max In Flight": served["max_in_flight"],
+        "Call p50 (s)": run["Latency p50 (s)"],
+        "Call p95 (s)": run["Latency p95 (s)"],
+        "Prompt Tokens": run["Prompt Tokens"],
+        "Prompt/Call": round(served["prompt_tokens"] / answered),
+        "Reply/Call": round(served["completion_tokens"] / answered),
+        "Cached %": round(100 * served["cached_tokens"] / max(1, served["prompt_tokens"]), 1),
+        "Peak MB": round(peak / 1_000_000, 1) if peak is not None else None,
+        "Overall": round(dpdpa_engine.overall_compliance(results, len(dpdpa_engine.dpdpa_sections)), 2),
+        "Failed Sections": len(errors),
+    }
+
+
+COLUMNS = [("Sentences", 9), ("Candidates", 10), ("Seconds", 8), ("Sentences/s", 11), ("Calls", 6),
+           ("429s", 5), ("500s", 5), ("Prompt/Call", 11), ("Reply/Call", 10), ("Cached %", 8), ("Call p95 (s)", 12),
+           ("Peak MB", 8), ("Overall", 8)]
+
+
+def print_table(rows, baseline=None):
+    header = f"{'mode':>16} " + " ".join(f"{name:>{width}}" for name, width in COLUMNS)
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['Mode']:>16} " + " ".join(f"{_cell(row.get(name)):>{width}}" for name, width in COLUMNS))
+        before = (baseline or {}).get((row["Mode"], row["Sentences"]))
+        if before:
+            print(f"{'vs. saved':>16} " + " ".join(f"{_change(before.get(name), row.get(name)):>{width}}"
+                                                    for name, width in COLUMNS))
+
+
+def _cell(value):
+    return "-" if value is None else str(value)
+
+
+def _change(before, after):
+    if not isinstance(before, (int, float)) or not isinstance(after, (int, float)) or before == after:
+        return ""
+    if not before:
+        return f"{after - before:+g}"
+    return f"{(after - before) / before:+.0%}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sentences", type=int, nargs="+", default=[50, 500, 5000],
+                        help="policy sizes in sentences (the backlog target range is 50 to 50000)")
+    parser.add_argument("--modes", nargs="+", default=["baseline", "unified", "early-exit"], choices=list(MODES))
+    parser.add_argument("--max-concurrency", type=int, default=dpdpa_engine.MAX_CONCURRENT_REQUESTS,
+                        help="parallel model requests per run")
+    parser.add_argument("--structured", action="store_true",
+                        help="policies made of numbered single-topic clauses (pair with --topical)")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows the pipeline down)")
+    parser.add_argument("--save", help="write the result rows to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier --save to compare against")
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+
+    state = mock_state(args)
+    server, base_url = serve(state)
+    # Limits far above what the mock needs: the benchmark measures the pipeline, not the account tier.
+    dpdpa_engine.configure(api_key="mock", base_url=base_url, rpm_limit=10_000_000, tpm_limit=10_000_000_000,
+                           max_concurrency=args.max_concurrency)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {(row["Mode"], row["Sentences"]): row for row in json.load(f)}
+
+    trace_memory = not args.no_memory
+    if trace_memory:
+        tracemalloc.start()
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="dpdpa-bench-") as cache_dir:
+            run_once(synthetic_sentences(20, args.seed + 1), {}, state, cache_dir, trace_memory)  # warm-up
+            for count in args.sentences:
+                clauses = synthetic_clauses(count, args.seed) if args.structured else None
+                sentences = [s for clause in clauses for s in clause.sentences] if clauses else \
+                    synthetic_sentences(count, args.seed)
+                for mode in args.modes:
+                    options = {"max_concurrency": args.max_concurrency, **MODES[mode]}
+                    if options.pop("clause_level", False):
+                        # Without --structured there are no headings: clauses are plain runs of sentences.
+                        options["clauses"] = clauses or group_clauses(PolicySentence(s, "paragraph", None, None)
+                                                                      for s in sentences)
+                    row = {"Mode": mode, **run_once(sentences, options, state, cache_dir, trace_memory)}
+                    rows.append(row)
+                    print(f"{mode} @ {count} sentences: {row['Seconds']}s, {row['Calls']} calls", file=sys.stderr)
+    finally:
+        server.shutdown()
+        if trace_memory:
+            tracemalloc.stop()
+
+    print_table(rows, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
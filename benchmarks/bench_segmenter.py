@@ -0,0 +1,114 @@
+"""
+Micro-benchmark: the old regex splitter against segmenter.iter_segments.
+
+    python benchmarks/bench_segmenter.py --megabytes 1 4 16
+
+Builds synthetic policies of the given sizes (clauses with abbreviations,
+statute citations, numbered lists and repeated boilerplate), splits them
+with both, and reports time, throughput, sentences, unique candidates and
+the batched calls each would cost across all DPDPA sections. No requests
+are made.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dpdpa_engine import candidate_sentences, dpdpa_sections, estimate_calls  # noqa: E402
+from segmenter import iter_segments  # noqa: E402
+
+CLAUSES = [
+    "We collect your {data}, e.g. as entered at sign-up, for the purposes in Sec. {sec} of this policy.",
+    "A processing fee of Rs. {amount} may apply to requests under Sec. {sec} of the Digital Personal Data Protection Act, 2023.",
+    "You may withdraw your consent to {purpose} at any time by writing to our Data Protection Officer, Dr. A. Sharma.",
+    "Your {data} is processed only for a lawful purpose, i.e. one not expressly forbidden by law.",
+    "We notify the Data Protection Board and affected users of any breach of {data} within {days} hours.",
+    "{data} collected under cl. {sec} is retained only as long as required, approx. {days} days, and then erased.",
+    "Our processors for {purpose} act under a valid contract with XYZ Pvt. Ltd. and follow reasonable security safeguards.",
+    "Requests about {purpose} may be made in English or any language in the Eighth Schedule to the Constitution.",
+]
+FILLERS = {
+    "data": ["name", "email address", "phone number", "location", "payment details", "device identifiers",
+             "Aadhaar number", "purchase history", "health records", "IP address"],
+    "purpose": ["marketing", "analytics", "order fulfilment", "fraud prevention", "personalisation",
+                "customer support", "credit checks", "account security"],
+}
+LIST_ITEMS = [
+    "1. To provide and improve our services to you",
+    "2. To comply with a judgment or order of a court",
+    "3. To respond to a medical emergency involving you",
+]
+BOILERPLATE = "This document is the property of ABC Pvt. Ltd. and may not be copied without permission."
+
+
+def synthetic_policy(target_bytes, seed=0):
+    rng = random.Random(seed)
+    parts, size, n = [], 0, 0
+    while size < target_bytes:
+        n += 1
+        paragraph = " ".join(
+            rng.choice(CLAUSES).format(data=rng.choice(FILLERS["data"]), purpose=rng.choice(FILLERS["purpose"]),
+                                       sec=rng.randint(1, 44), amount=rng.randrange(100, 10_000, 50),
+                                       days=rng.randint(1, 365))
+            for _ in range(rng.randint(2, 6)))
+        if n % 4 == 0:
+            paragraph += "\n" + "\n".join(LIST_ITEMS)
+        if n % 10 == 0:
+            paragraph += "\n\n" + BOILERPLATE
+        parts.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(parts)
+
+
+def old_sent_tokenize(text):
+    """The splitter this repo used before segmenter.py."""
+    text = text.replace("\n", " ")
+    return re.split(r'(?<=[.!?]) +', text)
+
+
+def old_candidates(sentences):
+    return [s for s in sentences if len(s.strip().split()) >= 5]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def total_calls(candidates):
+    return sum(estimate_calls(candidates, section) for section in dpdpa_sections)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per splitter (best is reported)")
+    args = parser.parse_args(argv)
+
+    header = f"{'size':>8} {'splitter':>9} {'seconds':>8} {'MB/s':>7} {'sentences':>10} {'candidates':>11} {'calls':>7}"
+    print(header)
+    print("-" * len(header))
+    for megabytes in args.megabytes:
+        text = synthetic_policy(int(megabytes * 1_000_000))
+        size_mb = len(text.encode("utf-8")) / 1_000_000
+        old_seconds, old_sentences = timed(lambda: old_sent_tokenize(text), args.repeat)
+        new_seconds, new_sentences = timed(lambda: [s.text for s in iter_segments(text)], args.repeat)
+        rows = [
+            ("old", old_seconds, old_sentences, old_candidates(old_sentences)),
+            ("new", new_seconds, new_sentences, candidate_sentences(new_sentences)),
+        ]
+        for name, seconds, sentences, candidates in rows:
+            print(f"{size_mb:>6.1f}MB {name:>9} {seconds:>8.3f} {size_mb / seconds:>7.1f} {len(sentences):>10} "
+                  f"{len(candidates):>11} {total_calls(candidates):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Startup and per-rerun overhead of the Streamlit app, and connection reuse
+of the shared OpenAI client.
+
+    python benchmarks/bench_startup.py --repeat 5
+
+Reports:
+- cold import time of the app's modules, in fresh interpreters, and which
+  heavy packages (openai, pandas, openpyxl) they pull in;
+- the first script run and a rerun of every sidebar page, via Streamlit's
+  AppTest, with the heavy packages loaded by the time each page is shown;
+- TCP connections opened for several analysis runs against the local mock
+  server (mock_openai_server.py): with the pooled client this stays at the
+  pool size instead of growing with every run.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_PACKAGES = ("openai", "pandas", "openpyxl")
+APP_IMPORTS = "import streamlit, dpdpa_engine, ingestion, prefilter, report_export, section_registry, telemetry"
+PAGES = ["Homepage", "Policy Compliance Checker", "Policy Generator", "Dashboard & Reports", "Knowledge Assistant",
+         "Admin Settings"]
+
+
+def cold_import(statement, repeat):
+    """(best seconds, heavy packages loaded) for statement in a fresh interpreter."""
+    probe = (f"import sys, time; t = time.perf_counter(); {statement}; "
+             f"print(time.perf_counter() - t); print(','.join(m for m in {HEAVY_PACKAGES!r} if m in sys.modules))")
+    best, loaded = float("inf"), ""
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+        seconds, loaded = out.stdout.splitlines()
+        best = min(best, float(seconds))
+    return best, loaded or "-"
+
+
+def page_reruns(repeat):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "ui.py"), default_timeout=60)
+    app.secrets["OPENAI_API_KEY"] = "sk-benchmark"
+    started = time.perf_counter()
+    app.run()
+    rows = [("first run (Homepage)", time.perf_counter() - started, _heavy_loaded())]
+    for page in PAGES:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            app.sidebar.radio[0].set_value(page).run()
+            timings.append(time.perf_counter() - started)
+            app.sidebar.radio[0].set_value("Homepage").run()
+        rows.append((page, statistics.median(timings), _heavy_loaded()))
+    return rows
+
+
+def _heavy_loaded():
+    return ",".join(m for m in HEAVY_PACKAGES if m in sys.modules) or "-"
+
+
+def connection_reuse(runs):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import tempfile
+
+    import dpdpa_engine
+    from bench_pipeline import synthetic_sentences
+    from mock_openai_server import MockState, serve
+
+    state = MockState(latency="fixed:0.01")
+    server, base_url = serve(state)
+    try:
+        with tempfile.TemporaryDirectory(prefix="dpdpa-bench-") as cache_dir:
+            dpdpa_engine.configure(api_key="mock", base_url=base_url, rpm_limit=10_000_000,
+                                   tpm_limit=10_000_000_000, model_backend="live")
+            sentences = synthetic_sentences(200)
+            for run in range(runs):
+                # A fresh verdict cache per run, so every run really calls the model.
+                dpdpa_engine.configure(cache_path=os.path.join(cache_dir, f"verdicts-{run}.sqlite3"))
+                dpdpa_engine.analyze_policy(sentences)
+            counts = state.snapshot()
+    finally:
+        server.shutdown()
+    return counts["requests"], counts["connections"], dpdpa_engine.settings["max_concurrency"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="measurements per item (best or median is reported)")
+    parser.add_argument("--runs", type=int, default=5, help="analysis runs for the connection-reuse check")
+    args = parser.parse_args(argv)
+
+    print("Cold imports (best of repeats, fresh interpreter)")
+    for label, statement in [("streamlit", "import streamlit"), ("dpdpa_engine", "import dpdpa_engine"),
+                             ("app modules", APP_IMPORTS)]:
+        seconds, loaded = cold_import(statement, args.repeat)
+        print(f"  {label:<28} {seconds * 1000:>8.1f} ms   heavy packages: {loaded}")
+
+    print("\nStreamlit script runs (AppTest; median rerun per page)")
+    for label, seconds, loaded in page_reruns(args.repeat):
+        print(f"  {label:<28} {seconds * 1000:>8.1f} ms   heavy packages so far: {loaded}")
+
+    requests, connections, pool = connection_reuse(args.runs)
+    print(f"\nShared client: {requests} requests over {args.runs} runs used {connections} TCP connections "
+          f"(pool size {pool}).")
+
+
+if __name__ == "__main__":
+    main()
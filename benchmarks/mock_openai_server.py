@@ -0,0 +1,307 @@
+"""
+A local stand-in for the OpenAI chat-completions endpoint, for offline
+benchmarks.
+
+    python benchmarks/mock_openai_server.py --port 8765 --latency lognormal:0.8:0.5 --rate-limit-rate 0.02
+
+Understands the checker's prompt shapes (single sentence, numbered batch,
+unified multi-section batch, clause screening) and answers with canned
+verdicts that depend only on the sentence and checklist text, so every run
+over the same policy gets the same results. Checklist items and sections
+are named the way the prompt asks: by number or code when it asks for an
+"Item" (or lists section codes), by their text otherwise. A clause is screened as
+relevant to exactly the sections one of its sentences would match. With
+--topical, a sentence can only match checklist items it shares a word
+with, which gives real policies' topical structure to synthetic ones. Latency is drawn from a configurable
+distribution, and a share of requests can be answered with 429s, 500s or
+unreadable replies to exercise the scheduler and the reply parser.
+
+Prompt caching is simulated the way OpenAI reports it: the longest prefix
+(of at least 1024 tokens, in 128-token steps) already seen in an earlier
+request counts as cached_tokens in the usage.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_SENTENCE_LINE = re.compile(r'^\[(\d+)\] "(.*)"$', re.MULTILINE)
+_CHECKLIST_ITEM = re.compile(r"^(\d+)\. (.+)$")
+_SINGLE_SENTENCE = re.compile(r'\*\*Policy Sentence:\*\*\n"(.*)"$', re.MULTILINE)
+_SECTION_HEADING = re.compile(r"^### (.+)$", re.MULTILINE)
+_SECTION_CODE = re.compile(r"^\[(S\d+)\] ")
+_CLAUSE = re.compile(r"^\[(\d+)\] Clause: .*\n((?:  - \".*\"\n?)+)", re.MULTILINE)
+_CLAUSE_SENTENCE = re.compile(r'^  - "(.*)"$', re.MULTILINE)
+_CONTENT_WORD = re.compile(r"[a-z]{6,}")
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_STEP_TOKENS = 128
+
+
+def parse_latency(spec):
+    """
+    A sampler for a latency spec, in seconds: "fixed:S", "uniform:LOW:HIGH",
+    "normal:MEAN:STDDEV" or "lognormal:MEDIAN:SIGMA" (long-tailed, like the
+    real API).
+    """
+    kind, *args = spec.split(":")
+    try:
+        args = [float(a) for a in args]
+        samplers = {
+            "fixed": lambda rng: args[0],
+            "uniform": lambda rng: rng.uniform(args[0], args[1]),
+            "normal": lambda rng: max(0.0, rng.gauss(args[0], args[1])),
+            "lognormal": lambda rng: args[0] * rng.lognormvariate(0, args[1]),
+        }
+        sampler = samplers[kind]
+        sampler(random.Random(0))
+    except (KeyError, IndexError, ValueError):
+        raise ValueError(f"bad latency spec {spec!r}; see parse_latency") from None
+    return sampler
+
+
+def checklists(prompt):
+    """[(section title or None, [checklist items])] in prompt order."""
+    headings = [(m.start(), m.group(1).strip()) for m in _SECTION_HEADING.finditer(prompt)]
+    found = []
+    for block in prompt.split("**Checklist Items:**\n")[1:]:
+        items = []
+        for line in block.splitlines():
+            match = _CHECKLIST_ITEM.match(line)
+            if not match or int(match.group(1)) != len(items) + 1:
+                break
+            items.append(match.group(2))
+        offset = prompt.index(block)
+        title = next((t for start, t in reversed(headings) if start < offset), None)
+        found.append((title, items))
+    return found
+
+
+def canned_matches(sentence, items, match_rate, topical=False):
+    """
+    Deterministic verdict: each (sentence, item) pair matches with
+    probability match_rate, decided by hash, so asking about fewer items
+    never changes the verdict on the ones that remain. With topical, only
+    pairs sharing a word of six or more letters can match.
+    """
+    key = " ".join(sentence.split()).casefold()
+    words = set(_CONTENT_WORD.findall(key)) if topical else None
+    return [{"Checklist Item": item, "Justification": "Canned verdict from the mock server."}
+            for item in items
+            if (not topical or words & set(_CONTENT_WORD.findall(item.casefold())))
+            and hashlib.sha256(key.encode("utf-8") + b"\x1f" + item.encode("utf-8")).digest()[0] < match_rate * 256]
+
+
+def canned_reply(prompt, match_rate, topical=False):
+    sections = []
+    for title, items in checklists(prompt):
+        code = _SECTION_CODE.match(title) if title else None
+        sections.append((code.group(1) if code else title, title and _SECTION_CODE.sub("", title), items))
+    by_id = '"Item":' in prompt
+
+    def named(code, title, items, match):
+        if not by_id:
+            return {"Section": title, **match} if title else match
+        number = items.index(match["Checklist Item"]) + 1
+        return {"Item": f"{code}.{number}" if code else number, "Justification": match["Justification"]}
+
+    clauses = _CLAUSE.findall(prompt)
+    if clauses:
+        return {"Results": [
+            {"Clause ID": int(clause_id),
+             "Sections": [code for code, title, items in sections
+                          if any(canned_matches(sentence, items, match_rate, topical)
+                                 for sentence in _CLAUSE_SENTENCE.findall(block))]}
+            for clause_id, block in clauses]}
+    numbered = _SENTENCE_LINE.findall(prompt)
+    if not numbered:
+        single = _SINGLE_SENTENCE.search(prompt)
+        code, title, items = sections[0] if sections else (None, None, [])
+        return {"Matched Items": [named(code, title, items, match) for match in canned_matches(
+            single.group(1) if single else prompt, items, match_rate, topical)]}
+    results = []
+    for sentence_id, sentence in numbered:
+        matches = []
+        for code, title, items in sections:
+            for match in canned_matches(sentence, items, match_rate, topical):
+                matches.append(named(code, title, items, match))
+        results.append({"Sentence ID": int(sentence_id), "Matched Items": matches})
+    return {"Results": results}
+
+
+class MockState:
+    """Server configuration plus counters, shared by all handler threads."""
+
+    def __init__(self, latency="fixed:0.05", rate_limit_rate=0.0, error_rate=0.0, malformed_rate=0.0,
+                 match_rate=0.05, retry_after=0.1, seed=0, topical=False):
+        self.sample_latency = parse_latency(latency)
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.match_rate = match_rate
+        self.topical = topical
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = {"connections": 0, "requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "malformed": 0,
+                           "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+            self.in_flight = self.max_in_flight = 0
+            self.prompt_prefixes = set()
+
+    def cached_tokens(self, prompt):
+        """Tokens of prompt's longest prefix seen before (0 under PROMPT_CACHE_MIN_TOKENS); remembers this one."""
+        lengths = range(PROMPT_CACHE_MIN_TOKENS, len(prompt) // 4 + 1, PROMPT_CACHE_STEP_TOKENS)
+        digests = [hashlib.sha256(prompt[:tokens * 4].encode("utf-8")).digest() for tokens in lengths]
+        with self.lock:
+            cached = max((tokens for tokens, digest in zip(lengths, digests) if digest in self.prompt_prefixes),
+                         default=0)
+            self.prompt_prefixes.update(digests)
+        return cached
+
+    def draw(self):
+        """(latency, outcome) for one request: outcome is "ok", "rate_limited", "error" or "malformed"."""
+        with self.lock:
+            latency = self.sample_latency(self.rng)
+            roll = self.rng.random()
+        outcomes = (("rate_limited", self.rate_limit_rate), ("error", self.error_rate),
+                    ("malformed", self.malformed_rate))
+        for outcome, rate in outcomes:
+            if roll < rate:
+                return latency, outcome
+            roll -= rate
+        return latency, "ok"
+
+    def snapshot(self):
+        with self.lock:
+            return {**self.counts, "max_in_flight": self.max_in_flight}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None  # set per server by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.counts["connections"] += 1  # one handler per TCP connection; keep-alive reuses it
+
+    def _send(self, status, body, headers=()):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        state = self.state
+        latency, outcome = state.draw()
+        with state.lock:
+            state.counts["requests"] += 1
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            time.sleep(latency)
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+        if outcome == "rate_limited":
+            with state.lock:
+                state.counts["rate_limited"] += 1
+            self._send(429, {"error": {"message": "Rate limit reached (mock).", "type": "rate_limit_error"}},
+                       [("Retry-After", str(state.retry_after))])
+            return
+        if outcome == "error":
+            with state.lock:
+                state.counts["errors"] += 1
+            self._send(500, {"error": {"message": "Internal error (mock).", "type": "server_error"}})
+            return
+
+        prompt = "\n".join(m.get("content") or "" for m in request.get("messages", []))
+        if outcome == "malformed":
+            content = "Sorry, I cannot produce JSON for this request."
+        else:
+            content = json.dumps(canned_reply(prompt, state.match_rate, state.topical))
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        cached_tokens = state.cached_tokens(prompt)
+        with state.lock:
+            state.counts["ok" if outcome == "ok" else "malformed"] += 1
+            state.counts["prompt_tokens"] += prompt_tokens
+            state.counts["completion_tokens"] += completion_tokens
+            state.counts["cached_tokens"] += cached_tokens
+        self._send(200, {
+            "id": f"chatcmpl-mock-{state.counts['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens,
+                      "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+        })
+
+
+def serve(state, host="127.0.0.1", port=0):
+    """Start the mock on a background thread; returns (server, base_url). Stop with server.shutdown()."""
+    handler = type("BoundMockHandler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def add_mock_arguments(parser):
+    parser.add_argument("--latency", default="lognormal:0.05:0.5",
+                        help='response latency: "fixed:S", "uniform:LOW:HIGH", "normal:MEAN:SD", "lognormal:MEDIAN:SIGMA"')
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of replies that are not JSON")
+    parser.add_argument("--match-rate", type=float, default=0.05,
+                        help="chance that a sentence satisfies a given checklist item")
+    parser.add_argument("--topical", action="store_true",
+                        help="only let sentences match checklist items they share a word with")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def mock_state(args):
+    return MockState(latency=args.latency, rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+                     malformed_rate=args.malformed_rate, match_rate=args.match_rate, retry_after=args.retry_after,
+                     seed=args.seed, topical=args.topical)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    args = parser.parse_args(argv)
+    server, base_url = serve(mock_state(args), args.host, args.port)
+    print(f"Mock chat completions at {base_url} (set OPENAI_BASE_URL); Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Headless batch audit of many policy documents.
+
+    python dpdpa_cli.py policies/ --output audit.jsonl --excel audit.xlsx --concurrency 4
+
+Every .txt/.docx file under the given paths is checked against the DPDPA
+sections and gets one JSON line in --output. Documents already recorded
+there (same path and content hash) are skipped, so an interrupted run can
+simply be started again. The Excel report has one row per document and is
+rebuilt from the JSONL file at the end. With --plan nothing is sent: each
+document's planned calls, tokens, time and cost are printed instead.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dpdpa_engine import (
+    MAX_CONCURRENT_REQUESTS, analyze_policy, candidate_sentences, configure, dpdpa_sections, get_model_backend,
+    new_run_telemetry, overall_compliance, plan_run, settings,
+)
+from ingestion import group_clauses, iter_sentences
+from model_backend import BACKEND_MODES
+
+POLICY_EXTENSIONS = (".txt", ".docx")
+
+
+def find_policies(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(POLICY_EXTENSIONS) and not name.startswith("~$"):
+                        yield os.path.join(root, name)
+        elif path.lower().endswith(POLICY_EXTENSIONS):
+            yield path
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_done(output_path):
+    """(path, sha256) pairs already recorded in a previous run's output."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if not record.get("Errors"):
+                done.add((record["Document"], record["SHA256"]))
+    return done
+
+
+def audit_document(path, sha256, sections, run_options, clause_level=False):
+    started = time.time()
+    policy_sentences = list(iter_sentences(path))
+    telemetry = new_run_telemetry()
+    results, errors = analyze_policy([s.text for s in policy_sentences], sections, telemetry=telemetry,
+                                     clauses=group_clauses(policy_sentences) if clause_level else None,
+                                     **run_options)
+    return {
+        "Document": path,
+        "SHA256": sha256,
+        "Overall Compliance": round(overall_compliance(results, len(sections)), 2),
+        "Sections": results,
+        "Errors": {section: str(error) for section, error in errors.items()},
+        "Elapsed Seconds": round(time.time() - started, 2),
+        "Telemetry": telemetry.summary(),
+    }
+
+
+def plan_document(path, sections, run_options, clause_level=False):
+    """plan_run's totals for one document."""
+    policy_sentences = list(iter_sentences(path))
+    return plan_run(candidate_sentences([s.text for s in policy_sentences]), sections,
+                    clauses=group_clauses(policy_sentences) if clause_level else None, **run_options)["Total"]
+
+
+def write_excel(output_path, excel_path, sections):
+    import pandas as pd
+
+    latest = {}
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            latest[record["Document"]] = record
+    rows = []
+    for record in latest.values():
+        row = {"Document": record["Document"], "Overall Compliance": record["Overall Compliance"]}
+        by_section = {r["DPDPA Section"]: r for r in record["Sections"]}
+        for section in sections:
+            result = by_section.get(section)
+            row[f"{section} — Match Level"] = result["Match Level"] if result else "Error"
+            row[f"{section} — Score"] = result["Compliance Points"] if result else None
+        row["Errors"] = "; ".join(f"{s}: {e}" for s, e in record["Errors"].items())
+        rows.append(row)
+    pd.DataFrame(rows).to_excel(excel_path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit a directory of policies against the DPDPA.")
+    parser.add_argument("paths", nargs="+", help=".txt/.docx files or directories to scan")
+    parser.add_argument("--output", default="dpdpa_audit.jsonl", help="JSONL results file (appended, resumable)")
+    parser.add_argument("--excel", help="also write a one-row-per-document Excel report")
+    parser.add_argument("--concurrency", type=int, default=4, help="documents analyzed in parallel")
+    parser.add_argument("--request-concurrency", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help="parallel model requests per document")
+    parser.add_argument("--sections", nargs="*", default=None, choices=dpdpa_sections, metavar="TITLE",
+                        help="section titles to check (default: all)")
+    parser.add_argument("--unified", action="store_true", help="check all sections in one request per batch")
+    parser.add_argument("--prefilter-threshold", type=float, default=0.0,
+                        help="skip sentences below this lexical prefilter score (0 = off)")
+    parser.add_argument("--early-exit", action="store_true",
+                        help="stop asking about checklist items once --evidence-depth sentences match them")
+    parser.add_argument("--evidence-depth", type=int, default=1, help="supporting sentences kept per checklist item")
+    parser.add_argument("--clause-level", action="store_true",
+                        help="screen each document's clauses first and check only sentences in relevant ones")
+    parser.add_argument("--model-backend", choices=BACKEND_MODES, default=None,
+                        help="live API calls, live calls recorded to --model-log, or answers replayed from it "
+                             "(default: $DPDPA_MODEL_BACKEND or live)")
+    parser.add_argument("--model-log", default=None, help="record/replay log (default: $DPDPA_MODEL_LOG)")
+    parser.add_argument("--plan", action="store_true",
+                        help="print the calls, tokens, time and cost each document would need, without sending")
+    args = parser.parse_args(argv)
+
+    configure(api_key=os.environ.get("OPENAI_API_KEY"), model_backend=args.model_backend, model_log=args.model_log)
+    if settings["model_backend"] == "replay" and not args.plan:
+        try:
+            get_model_backend()
+        except FileNotFoundError:
+            parser.error(f"no model log to replay at {settings['model_log']}; record one with --model-backend record")
+    sections = args.sections or dpdpa_sections
+    run_options = {
+        "max_concurrency": args.request_concurrency,
+        "unified": args.unified,
+        "prefilter_threshold": args.prefilter_threshold,
+        "early_exit": args.early_exit,
+        "evidence_depth": args.evidence_depth,
+    }
+
+    done = load_done(args.output)
+    todo = []
+    for path in find_policies(args.paths):
+        sha256 = file_sha256(path)
+        if (path, sha256) not in done:
+            todo.append((path, sha256))
+    print(f"{len(todo)} document(s) to audit, {len(done)} already done.", file=sys.stderr)
+
+    if args.plan:
+        totals = dict.fromkeys(("Calls", "Prompt Tokens", "Completion Tokens", "Estimated Seconds",
+                                "Estimated Cost (USD)"), 0)
+        for path, _ in todo:
+            plan = plan_document(path, sections, run_options, args.clause_level)
+            for key in totals:
+                totals[key] += plan[key]
+            print(json.dumps({"Document": path, **plan}, ensure_ascii=False))
+        # Documents run --concurrency at a time, so the time is a worst case for the whole batch.
+        print(json.dumps({"Documents": len(todo), **{key: round(value, 4) for key, value in totals.items()}}))
+        return 0
+
+    write_lock = threading.Lock()
+    failures = 0
+    with open(args.output, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures = {pool.submit(audit_document, path, sha256, sections, run_options, args.clause_level): path
+                   for path, sha256 in todo}
+        for n, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{n}/{len(todo)}] {path}: failed: {e}", file=sys.stderr)
+                continue
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+            status = "with errors" if record["Errors"] else f"{record['Overall Compliance']}%"
+            print(f"[{n}/{len(todo)}] {path}: {status}", file=sys.stderr)
+
+    if args.excel and os.path.exists(args.output):
+        write_excel(args.output, args.excel, sections)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
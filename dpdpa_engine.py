@@ -0,0 +1,1354 @@
+"""
+DPDPA compliance engine: sentence selection, prompt templates, section
+scoring and the batched/cached/concurrent matching pipeline. The sections
+themselves are data in section_registry.py. Free of
+Streamlit so it can be driven by the UI (ui.py) and the batch CLI
+(dpdpa_cli.py) alike.
+"""
+import functools
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from difflib import SequenceMatcher
+
+from model_backend import (
+    BACKEND_MODES, DEFAULT_LOG_PATH, OpenAIBackend, Prompt, RecordingBackend, ReplayBackend, ResponseLog,
+)
+from prefilter import build_prefilter
+from reply_parsing import ReplyFormatError, batch_entries, parse_json_reply, split_item_id, validate_matched_items
+from request_scheduler import RequestScheduler
+from section_registry import DEFAULT_SCORING_BANDS, section_registry
+from telemetry import RunTelemetry, estimate_cost
+from segmenter import dedupe_sentences, iter_segments, normalize_sentence
+from verdict_cache import (
+    DEFAULT_CACHE_PATH, PROMPT_TEMPLATE_VERSION, ResultCache, VerdictCache, section_fingerprint,
+    verdict_key,
+)
+
+
+def sent_tokenize(text):
+    """Split text into sentences; see segmenter.iter_segments for offsets."""
+    return [segment.text for segment in iter_segments(text)]
+
+
+def candidate_sentences(policy):
+    """
+    Sentences worth sending to the model; vague/short phrases are skipped
+    and repeats (boilerplate, footers) are kept only once, so each unique
+    sentence is evaluated a single time. policy is the full text or an
+    iterable of already split sentences (e.g. the texts from
+    ingestion.iter_sentences).
+    """
+    sentences = sent_tokenize(policy) if isinstance(policy, str) else policy
+    unique, _ = dedupe_sentences(s for s in sentences if len(s.strip().split()) >= 5)
+    return unique
+
+
+# --- OpenAI Setup ---
+OPENAI_MODEL = "gpt-3.5-turbo"
+OPENAI_TEMPERATURE = 0
+OPENAI_JSON_MODE = True  # every prompt asks for a JSON object; JSON mode makes the model stick to it
+
+# Process-wide settings; the Streamlit app fills these from st.secrets and
+# the batch CLI from the environment (see configure()).
+settings = {
+    "api_key": os.environ.get("OPENAI_API_KEY"),
+    "base_url": os.environ.get("OPENAI_BASE_URL"),  # None = the OpenAI API; any OpenAI-compatible server otherwise
+    "rpm_limit": int(os.environ.get("OPENAI_RPM_LIMIT", 3500)),
+    "tpm_limit": int(os.environ.get("OPENAI_TPM_LIMIT", 200_000)),
+    "max_concurrency": int(os.environ.get("OPENAI_MAX_CONCURRENCY", 32)),
+    "cache_path": DEFAULT_CACHE_PATH,
+    "model_backend": os.environ.get("DPDPA_MODEL_BACKEND", "live"),  # one of model_backend.BACKEND_MODES
+    "model_log": os.environ.get("DPDPA_MODEL_LOG", DEFAULT_LOG_PATH),
+}
+# Environment variable each setting is read from at import, for handing the settings to other processes.
+SETTINGS_ENV = {
+    "api_key": "OPENAI_API_KEY",
+    "base_url": "OPENAI_BASE_URL",
+    "rpm_limit": "OPENAI_RPM_LIMIT",
+    "tpm_limit": "OPENAI_TPM_LIMIT",
+    "max_concurrency": "OPENAI_MAX_CONCURRENCY",
+    "cache_path": "DPDPA_CACHE_PATH",
+    "model_backend": "DPDPA_MODEL_BACKEND",
+    "model_log": "DPDPA_MODEL_LOG",
+}
+_shared = {}
+_shared_lock = threading.RLock()  # re-entrant: a shared object's factory may use another one
+
+
+def configure(**overrides):
+    """Update settings; shared objects built from changed settings are rebuilt on next use."""
+    changed = {k: v for k, v in overrides.items() if v is not None and settings.get(k) != v}
+    if not changed:
+        return
+    with _shared_lock:
+        settings.update(changed)
+        if changed.keys() & {"api_key", "base_url", "max_concurrency"}:
+            _shared.pop("client", None)
+        if changed.keys() & {"api_key", "base_url", "max_concurrency", "model_backend", "model_log"}:
+            _shared.pop("model_backend", None)
+        if "cache_path" in changed:
+            _shared.pop("verdict_cache", None)
+        if changed.keys() & {"rpm_limit", "tpm_limit", "max_concurrency"}:
+            _shared.pop("scheduler", None)
+
+
+def settings_env(**overrides):
+    """The current settings (with overrides) as environment variables, e.g. for worker processes."""
+    values = {**settings, **{k: v for k, v in overrides.items() if v is not None}}
+    return {env: str(values[key]) for key, env in SETTINGS_ENV.items() if values.get(key) is not None}
+
+
+def _get_shared(name, factory):
+    with _shared_lock:
+        if name not in _shared:
+            _shared[name] = factory()
+        return _shared[name]
+
+
+HTTP_KEEPALIVE_SECONDS = 300  # idle connections kept open between runs, so later runs skip the TLS handshake
+
+
+def get_client():
+    """
+    The process-wide OpenAI client. Its connection pool holds one
+    keep-alive connection per allowed concurrent request and is shared by
+    every session and run. Retries are handled by the request scheduler,
+    not by the client.
+    """
+    def build():
+        # Imported here rather than at module level: openai is the slowest
+        # import of the app, and most pages never call the model.
+        import openai
+
+        pool = max(1, settings["max_concurrency"])
+        # The Limits class of whichever HTTP library this openai version is built on.
+        limits = type(openai.DEFAULT_CONNECTION_LIMITS)(
+            max_connections=pool, max_keepalive_connections=pool, keepalive_expiry=HTTP_KEEPALIVE_SECONDS)
+        http_client = openai.DefaultHttpxClient(limits=limits)
+        return openai.OpenAI(api_key=settings["api_key"], base_url=settings["base_url"], max_retries=0,
+                             http_client=http_client)
+    return _get_shared("client", build)
+
+
+def get_model_backend():
+    """
+    Where completions come from, per settings["model_backend"]: "live" asks
+    the API, "record" asks it and appends every answer to
+    settings["model_log"], "replay" answers only from that log (see
+    model_backend.py).
+    """
+    def build():
+        mode = settings["model_backend"]
+        if mode not in BACKEND_MODES:
+            raise ValueError(f"unknown model backend {mode!r}; expected one of {BACKEND_MODES}")
+        if mode == "replay":
+            return ReplayBackend(ResponseLog(settings["model_log"], readonly=True))
+        live = OpenAIBackend(get_client())
+        return RecordingBackend(live, ResponseLog(settings["model_log"])) if mode == "record" else live
+    return _get_shared("model_backend", build)
+
+
+# --- Request scheduler (shared by all sessions and documents, since account limits are) ---
+def get_request_scheduler():
+    def build():
+        import openai
+
+        return RequestScheduler(
+            rpm=settings["rpm_limit"],
+            tpm=settings["tpm_limit"],
+            max_concurrency=settings["max_concurrency"],
+            rate_limit_errors=(openai.RateLimitError,),
+            transient_errors=(openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError),
+        )
+    return _get_shared("scheduler", build)
+
+
+def chat_completion(prompt, expected_output_tokens=200, telemetry=None, section=None):
+    """
+    Send one prompt to the model backend, through the request scheduler
+    unless the backend is a replay. Returns a model_backend.Completion. The
+    call's latency (of the attempt that answered), tokens and retries are
+    recorded under section in telemetry, if given.
+    """
+    backend = get_model_backend()
+    attempts = []
+
+    def create():
+        started = time.perf_counter()
+        try:
+            return backend.complete(OPENAI_MODEL, prompt, OPENAI_TEMPERATURE, OPENAI_JSON_MODE)
+        finally:
+            attempts.append(time.perf_counter() - started)
+
+    try:
+        if backend.rate_limited:
+            response = get_request_scheduler().call(create, estimate_tokens(prompt) + expected_output_tokens)
+        else:
+            response = create()
+    except Exception:
+        if telemetry is not None:
+            telemetry.record_call(section, attempts[-1] if attempts else 0.0, 0, 0,
+                                  retries=max(0, len(attempts) - 1), error=True)
+        raise
+    if telemetry is not None:
+        usage = response.usage
+        telemetry.record_call(section, attempts[-1],
+                              getattr(usage, "prompt_tokens", None) or estimate_tokens(prompt),
+                              getattr(usage, "completion_tokens", None) or 0,
+                              retries=len(attempts) - 1, cached_tokens=getattr(usage, "cached_tokens", 0))
+    return response
+
+
+def new_run_telemetry():
+    """Fresh per-run metrics collector for run_sections_concurrently(telemetry=...)."""
+    return RunTelemetry(OPENAI_MODEL)
+
+
+# --- Verdict cache (shared by all sessions) ---
+def get_verdict_cache():
+    return _get_shared("verdict_cache", lambda: VerdictCache(settings["cache_path"]))
+
+
+def verdict_keys(spec, sentences, unified_sections=None):
+    """
+    Cache key per sentence for a section's verdicts. The key names the
+    prompt that produced them: the per-section batch prompt, or the unified
+    prompt asking about unified_sections together, so neither's answers
+    are replayed for the other.
+    """
+    prompt = ["unified", list(unified_sections)] if unified_sections else ["batch"]
+    fingerprint = section_fingerprint(spec.title, spec.checklist, spec.intro, spec.rules, *prompt)
+    return [verdict_key(OPENAI_MODEL, OPENAI_TEMPERATURE, fingerprint, s) for s in sentences]
+
+
+def lookup_cached_verdicts(spec, sentences, telemetry=None, unified_sections=None):
+    """Return (cache key per sentence, {key: cached result}) for one section; see verdict_keys."""
+    keys = verdict_keys(spec, sentences, unified_sections)
+    found = get_verdict_cache().get_many(keys)
+    if telemetry is not None:
+        hits = sum(1 for key in keys if key in found)
+        telemetry.record_cache(spec.title, hits, len(keys) - hits)
+    return keys, found
+
+# --- Whole-run result cache (shared by all sessions) ---
+RESULT_CACHE_ENTRIES = 64
+
+
+def get_result_cache():
+    return _get_shared("result_cache", lambda: ResultCache(RESULT_CACHE_ENTRIES))
+
+
+def run_key(candidates, sections, scope, industry, **run_options):
+    """
+    Key of a whole run for the result cache: the policy's candidate
+    sentences (whitespace/case-insensitive), the selected scope and its
+    sections' prompts, the industry, the model and the run options that
+    change results (not e.g. max_concurrency).
+    """
+    policy = hashlib.sha256()
+    for sentence in candidates:
+        policy.update(normalize_sentence(sentence).encode("utf-8") + b"\n")
+    spec_fingerprints = [section_fingerprint(spec.title, spec.checklist, spec.intro, spec.rules)
+                         for spec in (section_registry[section] for section in sections)]
+    payload = json.dumps([policy.hexdigest(), scope, spec_fingerprints, industry, OPENAI_MODEL, OPENAI_TEMPERATURE,
+                          PROMPT_TEMPLATE_VERSION, sorted(run_options.items())], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# --- DPDPA Sections (defined in section_registry.py) ---
+dpdpa_sections = list(section_registry)
+
+# --- Prompt building ---
+# Every prompt is a model_backend.Prompt: the instructions, checklist, rules
+# and reply format come first as the system message, the same for every
+# call about a section, and the sentences come last as the user message, so
+# the provider can serve the shared prefix from its prompt cache. Replies
+# name checklist items by number ("Item": 3) instead of echoing their text;
+# validate_matched_items maps the numbers back. The system message is
+# filled in once per section (compile_prompts), so building a prompt per
+# call is just numbering the sentences.
+BATCH_PROMPT_TEMPLATE = """{intro}
+
+Apply this evaluation **independently** to each of the numbered policy sentences given after these instructions. Judge every sentence on its own wording only.
+
+---
+
+**Checklist Items:**
+{checklist}
+
+---
+{rules}
+---
+
+Please return your response strictly in the following JSON format, with one entry for every sentence ID, where "Item" is the number of a checklist item above (do not repeat the item's text):
+
+{{
+  "Results": [
+    {{
+      "Sentence ID": 1,
+      "Matched Items": [
+        {{
+          "Item": 1,
+          "Justification": "..."
+        }}
+      ]
+    }}
+  ]
+}}
+
+Use "Matched Items": [] for any sentence that does not clearly satisfy a checklist item.
+"""
+
+def format_checklist(checklist_items):
+    return "\n".join([f"{i+1}. {item}" for i, item in enumerate(checklist_items)])
+
+
+def number_sentences(sentences):
+    return "\n".join([f"[{i+1}] \"{s.strip()}\"" for i, s in enumerate(sentences)])
+
+
+@functools.lru_cache(maxsize=256)  # bounded: early-exit waves compile shrunken checklists too
+def compile_prompts(spec):
+    """Fill the batch prompt template for a section once; see build_batch_prompt."""
+    return BATCH_PROMPT_TEMPLATE.format(intro=spec.intro, checklist=format_checklist(spec.checklist), rules=spec.rules)
+
+
+def build_batch_prompt(sentences, spec):
+    return Prompt(compile_prompts(spec), "**Policy Sentences:**\n" + number_sentences(sentences))
+
+
+for _spec in section_registry.values():
+    compile_prompts(_spec)
+
+
+
+# --- Batched GPT matching ---
+MODEL_CONTEXT_TOKENS = 16385          # gpt-3.5-turbo context window
+BATCH_MAX_SENTENCES = 20              # Upper bound so the model keeps judging sentences one by one
+BATCH_OUTPUT_TOKENS_PER_SENTENCE = 120  # Room reserved for each sentence's verdict in the reply
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) of a text or Prompt, used for batch sizing."""
+    if isinstance(text, Prompt):
+        return estimate_tokens(text.system) + estimate_tokens(text.user)
+    return len(text) // 4 + 1
+
+
+def make_sentence_batches(sentences, fixed_cost, output_tokens_per_sentence=BATCH_OUTPUT_TOKENS_PER_SENTENCE,
+                          token_budget=MODEL_CONTEXT_TOKENS, max_batch_size=BATCH_MAX_SENTENCES):
+    """
+    Split sentences into consecutive batches whose prompt (fixed_cost tokens
+    of instructions plus the sentences) and expected reply fit within
+    token_budget. A sentence too large for any batch still gets a batch of
+    its own.
+    """
+    batches, current, used = [], [], fixed_cost
+    for sentence in sentences:
+        cost = estimate_tokens(sentence) + 8 + output_tokens_per_sentence
+        if current and (used + cost > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current, used = [], fixed_cost
+        current.append(sentence)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+MAX_REPLY_RETRIES = 2  # re-asks for a sentence whose verdict could not be read from the reply
+
+
+def failed_verdict(error):
+    """Verdict for a sentence the model never answered readably; not cached or reused."""
+    return {"Matched Items": [], "Error": str(error)}
+
+
+def skipped_verdict():
+    """Verdict for a sentence left out without a call (prefilter, clause screening); not reused."""
+    return {"Matched Items": [], "Skipped": True}
+
+
+def ask_with_retries(sentences, ask, failed, retries=MAX_REPLY_RETRIES):
+    """
+    Call ask(sentences), which returns one result per sentence (None for
+    sentences the reply left out) or raises ReplyFormatError. An unreadable
+    reply is retried as two half batches, down to the single offending
+    sentence; left-out sentences are re-asked on their own. Each sentence
+    is re-asked at most `retries` times, after which it gets failed(error),
+    so one bad reply never costs the verdicts of the rest of the batch.
+    """
+    try:
+        results = ask(sentences)
+    except ReplyFormatError as e:
+        if len(sentences) > 1:
+            half = len(sentences) // 2
+            return (ask_with_retries(sentences[:half], ask, failed, retries)
+                    + ask_with_retries(sentences[half:], ask, failed, retries))
+        if retries <= 0:
+            return [failed(e)]
+        return ask_with_retries(sentences, ask, failed, retries - 1)
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        if retries <= 0:
+            retried = [failed("sentence left out of the reply")] * len(missing)
+        else:
+            retried = ask_with_retries([sentences[i] for i in missing], ask, failed, retries - 1)
+        for i, result in zip(missing, retried):
+            results[i] = result
+    return results
+
+
+def ask_checklist_batch(sentences, spec, telemetry=None):
+    """One completion for a batch; a validated result per sentence, None where the reply has none."""
+    prompt = build_batch_prompt(sentences, spec)
+    response = chat_completion(prompt, BATCH_OUTPUT_TOKENS_PER_SENTENCE * len(sentences), telemetry, spec.title)
+    entries = batch_entries(parse_json_reply(response.content), len(sentences))
+    results = [None] * len(sentences)
+    for idx, entry in entries.items():
+        try:
+            results[idx] = {"Matched Items": validate_matched_items(entry.get("Matched Items", []), spec.checklist)}
+        except ReplyFormatError:
+            continue
+    return results
+
+
+def match_sentences_to_checklist_batch(sentences, spec, telemetry=None):
+    """Match a batch of sentences in one completion (plus retries); returns one result dict per sentence."""
+    return ask_with_retries(list(sentences), lambda batch: ask_checklist_batch(batch, spec, telemetry), failed_verdict)
+
+
+def match_sentences_batched(sentences, spec, executor=None, on_batch=None, telemetry=None, record_lookups=True):
+    """
+    Check sentences against a section in batched completions. Cached verdicts are reused and only the remaining unique
+    sentences are sent to the model. Each batch's verdicts are cached as
+    soon as it returns, so a failure later in the run loses nothing that
+    was already paid for.
+
+    on_batch(sentences, results), if given, is called (from worker threads)
+    with the cached sentences first and then with each batch as it returns.
+    Calls and cache lookups are recorded in telemetry, if given; callers
+    that already recorded the lookups pass record_lookups=False.
+    """
+    keys, verdicts = lookup_cached_verdicts(spec, sentences, telemetry if record_lookups else None)
+    positions = {}
+    for i, key in enumerate(keys):
+        positions.setdefault(key, []).append(i)
+    pending = {key: sentences[idx[0]] for key, idx in positions.items() if key not in verdicts}
+
+    def report(batch_keys, results):
+        if on_batch is not None:
+            done = [(sentences[i], result) for key, result in zip(batch_keys, results) for i in positions[key]]
+            on_batch([s for s, _ in done], [r for _, r in done])
+
+    cached_keys = [key for key in positions if key in verdicts]
+    report(cached_keys, [verdicts[key] for key in cached_keys])
+    if pending:
+        fixed_cost = estimate_tokens(build_batch_prompt([], spec))
+        key_of = {sentence: key for key, sentence in pending.items()}
+
+        def run_batch(batch):
+            results = match_sentences_to_checklist_batch(batch, spec, telemetry)
+            batch_keys = [key_of[s] for s in batch]
+            get_verdict_cache().put_many(spec.title, [(key, result) for key, result in zip(batch_keys, results)
+                                                      if "Error" not in result])
+            report(batch_keys, results)
+            return results
+
+        batches = make_sentence_batches(list(pending.values()), fixed_cost)
+        batch_results = map_in_order(run_batch, batches, executor)
+        verdicts.update(zip(pending, [result for results in batch_results for result in results]))
+    return [verdicts[key] for key in keys]
+
+
+def prompt_batches(sentences, spec):
+    return make_sentence_batches(sentences, estimate_tokens(build_batch_prompt([], spec)))
+
+
+def batched_prompt_tokens(sentences, spec):
+    """Estimated prompt tokens of checking sentences against spec in batches."""
+    return sum(estimate_tokens(build_batch_prompt(batch, spec)) for batch in prompt_batches(sentences, spec))
+
+
+def match_sentences_early_exit(sentences, spec, executor=None, evidence_depth=1, wave_size=None,
+                               on_batch=None, stats=None, known_verdicts=(), telemetry=None):
+    """
+    match_sentences_batched that stops asking about checklist items once
+    evidence_depth sentences have matched them. Sentences go out in waves
+    of up to wave_size batches (default MAX_CONCURRENT_REQUESTS), in
+    document order; each wave's prompt lists
+    only the items still open, and once every item has enough evidence the
+    remaining sentences are not sent at all.
+
+    Verdicts of sentences that were not checked against the full checklist
+    carry "Partial": True (incremental runs do not reuse them). Savings
+    against a full run are written into stats, if given. known_verdicts
+    (e.g. reused from a previous run) count as evidence from the start.
+    """
+    keys, cached = lookup_cached_verdicts(spec, sentences, telemetry)
+    evidence = dict.fromkeys(spec.checklist, 0)
+    verdicts = [cached.get(key) for key in keys]
+    pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+
+    def count(results):
+        for result in results:
+            for match in result.get("Matched Items", []):
+                item = match.get("Checklist Item", "").strip()
+                if item in evidence:
+                    evidence[item] += 1
+
+    count(known_verdicts)
+    count(v for v in verdicts if v is not None)
+    if on_batch is not None:
+        known = [i for i, verdict in enumerate(verdicts) if verdict is not None]
+        on_batch([sentences[i] for i in known], [verdicts[i] for i in known])
+    full_cost = batched_prompt_tokens([sentences[i] for i in pending], spec)
+    sent_cost = 0
+    while pending:
+        open_items = [item for item in spec.checklist if evidence[item] < evidence_depth]
+        if not open_items:
+            break
+        wave_spec = spec._replace(checklist=tuple(open_items))
+        batches = prompt_batches([sentences[i] for i in pending], wave_spec)[:wave_size or MAX_CONCURRENT_REQUESTS]
+        wave_length = sum(len(batch) for batch in batches)
+        wave, pending = pending[:wave_length], pending[wave_length:]
+        wave_sentences = [sentences[i] for i in wave]
+        sent_cost += batched_prompt_tokens(wave_sentences, wave_spec)
+        # The lookups were recorded once above; a wave only re-checks its own keys.
+        results = match_sentences_batched(wave_sentences, wave_spec, executor, on_batch, telemetry,
+                                          record_lookups=False)
+        count(results)
+        partial = wave_spec.checklist != spec.checklist
+        for i, result in zip(wave, results):
+            verdicts[i] = dict(result, Partial=True) if partial else result
+    skipped = [{"Matched Items": [], "Partial": True} for _ in pending]
+    for i, verdict in zip(pending, skipped):
+        verdicts[i] = verdict
+    if on_batch is not None and pending:
+        on_batch([sentences[i] for i in pending], skipped)
+    if stats is not None:
+        stats[spec.title] = {
+            "Sentences Skipped": len(pending),
+            "Prompt Tokens Saved": max(0, full_cost - sent_cost),
+        }
+    return verdicts
+
+
+# --- Unified cross-section matching ---
+UNIFIED_LABEL = "All sections (unified)"  # stats/telemetry key for calls that serve every section
+
+UNIFIED_PROMPT_TEMPLATE = """You are a DPDPA compliance auditor. Evaluate each of the numbered policy sentences given after these instructions against the checklists of **several sections** of the Digital Personal Data Protection Act, 2023 (India). Each section comes with its own code, checklist and matching rules; apply a section's rules only to that section's checklist, and judge every sentence independently on its own wording.
+
+---
+
+{section_text}
+
+---
+
+Please return your response strictly in the following JSON format, with one entry for every sentence ID. "Item" names a checklist item by its section's code and its number, e.g. "{first_code}.2" for item 2 of section {first_code} (do not repeat the item's text):
+
+{{
+  "Results": [
+    {{
+      "Sentence ID": 1,
+      "Matched Items": [
+        {{
+          "Item": "{first_code}.1",
+          "Justification": "..."
+        }}
+      ]
+    }}
+  ]
+}}
+
+Use "Matched Items": [] for any sentence that does not clearly satisfy a checklist item in any section.
+"""
+
+SECTION_BLOCK_TEMPLATE = """### [{code}] {title}
+
+{intro}
+
+**Checklist Items:**
+{checklist}
+{rules}"""
+
+
+def section_codes(sections):
+    """{"S1": title, ...}: the short codes that multi-section prompts and their replies use for sections."""
+    return {f"S{i + 1}": section for i, section in enumerate(sections)}
+
+
+@functools.lru_cache(maxsize=None)
+def compile_unified_prompt(sections):
+    """System message of the unified prompt for a tuple of section titles."""
+    codes = section_codes(sections)
+    section_text = "\n\n---\n\n".join(
+        SECTION_BLOCK_TEMPLATE.format(code=code, title=spec.title, intro=spec.intro,
+                                      checklist=format_checklist(spec.checklist), rules=spec.rules)
+        for code, spec in zip(codes, (section_registry[section] for section in sections)))
+    return UNIFIED_PROMPT_TEMPLATE.format(section_text=section_text, first_code=next(iter(codes)))
+
+
+def build_unified_prompt(sentences, sections):
+    return Prompt(compile_unified_prompt(tuple(sections)), "**Policy Sentences:**\n" + number_sentences(sentences))
+
+
+def resolve_section(name, sections):
+    """Map a section code ("S2") or the model's "Section" field back to one of the requested section titles."""
+    name = (name or "").strip()
+    if name in sections:
+        return name
+    codes = section_codes(sections)
+    if name.strip("[]").upper() in codes:
+        return codes[name.strip("[]").upper()]
+    number = re.search(r"\d+", name)
+    for section in sections:
+        if number and re.match(rf"Section {number.group()}\b", section):
+            return section
+    return None
+
+
+def ask_unified_batch(sentences, sections, telemetry=None):
+    """One unified completion; {section: result} per sentence, None where the reply has none."""
+    prompt = build_unified_prompt(sentences, sections)
+    response = chat_completion(prompt, BATCH_OUTPUT_TOKENS_PER_SENTENCE * len(sentences) * len(sections),
+                               telemetry, UNIFIED_LABEL)
+    entries = batch_entries(parse_json_reply(response.content), len(sentences))
+    codes = section_codes(sections)
+    results = [None] * len(sentences)
+    for idx, entry in entries.items():
+        matches = entry.get("Matched Items", [])
+        if not isinstance(matches, list):
+            continue
+        by_section = {section: [] for section in sections}
+        for match in matches:
+            if not isinstance(match, dict):
+                continue
+            item_id = split_item_id(match.get("Item"))
+            if item_id is not None and item_id[0] in codes:
+                section, match = codes[item_id[0]], {**match, "Item": item_id[1]}
+            else:
+                section = resolve_section(match.get("Section"), sections)
+            if section is not None:
+                by_section[section].append(match)
+        results[idx] = {section: {"Matched Items": validate_matched_items(found, section_registry[section].checklist)}
+                        for section, found in by_section.items()}
+    return results
+
+
+def match_sentences_to_sections_unified(sentences, sections, telemetry=None):
+    """Match one batch of sentences against every section in one completion (plus retries)."""
+    per_sentence = ask_with_retries(list(sentences), lambda batch: ask_unified_batch(batch, sections, telemetry),
+                                    lambda error: {section: failed_verdict(error) for section in sections})
+    return {section: [result[section] for result in per_sentence] for section in sections}
+
+
+def match_sentences_unified(sentences, sections, executor=None, on_batch=None, telemetry=None):
+    """
+    Unified equivalent of match_sentences_batched for several sections at
+    once: returns {section: [result per sentence]}. on_batch(sentences,
+    {section: results}) is called as each batch returns.
+    """
+    keys, verdicts = {}, {}
+    for section in sections:
+        keys[section], verdicts[section] = lookup_cached_verdicts(section_registry[section], sentences, telemetry,
+                                                                  sections)
+    pending = list(dict.fromkeys(
+        sentence for i, sentence in enumerate(sentences)
+        if any(keys[section][i] not in verdicts[section] for section in sections)))
+    if on_batch is not None:
+        pending_set = set(pending)
+        cached = [i for i, sentence in enumerate(sentences) if sentence not in pending_set]
+        on_batch([sentences[i] for i in cached],
+                 {section: [verdicts[section][keys[section][i]] for i in cached] for section in sections})
+    if pending:
+        fixed_cost = estimate_tokens(build_unified_prompt([], sections))
+        batches = make_sentence_batches(pending, fixed_cost,
+                                        output_tokens_per_sentence=BATCH_OUTPUT_TOKENS_PER_SENTENCE * len(sections))
+
+        def run_batch(batch):
+            results = match_sentences_to_sections_unified(batch, sections, telemetry)
+            for section in sections:
+                get_verdict_cache().put_many(section, [
+                    (key, result) for key, result in zip(verdict_keys(section_registry[section], batch, sections),
+                                                         results[section])
+                    if "Error" not in result])
+            if on_batch is not None:
+                on_batch(batch, results)
+            return results
+
+        batch_results = map_in_order(run_batch, batches, executor)
+        for section in sections:
+            verdicts[section].update(zip(verdict_keys(section_registry[section], pending, sections),
+                                         [result for results in batch_results for result in results[section]]))
+    return {section: [verdicts[section][key] for key in keys[section]] for section in sections}
+
+
+# --- Clause-level screening ---
+# Clause-level runs first ask, a batch of clauses per call, which sections
+# each clause of the policy is about; the per-sentence checklist pass of a
+# section then only covers the sentences of clauses flagged for it.
+CLAUSE_LABEL = "Clause screening"  # stats/telemetry/cache key for the screening calls
+CLAUSE_BATCH_MAX = 10              # clauses per screening call
+CLAUSE_OUTPUT_TOKENS_PER_SECTION = 15
+
+CLAUSE_PROMPT_TEMPLATE = """You are a DPDPA compliance auditor. Below are the checklists of several sections of the Digital Personal Data Protection Act, 2023 (India), each with its own code; the numbered clauses of a privacy policy are given after these instructions. For every clause, list the sections whose checklist items any of its sentences could address. This is a first screening pass: when a clause might be relevant to a section, include the section; only leave out sections the clause clearly has nothing to do with.
+
+{section_text}
+
+---
+
+Please return your response strictly in the following JSON format, with one entry for every clause ID. List sections by their codes as given above (e.g. "{first_code}"):
+
+{{
+  "Results": [
+    {{
+      "Clause ID": 1,
+      "Sections": ["{first_code}"]
+    }}
+  ]
+}}
+
+Use "Sections": [] for a clause that is relevant to none of the sections.
+"""
+
+CLAUSE_SECTION_TEMPLATE = """### [{code}] {title}
+
+**Checklist Items:**
+{checklist}"""
+
+
+@functools.lru_cache(maxsize=None)
+def compile_clause_prompt(sections):
+    """System message of the clause screening prompt for a tuple of section titles."""
+    codes = section_codes(sections)
+    section_text = "\n\n".join(
+        CLAUSE_SECTION_TEMPLATE.format(code=code, title=section,
+                                       checklist=format_checklist(section_registry[section].checklist))
+        for code, section in codes.items())
+    return CLAUSE_PROMPT_TEMPLATE.format(section_text=section_text, first_code=next(iter(codes)))
+
+
+def clause_text(title, sentences):
+    return f"Clause: {title}\n" + "\n".join(f'  - "{s.strip()}"' for s in sentences)
+
+
+def build_clause_prompt(clause_texts, sections):
+    return Prompt(compile_clause_prompt(tuple(sections)),
+                  "**Policy Clauses:**\n" + "\n\n".join(f"[{i + 1}] {text}" for i, text in enumerate(clause_texts)))
+
+
+def ask_clause_batch(clause_texts, sections, telemetry=None):
+    """One screening completion; {"Sections": [...]} per clause, None where the reply has none."""
+    prompt = build_clause_prompt(clause_texts, sections)
+    response = chat_completion(prompt, CLAUSE_OUTPUT_TOKENS_PER_SECTION * len(sections) * len(clause_texts),
+                               telemetry, CLAUSE_LABEL)
+    entries = batch_entries(parse_json_reply(response.content), len(clause_texts), "Clause ID")
+    results = [None] * len(clause_texts)
+    for idx, entry in entries.items():
+        names = entry.get("Sections", [])
+        if isinstance(names, list):
+            found = {resolve_section(name, sections) for name in names if isinstance(name, str)}
+            results[idx] = {"Sections": [section for section in sections if section in found]}
+    return results
+
+
+def clause_keys(clause_texts, sections):
+    fingerprint = section_fingerprint(CLAUSE_LABEL, sections, CLAUSE_PROMPT_TEMPLATE)
+    return [verdict_key(OPENAI_MODEL, OPENAI_TEMPERATURE, fingerprint, text) for text in clause_texts]
+
+
+def clause_batches(clause_texts, sections):
+    return make_sentence_batches(clause_texts, estimate_tokens(build_clause_prompt([], sections)),
+                                 output_tokens_per_sentence=CLAUSE_OUTPUT_TOKENS_PER_SECTION * len(sections),
+                                 max_batch_size=CLAUSE_BATCH_MAX)
+
+
+def screen_clauses(clause_texts, sections, executor=None, telemetry=None):
+    """
+    The sections each clause (see clause_text) is relevant to, as a list of
+    section titles per clause. Answers are cached like sentence verdicts. A
+    clause the model never answers readably counts as relevant to every
+    section, so screening can only save calls, never lose evidence.
+    """
+    keys = clause_keys(clause_texts, sections)
+    screened = get_verdict_cache().get_many(keys)
+    if telemetry is not None:
+        hits = sum(1 for key in keys if key in screened)
+        telemetry.record_cache(CLAUSE_LABEL, hits, len(keys) - hits)
+    pending = list(dict.fromkeys(text for text, key in zip(clause_texts, keys) if key not in screened))
+    if pending:
+        def run_batch(batch):
+            results = ask_with_retries(batch, lambda texts: ask_clause_batch(texts, sections, telemetry),
+                                       lambda error: {"Sections": list(sections), "Error": str(error)})
+            batch_keys = clause_keys(batch, sections)
+            get_verdict_cache().put_many(CLAUSE_LABEL, [(key, result) for key, result in zip(batch_keys, results)
+                                                        if "Error" not in result])
+            return dict(zip(batch_keys, results))
+
+        for found in map_in_order(run_batch, clause_batches(pending, sections), executor):
+            screened.update(found)
+    return [screened[key]["Sections"] for key in keys]
+
+
+def clause_members(clauses, candidates):
+    """
+    ([candidate indices per clause], [clause titles], {candidate index:
+    title of its first clause}) for the clauses that hold any candidates.
+    """
+    index = {}
+    for i, sentence in enumerate(candidates):
+        index.setdefault(normalize_sentence(sentence), i)
+    members, titles = [], []
+    clause_of = {}
+    for title, sentences in clauses:
+        found = list(dict.fromkeys(j for j in (index.get(normalize_sentence(s)) for s in sentences) if j is not None))
+        if found:
+            members.append(found)
+            titles.append(title)
+            for j in found:
+                clause_of.setdefault(j, title)
+    return members, titles, clause_of
+
+
+def clause_relevance(clauses, candidates, sections, executor=None, telemetry=None, clause_stats=None):
+    """
+    Screen clauses ([(title, sentences)], e.g. from ingestion.group_clauses)
+    and return ({section: set of candidate indices to check}, {candidate
+    index: clause title}). Candidates that fall in no clause are checked
+    for every section.
+    """
+    members, titles, clause_of = clause_members(clauses, candidates)
+    flagged = screen_clauses([clause_text(title, [candidates[j] for j in found])
+                              for title, found in zip(titles, members)], sections, executor, telemetry)
+    unclaused = set(range(len(candidates))) - set(clause_of)
+    relevant = {section: set(unclaused) for section in sections}
+    for found, clause_sections in zip(members, flagged):
+        for section in clause_sections:
+            relevant[section].update(found)
+    if clause_stats is not None:
+        clause_stats[CLAUSE_LABEL] = {"Clauses": len(members)}
+        for section in sections:
+            clause_stats[section] = {
+                "Clauses Relevant": sum(1 for clause_sections in flagged if section in clause_sections),
+                "Sentences Skipped": len(candidates) - len(relevant[section])}
+    return relevant, clause_of
+
+
+def clause_evidence(candidates, verdicts, clause_of):
+    """Matched checklist items and evidence sentences per clause, in policy order."""
+    by_clause = {}
+    for i, verdict in enumerate(verdicts):
+        items = [match["Checklist Item"] for match in verdict.get("Matched Items", [])]
+        if items and i in clause_of:
+            evidence = by_clause.setdefault(clause_of[i], {"Clause": clause_of[i], "Checklist Items": [],
+                                                           "Evidence Sentences": []})
+            evidence["Checklist Items"].extend(item for item in items if item not in evidence["Checklist Items"])
+            evidence["Evidence Sentences"].append(candidates[i].strip())
+    return list(by_clause.values())
+
+
+def add_clause_evidence(result, candidates, verdicts, clause_of):
+    """Tag a section result's evidence with its clause and add the per-clause breakdown."""
+    titles = {candidates[i].strip(): title for i, title in clause_of.items()}
+    for match in result["Matched Sentences"]:
+        match["Clause"] = titles.get(match["Sentence"], "")
+    result["Clause Evidence"] = clause_evidence(candidates, verdicts, clause_of)
+    return result
+
+
+# --- Classification logic shared by all sections ---
+def classify_section(matched_count, total_items, scoring_bands=DEFAULT_SCORING_BANDS):
+    """Return (Match Level, Compliance Points, Severity) for matched_count of total_items checklist items."""
+    if matched_count == total_items:
+        return "Fully Compliant", 1.0, "N/A"
+    if matched_count == 0:
+        return "Non-Compliant", 0.0, "Major"
+    for most_matched, level, points, severity in scoring_bands:
+        if most_matched is None or matched_count <= most_matched:
+            return level, points, severity
+    return scoring_bands[-1][1:]
+
+
+def verdict_rows(sentences, verdicts):
+    """Flatten per-sentence verdicts into Sentence / Checklist Item / Justification rows."""
+    rows = []
+    for sentence, result in zip(sentences, verdicts):
+        for match in result.get("Matched Items", []):
+            rows.append({
+                "Sentence": sentence.strip(),
+                "Checklist Item": match["Checklist Item"].strip(),
+                "Justification": match["Justification"].strip()
+            })
+    return rows
+
+
+# --- Section analysis ---
+def analyze_section(section, policy_text, executor=None, verdicts=None, evidence_depth=1):
+    """
+    Score one registered section. verdicts are the per-sentence results for
+    the candidate sentences of policy_text; they are fetched (batched and
+    cached) when not given. Up to evidence_depth supporting sentences are
+    kept per matched checklist item. "Unchecked Sentences" counts sentences
+    whose verdict could not be read from the model even after retries.
+    """
+    spec = section_registry[section]
+    candidates = candidate_sentences(policy_text)
+    if verdicts is None:
+        verdicts = match_sentences_batched(candidates, spec, executor)
+    match_results = verdict_rows(candidates, verdicts)
+
+    # Deduplicate matched checklist items, keeping up to evidence_depth sentences each
+    matched_items = {}
+    for r in match_results:
+        evidence = matched_items.setdefault(r["Checklist Item"], [])
+        if len(evidence) < evidence_depth:
+            evidence.append(r)
+
+    match_level, points, severity = classify_section(len(matched_items), len(spec.checklist), spec.scoring_bands)
+
+    missing_items = [item for item in spec.checklist if item not in matched_items]
+    if missing_items:
+        suggested_rewrite = "### Suggested Rewrite for Missing Items:\n" + \
+            "\n".join([f"- Add this statement: *{item}*" for item in missing_items])
+    else:
+        suggested_rewrite = "All checklist items are covered."
+
+    return {
+        "DPDPA Section": spec.title,
+        "DPDPA Section Meaning": spec.meaning,
+        "Checklist Items Matched": list(set(matched_items.keys())),
+        "Matched Sentences": [r for evidence in matched_items.values() for r in evidence],
+        "Match Level": match_level,
+        "Severity": severity,
+        "Compliance Points": points,
+        "Suggested Rewrite": suggested_rewrite,
+        "Unchecked Sentences": sum(1 for verdict in verdicts if "Error" in verdict),
+    }
+
+# --- Concurrent execution engine ---
+MAX_CONCURRENT_REQUESTS = 8  # Default cap on in-flight OpenAI calls per run
+
+def map_in_order(fn, items, executor=None):
+    """Apply fn to every item, on the executor if given, keeping input order."""
+    if executor is None:
+        return [fn(item) for item in items]
+    return list(executor.map(fn, items))
+
+
+# Built once per process from the checklists; shared by all sessions.
+def get_prefilter():
+    return _get_shared("prefilter", lambda: build_prefilter(
+        {section: spec.checklist + spec.vocabulary for section, spec in section_registry.items()}))
+
+
+def estimate_calls(sentences, section):
+    """Number of batched completions needed to check sentences for one section."""
+    if not sentences:
+        return 0
+    return len(prompt_batches(sentences, section_registry[section]))
+
+
+def estimate_unified_calls(sentences, sections):
+    if not sentences:
+        return 0
+    return len(make_sentence_batches(sentences, estimate_tokens(build_unified_prompt([], sections)),
+                                     output_tokens_per_sentence=BATCH_OUTPUT_TOKENS_PER_SENTENCE * len(sections)))
+
+
+# --- Incremental re-analysis ---
+def sentence_hash(sentence):
+    return hashlib.sha1(normalize_sentence(sentence).encode("utf-8")).hexdigest()
+
+
+def align_sentences(old_sentences, new_sentences):
+    """
+    Map every index of new_sentences to the index of the same sentence in
+    old_sentences, or None if it is new or was edited. Unchanged runs are
+    found by sequence alignment of sentence hashes; sentences that merely
+    moved fall back to a hash lookup.
+    """
+    old_hashes = [sentence_hash(s) for s in old_sentences]
+    new_hashes = [sentence_hash(s) for s in new_sentences]
+    mapping = [None] * len(new_hashes)
+    matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for k in range(j2 - j1):
+                mapping[j1 + k] = i1 + k
+    first_seen = {}
+    for i, h in enumerate(old_hashes):
+        first_seen.setdefault(h, i)
+    for j, h in enumerate(new_hashes):
+        if mapping[j] is None and h in first_seen:
+            mapping[j] = first_seen[h]
+    return mapping
+
+
+def reusable_verdicts(previous, section, candidates):
+    """
+    {candidate index: verdict} that can be carried over from the previous
+    run. Partial (early-exit), skipped and failed verdicts are not: the
+    sentence was never fully checked.
+    """
+    if not previous or section not in previous["verdicts"]:
+        return {}
+    old_verdicts = previous["verdicts"][section]
+    return {j: old_verdicts[i] for j, i in enumerate(align_sentences(previous["sentences"], candidates))
+            if i is not None and not old_verdicts[i].get("Partial") and not old_verdicts[i].get("Skipped")
+            and "Error" not in old_verdicts[i]}
+
+
+def section_verdicts(section, candidates, executor=None, previous=None,
+                     prefilter_threshold=0, prefilter_stats=None, on_progress=None,
+                     early_exit=False, evidence_depth=1, wave_size=None, early_exit_stats=None, telemetry=None,
+                     relevant=None, clause_stats=None):
+    """
+    Per-sentence verdicts for one section, re-querying only sentences the
+    previous run did not cover. Sentences scoring below prefilter_threshold
+    on the local lexical prefilter get a skipped_verdict without a call, as
+    do sentences outside relevant (the candidate indices of the clauses
+    screened as relevant to the section; None = all). With early_exit, see
+    match_sentences_early_exit.
+
+    on_progress(section, sentences_done, matched_rows) is called with
+    increments as verdicts become available.
+    """
+    verdicts = reusable_verdicts(previous, section, candidates)
+    todo = [i for i in range(len(candidates)) if i not in verdicts]
+    if relevant is not None:
+        screened = [i for i in todo if i in relevant]
+        if clause_stats is not None:
+            clause_stats[section] = {
+                **clause_stats.get(section, {}),
+                "Sentences Skipped": len(todo) - len(screened),
+                "Calls Saved": estimate_calls([candidates[i] for i in todo], section)
+                               - estimate_calls([candidates[i] for i in screened], section),
+            }
+        todo = screened
+    kept = [i for i in todo if get_prefilter().is_relevant(candidates[i], section, prefilter_threshold)]
+    if prefilter_stats is not None and prefilter_threshold > 0:
+        prefilter_stats[section] = {
+            "Sentences Skipped": len(todo) - len(kept),
+            "Calls Saved": estimate_calls([candidates[i] for i in todo], section)
+                           - estimate_calls([candidates[i] for i in kept], section),
+        }
+    for i in set(range(len(candidates))) - set(verdicts) - set(kept):
+        verdicts[i] = skipped_verdict()
+    on_batch = None
+    if on_progress is not None:
+        known = sorted(verdicts)
+        on_progress(section, len(known), verdict_rows([candidates[i] for i in known], [verdicts[i] for i in known]))
+        on_batch = lambda sentences, results: on_progress(section, len(sentences), verdict_rows(sentences, results))
+    spec = section_registry[section]
+    if early_exit:
+        fresh = match_sentences_early_exit([candidates[i] for i in kept], spec, executor, evidence_depth, wave_size,
+                                           on_batch, early_exit_stats, known_verdicts=verdicts.values(),
+                                           telemetry=telemetry)
+    else:
+        fresh = match_sentences_batched([candidates[i] for i in kept], spec, executor, on_batch, telemetry)
+    verdicts.update(zip(kept, fresh))
+    return [verdicts[i] for i in range(len(candidates))]
+
+
+def run_sections_concurrently(policy_text, sections, max_concurrency=MAX_CONCURRENT_REQUESTS, unified=False,
+                              previous=None, verdicts_out=None, prefilter_threshold=0, prefilter_stats=None,
+                              on_progress=None, early_exit=False, evidence_depth=1, early_exit_stats=None,
+                              telemetry=None, clauses=None, clause_stats=None):
+    """
+    Run the analyzers for all sections in parallel.
+
+    Sections get their own threads and share one sentence pool, so at most
+    max_concurrency OpenAI calls are in flight across the whole run. Yields
+    (index, section, result, error) in completion order; index is the
+    section's position in `sections` so callers can restore a fixed order.
+
+    With unified=True every sentence batch is asked about all sections in a
+    single call, and the verdicts are fanned back out to the per-section
+    analyzers for scoring.
+
+    previous is an earlier run ({"sentences": [...], "verdicts": {section:
+    [...]}}); verdicts for sentences that are unchanged since then are
+    reused. The per-sentence verdicts of this run are written into
+    verdicts_out, if given, so it can serve as the next `previous`.
+
+    A prefilter_threshold above 0 drops sentences the lexical prefilter
+    rates as irrelevant before any call; per-section savings are then
+    written into prefilter_stats (left empty when the prefilter is off).
+
+    on_progress(section, sentences_done, matched_rows) is called from worker
+    threads with increments as verdicts arrive; see stream_section_events.
+
+    early_exit stops asking about checklist items once evidence_depth
+    sentences match them, and stops a section once all items do (see
+    match_sentences_early_exit; per-section savings go to
+    early_exit_stats). It applies to per-section runs only: a unified
+    batch serves every section at once. evidence_depth also caps the
+    supporting sentences reported per item.
+
+    Model calls and cache lookups are recorded in telemetry (a
+    telemetry.RunTelemetry), if given, which is finished with the run.
+
+    clauses ([(title, sentences)], e.g. from ingestion.group_clauses) makes
+    it a clause-level run: the clauses are screened first (see
+    clause_relevance) and each section only checks the sentences of the
+    clauses flagged for it. Results then carry the clause of every evidence
+    sentence and a "Clause Evidence" breakdown; per-section savings go to
+    clause_stats.
+    """
+    if verdicts_out is None:
+        verdicts_out = {}
+    candidates = candidate_sentences(policy_text)
+    relevant, clause_of = None, None
+    if clauses:
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+                relevant, clause_of = clause_relevance(clauses, candidates, sections, pool, telemetry, clause_stats)
+        except Exception as e:
+            for i, section in enumerate(sections):
+                yield i, section, None, e
+            if telemetry is not None:
+                telemetry.finish()
+            return
+    if unified:
+        yield from run_sections_unified(policy_text, sections, max_concurrency, previous, verdicts_out,
+                                        prefilter_threshold, prefilter_stats, on_progress, evidence_depth, telemetry,
+                                        relevant, clause_of)
+        if telemetry is not None:
+            telemetry.finish()
+        return
+
+    def analyze(section, executor):
+        verdicts_out[section] = section_verdicts(section, candidates, executor, previous,
+                                                 prefilter_threshold, prefilter_stats, on_progress,
+                                                 early_exit, evidence_depth, max_concurrency, early_exit_stats,
+                                                 telemetry, relevant and relevant[section], clause_stats)
+        result = analyze_section(section, candidates, verdicts=verdicts_out[section], evidence_depth=evidence_depth)
+        if clause_of is not None:
+            add_clause_evidence(result, candidates, verdicts_out[section], clause_of)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as sentence_pool, \
+            ThreadPoolExecutor(max_workers=max(1, len(sections))) as section_pool:
+        futures = {
+            section_pool.submit(analyze, section, sentence_pool): (i, section)
+            for i, section in enumerate(sections)
+        }
+        for future in as_completed(futures):
+            i, section = futures[future]
+            try:
+                yield i, section, future.result(), None
+            except Exception as e:
+                yield i, section, None, e
+    if telemetry is not None:
+        telemetry.finish()
+
+def run_sections_unified(policy_text, sections, max_concurrency=MAX_CONCURRENT_REQUESTS, previous=None,
+                         verdicts_out=None, prefilter_threshold=0, prefilter_stats=None, on_progress=None,
+                         evidence_depth=1, telemetry=None, relevant=None, clause_of=None):
+    candidates = candidate_sentences(policy_text)
+    reused = {section: reusable_verdicts(previous, section, candidates) for section in sections}
+    # A sentence is sent once for all sections, so it is only skipped when
+    # the clause screening or the prefilter rules it out for every section
+    # that still needs it.
+    needed = [i for i in range(len(candidates)) if any(i not in reused[section] for section in sections)]
+    todo = [i for i in needed
+            if any(i not in reused[section] and (relevant is None or i in relevant[section])
+                   and get_prefilter().is_relevant(candidates[i], section, prefilter_threshold)
+                   for section in sections)]
+    if prefilter_stats is not None and prefilter_threshold > 0:
+        prefilter_stats[UNIFIED_LABEL] = {
+            "Sentences Skipped": len(needed) - len(todo),
+            "Calls Saved": estimate_unified_calls([candidates[i] for i in needed], sections)
+                           - estimate_unified_calls([candidates[i] for i in todo], sections),
+        }
+    on_batch = None
+    if on_progress is not None:
+        pending = set(todo)
+        known = [i for i in range(len(candidates)) if i not in pending]
+        for section in sections:
+            on_progress(section, len(known), verdict_rows([candidates[i] for i in known],
+                                                          [reused[section].get(i, {}) for i in known]))
+
+        def report_batch(sentences, results):
+            for section in sections:
+                on_progress(section, len(sentences), verdict_rows(sentences, results[section]))
+        on_batch = report_batch
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            fresh = match_sentences_unified([candidates[i] for i in todo], sections, pool, on_batch, telemetry)
+    except Exception as e:
+        for i, section in enumerate(sections):
+            yield i, section, None, e
+        return
+    for i, section in enumerate(sections):
+        verdicts = [reused[section].get(j) or skipped_verdict() for j in range(len(candidates))]
+        for j, verdict in zip(todo, fresh[section]):
+            verdicts[j] = verdict
+        if verdicts_out is not None:
+            verdicts_out[section] = verdicts
+        try:
+            result = analyze_section(section, candidates, verdicts=verdicts, evidence_depth=evidence_depth)
+            if clause_of is not None:
+                add_clause_evidence(result, candidates, verdicts, clause_of)
+            yield i, section, result, None
+        except Exception as e:
+            yield i, section, None, e
+
+
+def stream_section_events(policy_text, sections, **run_options):
+    """
+    Drive run_sections_concurrently on a background thread and yield its
+    events on the calling (Streamlit script) thread, which is the only
+    thread allowed to update the page:
+
+    ("progress", section, sentences_done, matched_rows) as verdicts arrive,
+    ("done", index, section, result, error) as each section finishes.
+    """
+    events = queue.Queue()
+
+    def worker():
+        try:
+            for i, section, result, error in run_sections_concurrently(
+                    policy_text, sections, on_progress=lambda *event: events.put(("progress", *event)),
+                    **run_options):
+                events.put(("done", i, section, result, error))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=worker, daemon=True).start()
+    while (event := events.get()) is not None:
+        yield event
+
+
+def analyze_policy(policy_text, sections=None, **run_options):
+    """
+    Analyze a policy against sections (default: all) and return
+    (results, errors): the result dicts in section order, and
+    {section: exception} for sections that failed.
+    """
+    sections = list(sections or dpdpa_sections)
+    results = [None] * len(sections)
+    errors = {}
+    for i, section, result, error in run_sections_concurrently(policy_text, sections, **run_options):
+        if error is None:
+            results[i] = result
+        else:
+            errors[section] = error
+    return [r for r in results if r is not None], errors
+
+
+# --- Execution planning ---
+PLAN_CALL_SECONDS = 4.0             # latency assumed for one batched call when no run has measured it yet
+PLAN_REPLY_TOKENS_PER_SENTENCE = 25  # typical reply per sentence (most sentences match nothing)
+
+
+def plan_run(candidates, sections, max_concurrency=MAX_CONCURRENT_REQUESTS, unified=False, previous=None,
+             prefilter_threshold=0, clauses=None, call_seconds=PLAN_CALL_SECONDS, **run_options):
+    """
+    What run_sections_concurrently would send for these options, worked out
+    without sending anything (the verdict cache is only looked at, not
+    used). Returns {"Sections": [row per section, plus one for unified
+    batches and/or clause screening], "Total": {...}}; a row counts the
+    candidate sentences reused from previous, dropped by the prefilter,
+    already cached and left to check, and the calls and tokens that needs.
+    The total adds the estimated wall time, from call_seconds per call,
+    max_concurrency and the RPM/TPM limits, and the estimated cost.
+
+    Clause screening and early exit can only leave sentences out, so with
+    them the sentence checks are an upper bound ("Upper Bound" is True).
+    Other run_options do not change the plan.
+    """
+    cache = get_verdict_cache()
+    rows, pending = [], {}
+    for section in sections:
+        spec = section_registry[section]
+        reused = reusable_verdicts(previous, section, candidates)
+        todo = [i for i in range(len(candidates)) if i not in reused]
+        kept = [i for i in todo if get_prefilter().is_relevant(candidates[i], section, prefilter_threshold)]
+        keys = verdict_keys(spec, [candidates[i] for i in kept], sections if unified else None)
+        cached = cache.cached_keys(keys)
+        pending[section] = list(dict.fromkeys(candidates[i] for i, key in zip(kept, keys) if key not in cached))
+        row = {"Section": section, "Sentences": len(candidates), "Reused": len(reused),
+               "Prefiltered": len(todo) - len(kept), "Cached": len(kept) - len(pending[section]),
+               "To Check": len(pending[section])}
+        if not unified:
+            batches = prompt_batches(pending[section], spec)
+            row.update({"Calls": len(batches),
+                        "Prompt Tokens": sum(estimate_tokens(build_batch_prompt(batch, spec)) for batch in batches),
+                        "Reserved Reply Tokens": BATCH_OUTPUT_TOKENS_PER_SENTENCE * len(pending[section]),
+                        "Completion Tokens": PLAN_REPLY_TOKENS_PER_SENTENCE * len(pending[section])})
+        rows.append(row)
+    if unified and sections:
+        # A unified batch asks about every section, so a sentence is sent once if any section needs it.
+        todo = list(dict.fromkeys(s for sentences in pending.values() for s in sentences))
+        batches = make_sentence_batches(todo, estimate_tokens(build_unified_prompt([], sections)),
+                                        output_tokens_per_sentence=BATCH_OUTPUT_TOKENS_PER_SENTENCE * len(sections))
+        rows.append({"Section": UNIFIED_LABEL, "Sentences": len(candidates), "To Check": len(todo),
+                     "Calls": len(batches),
+                     "Prompt Tokens": sum(estimate_tokens(build_unified_prompt(batch, sections)) for batch in batches),
+                     "Reserved Reply Tokens": BATCH_OUTPUT_TOKENS_PER_SENTENCE * len(sections) * len(todo),
+                     "Completion Tokens": PLAN_REPLY_TOKENS_PER_SENTENCE * len(sections) * len(todo)})
+    phases = [[row for row in rows if row["Section"] != CLAUSE_LABEL and "Calls" in row]]
+    if clauses and sections:
+        members, titles, _ = clause_members(clauses, candidates)
+        texts = [clause_text(title, [candidates[j] for j in found]) for title, found in zip(titles, members)]
+        cached = cache.cached_keys(clause_keys(texts, sections))
+        todo = list(dict.fromkeys(text for text, key in zip(texts, clause_keys(texts, sections))
+                                  if key not in cached))
+        batches = clause_batches(todo, sections)
+        screening = {"Section": CLAUSE_LABEL, "Sentences": len(candidates), "Cached": len(texts) - len(todo),
+                     "To Check": len(todo), "Calls": len(batches),
+                     "Prompt Tokens": sum(estimate_tokens(build_clause_prompt(batch, sections)) for batch in batches),
+                     "Reserved Reply Tokens": CLAUSE_OUTPUT_TOKENS_PER_SECTION * len(sections) * len(todo),
+                     "Completion Tokens": CLAUSE_OUTPUT_TOKENS_PER_SECTION * len(sections) * len(todo)}
+        rows.insert(0, screening)
+        phases.insert(0, [screening])  # screening finishes before any sentence is checked
+
+    def phase_seconds(phase_rows):
+        calls = sum(row["Calls"] for row in phase_rows)
+        reserved = sum(row["Prompt Tokens"] + row["Reserved Reply Tokens"] for row in phase_rows)
+        if not calls:
+            return 0.0
+        return max(calls * call_seconds / max(1, min(max_concurrency, settings["max_concurrency"])),
+                   calls * 60 / settings["rpm_limit"], reserved * 60 / settings["tpm_limit"])
+
+    metered = [row for phase in phases for row in phase]
+    prompt_tokens = sum(row["Prompt Tokens"] for row in metered)
+    completion_tokens = sum(row["Completion Tokens"] for row in metered)
+    return {
+        "Sections": rows,
+        "Total": {
+            "Sections": len(sections),
+            "Sentences": len(candidates),
+            "Calls": sum(row["Calls"] for row in metered),
+            "Prompt Tokens": prompt_tokens,
+            "Completion Tokens": completion_tokens,
+            "Estimated Seconds": round(sum(phase_seconds(phase) for phase in phases), 1),
+            "Estimated Cost (USD)": round(estimate_cost(OPENAI_MODEL, prompt_tokens, completion_tokens), 4),
+            "Upper Bound": bool(clauses) or bool(run_options.get("early_exit")),
+        },
+    }
+
+
+def overall_compliance(results, section_count):
+    """Overall compliance percentage, as shown on the checker page."""
+    if not section_count:
+        return 0.0
+    return sum(float(r["Compliance Points"]) for r in results) / section_count * 100
+
+
+def score_changes(previous_results, results):
+    """Sections whose Match Level or Compliance Points differ from the previous run."""
+    changes = []
+    for row in results:
+        before = previous_results.get(row["DPDPA Section"])
+        if before is None:
+            continue
+        if (before["Compliance Points"], before["Match Level"]) != (row["Compliance Points"], row["Match Level"]):
+            changes.append((row["DPDPA Section"], before, row))
+    return changes
@@ -0,0 +1,237 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_HISTORY_PATH = os.environ.get("DPDPA_HISTORY_PATH", os.path.join(".dpdpa_cache", "history.sqlite3"))
+DEFAULT_ORGANIZATION = "My Organization"
+DEFAULT_POLICY = "Untitled policy"
+ALL_POLICIES = ""  # aggregate rows over every policy of an organization
+OVERALL = ""       # aggregate rows for the overall score rather than one section
+
+AGGREGATE_COLUMNS = ("organization", "policy", "section", "runs", "points_sum", "best", "worst", "last_points",
+                     "prev_points", "last_match_level", "last_severity", "last_run", "last_finished")
+RUN_COLUMNS = ("id", "ref", "organization", "policy", "finished", "overall", "sections", "sentences")
+
+
+def standing(policies):
+    """
+    (latest, previous) average score over policies, given (last_run,
+    last_points, prev_points) per policy. The previous average takes the
+    most recently run policy at its prev_points, or without it if that was
+    its first run; None when there was no earlier standing.
+    """
+    policies = sorted(policies)
+    latest = sum(points for _, points, _ in policies) / len(policies)
+    *others, (_, _, prev_points) = policies
+    earlier = [points for _, points, _ in others] + ([prev_points] if prev_points is not None else [])
+    return latest, (sum(earlier) / len(earlier) if earlier else None)
+
+
+class ComplianceHistory:
+    """
+    Persistent history of compliance runs in SQLite: every run's section
+    result dicts (Match Level, Severity, Compliance Points, evidence), by
+    organization and policy.
+
+    Recording a run also updates running aggregates, per (organization,
+    policy, section) and per day, with policy ALL_POLICIES and section
+    OVERALL standing for the totals. Dashboard queries read those
+    aggregates, so their cost depends on the number of policies and
+    sections, not on how many runs are stored. Points are 0-1 per section;
+    the OVERALL rows hold the overall score as the same 0-1 fraction.
+    Safe to share across threads; every process opens its own
+    ComplianceHistory on the same file.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                ref TEXT UNIQUE,
+                organization TEXT NOT NULL,
+                policy TEXT NOT NULL,
+                finished REAL NOT NULL,
+                overall REAL NOT NULL,
+                sections INTEGER NOT NULL,
+                sentences INTEGER,
+                telemetry TEXT
+            );
+            CREATE INDEX IF NOT EXISTS runs_organization ON runs(organization, id);
+            CREATE INDEX IF NOT EXISTS runs_policy ON runs(organization, policy, id);
+            CREATE TABLE IF NOT EXISTS section_results (
+                run_id INTEGER NOT NULL,
+                section TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                match_level TEXT NOT NULL,
+                severity TEXT NOT NULL,
+                points REAL NOT NULL,
+                result TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS section_results_run ON section_results(run_id, position);
+            CREATE TABLE IF NOT EXISTS aggregates (
+                organization TEXT NOT NULL,
+                policy TEXT NOT NULL,
+                section TEXT NOT NULL,
+                runs INTEGER NOT NULL,
+                points_sum REAL NOT NULL,
+                best REAL NOT NULL,
+                worst REAL NOT NULL,
+                last_points REAL NOT NULL,
+                prev_points REAL,
+                last_match_level TEXT,
+                last_severity TEXT,
+                last_run INTEGER NOT NULL,
+                last_finished REAL NOT NULL,
+                PRIMARY KEY (organization, policy, section)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS daily (
+                organization TEXT NOT NULL,
+                policy TEXT NOT NULL,
+                section TEXT NOT NULL,
+                day TEXT NOT NULL,
+                runs INTEGER NOT NULL,
+                points_sum REAL NOT NULL,
+                PRIMARY KEY (organization, policy, section, day)
+            ) WITHOUT ROWID;
+        """)
+
+    def record_run(self, results, organization=DEFAULT_ORGANIZATION, policy=DEFAULT_POLICY, section_count=None,
+                   ref=None, sentences=None, telemetry=None, finished=None):
+        """
+        Store one run's section results (the dicts analyze_policy returns)
+        and fold them into the aggregates. section_count is the number of
+        sections the overall score is taken over (default: len(results)).
+        ref identifies the run elsewhere (e.g. a job ID); a run whose ref
+        is already stored is not recorded twice. Returns the run ID, or
+        None for such a duplicate.
+        """
+        organization = organization.strip() or DEFAULT_ORGANIZATION
+        policy = policy.strip() or DEFAULT_POLICY
+        finished = time.time() if finished is None else finished
+        section_count = section_count or len(results)
+        overall = sum(float(r["Compliance Points"]) for r in results) / section_count if section_count else 0.0
+        day = time.strftime("%Y-%m-%d", time.localtime(finished))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if ref is not None and self._conn.execute("SELECT 1 FROM runs WHERE ref = ?", (ref,)).fetchone():
+                    self._conn.execute("COMMIT")
+                    return None
+                run_id = self._conn.execute(
+                    "INSERT INTO runs (ref, organization, policy, finished, overall, sections, sentences, telemetry) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ref, organization, policy, finished, overall, section_count, sentences,
+                     json.dumps(telemetry) if telemetry is not None else None)).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO section_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, r["DPDPA Section"], position, r["Match Level"], r["Severity"],
+                      float(r["Compliance Points"]), json.dumps(r, ensure_ascii=False))
+                     for position, r in enumerate(results)])
+                updates = [(OVERALL, overall, None, None)] + [
+                    (r["DPDPA Section"], float(r["Compliance Points"]), r["Match Level"], r["Severity"])
+                    for r in results]
+                for scope in (policy, ALL_POLICIES):
+                    self._conn.executemany(
+                        "INSERT INTO aggregates VALUES (?, ?, ?, 1, ?, ?, ?, ?, NULL, ?, ?, ?, ?) "
+                        "ON CONFLICT DO UPDATE SET runs = runs + 1, points_sum = points_sum + excluded.points_sum, "
+                        "best = max(best, excluded.best), worst = min(worst, excluded.worst), "
+                        "prev_points = last_points, last_points = excluded.last_points, "
+                        "last_match_level = excluded.last_match_level, last_severity = excluded.last_severity, "
+                        "last_run = excluded.last_run, last_finished = excluded.last_finished",
+                        [(organization, scope, section, points, points, points, points, match_level, severity,
+                          run_id, finished) for section, points, match_level, severity in updates])
+                    self._conn.executemany(
+                        "INSERT INTO daily VALUES (?, ?, ?, ?, 1, ?) "
+                        "ON CONFLICT DO UPDATE SET runs = runs + 1, points_sum = points_sum + excluded.points_sum",
+                        [(organization, scope, section, day, points) for section, points, _, _ in updates])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return run_id
+
+    def organizations(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT organization FROM aggregates WHERE policy = ? AND section = ? ORDER BY organization",
+                (ALL_POLICIES, OVERALL)).fetchall()
+        return [organization for (organization,) in rows]
+
+    def policies(self, organization):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT policy FROM aggregates WHERE organization = ? AND section = ? AND policy != ? ORDER BY policy",
+                (organization, OVERALL, ALL_POLICIES)).fetchall()
+        return [policy for (policy,) in rows]
+
+    def summary(self, organization, policy=ALL_POLICIES):
+        """
+        {section: aggregate dict} for one policy (or all of them), with the
+        OVERALL key for the overall score. Each dict has runs, average,
+        best, worst, last_points, prev_points (None after a single run),
+        last_match_level, last_severity, last_run and last_finished.
+
+        For ALL_POLICIES, last_points is the organization-wide standing:
+        the average of each policy's latest score. prev_points is that
+        average before the latest run, so the change compares like with
+        like; last_match_level and last_severity are the latest run's.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(AGGREGATE_COLUMNS)} FROM aggregates WHERE organization = ? AND policy = ?",
+                (organization, policy)).fetchall()
+            if policy == ALL_POLICIES:
+                latest = self._conn.execute(
+                    "SELECT section, last_points, prev_points, last_run FROM aggregates "
+                    "WHERE organization = ? AND policy != ?", (organization, ALL_POLICIES)).fetchall()
+        summary = {}
+        for row in rows:
+            aggregate = dict(zip(AGGREGATE_COLUMNS, row))
+            aggregate["average"] = aggregate.pop("points_sum") / aggregate["runs"]
+            summary[aggregate["section"]] = aggregate
+        if policy == ALL_POLICIES:
+            by_section = {}
+            for section, last_points, prev_points, last_run in latest:
+                by_section.setdefault(section, []).append((last_run, last_points, prev_points))
+            for section, policies in by_section.items():
+                if section in summary:
+                    summary[section]["last_points"], summary[section]["prev_points"] = standing(policies)
+        return summary
+
+    def trend(self, organization, policy=ALL_POLICIES, section=OVERALL, days=90):
+        """[(day, runs, average points)] for the last `days` days that had runs, oldest first."""
+        since = time.strftime("%Y-%m-%d", time.localtime(time.time() - days * 86400))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, runs, points_sum / runs FROM daily "
+                "WHERE organization = ? AND policy = ? AND section = ? AND day >= ? ORDER BY day",
+                (organization, policy, section, since)).fetchall()
+        return rows
+
+    def recent_runs(self, organization, policy=ALL_POLICIES, limit=20):
+        """The latest runs as dicts (without their section results), newest first."""
+        columns = ", ".join(RUN_COLUMNS)
+        with self._lock:
+            if policy == ALL_POLICIES:
+                rows = self._conn.execute(f"SELECT {columns} FROM runs WHERE organization = ? ORDER BY id DESC LIMIT ?",
+                                          (organization, limit)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM runs WHERE organization = ? AND policy = ? ORDER BY id DESC LIMIT ?",
+                    (organization, policy, limit)).fetchall()
+        return [dict(zip(RUN_COLUMNS, row)) for row in rows]
+
+    def run_results(self, run_id):
+        """The section result dicts stored for one run, in the order they were recorded."""
+        with self._lock:
+            rows = self._conn.execute("SELECT result FROM section_results WHERE run_id = ? ORDER BY position",
+                                      (run_id,)).fetchall()
+        return [json.loads(result) for (result,) in rows]
@@ -0,0 +1,230 @@
+"""
+Streaming text extraction for uploaded or on-disk policy documents.
+
+.docx files are read straight from the zip with an incremental XML parser,
+so a several-hundred-page bundle never has to be held as one DOM or one
+string. Paragraphs, list items and table cells come out one block at a
+time, each tagged with the heading and clause number it falls under, and
+iter_sentences() turns the blocks into sentences lazily.
+"""
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+from dpdpa_engine import sent_tokenize
+
+Block = namedtuple("Block", "text kind heading clause")
+PolicySentence = namedtuple("PolicySentence", "text kind heading clause")
+Clause = namedtuple("Clause", "title sentences")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_CLAUSE_NUMBER = re.compile(r"^\s*(?:(?:section|clause|article)\s+)?((?:\d+\.)*\d+\.?|\([a-z0-9]{1,4}\)|[A-Z]\.)\s+",
+                            re.IGNORECASE)
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•▪◦]|\(?(?:\d{1,3}|[a-z]|[ivx]{1,4})[.)])\s+", re.IGNORECASE)
+_PROGRESS_EVERY = 200  # blocks between progress callbacks
+_MAX_PARAGRAPH_CHARS = 100_000  # keeps runaway unbroken paragraphs bounded
+_MINOR_WORDS = frozenset("a an and as at by for from in of on or the to under with".split())
+CLAUSE_MAX_SENTENCES = 12  # longer clauses are screened in parts, so one flag does not pull in a whole chapter
+
+
+def _clause_number(text):
+    match = _CLAUSE_NUMBER.match(text)
+    return match.group(1).rstrip(".") if match else None
+
+
+def _title_like(text):
+    """Title Case, allowing lower-case connecting words: "Rights of the Data Principal"."""
+    words = [word.strip("()\"'“”‘’-–—/&") for word in text.split()]
+    words = [word for word in words if word[:1].isalpha()]
+    return bool(words) and words[0][0].isupper() and \
+        all(word[0].isupper() or word.lower() in _MINOR_WORDS for word in words)
+
+
+def _looks_like_heading(line):
+    """
+    A short line that reads as a title rather than a sentence. A clause
+    number alone does not make a heading: "(a) We erase personal data when
+    consent is withdrawn" is a list item, "2. Rights of the Data Principal"
+    a heading.
+    """
+    words = line.split()
+    if not words or len(words) > 12 or line.rstrip().endswith((".", ";", ",")):
+        return False
+    number = _CLAUSE_NUMBER.match(line)
+    body = (line[number.end():] if number else line).strip()
+    title = body.rstrip(":").strip()
+    if not title:
+        return number is not None  # a bare clause number on its own line
+    return title.isupper() or _title_like(title) or (body.endswith(":") and len(title.split()) <= 3)
+
+
+def _source_size(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    position = source.tell()
+    size = source.seek(0, os.SEEK_END)
+    source.seek(position)
+    return size
+
+
+def _open_binary(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb")
+    source.seek(0)
+    return _Borrowed(source)
+
+
+class _Borrowed:
+    """Context manager that hands out a caller-owned file without closing it."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def __enter__(self):
+        return self.f
+
+    def __exit__(self, *exc):
+        return False
+
+
+def iter_docx_raw(source, on_progress=None):
+    """(text, kind) for every non-empty paragraph of a .docx, in document order."""
+    with zipfile.ZipFile(source) as archive:
+        total = archive.getinfo("word/document.xml").file_size or 1
+        with archive.open("word/document.xml") as xml:
+            table_depth = 0
+            count = 0
+            for event, elem in ET.iterparse(xml, events=("start", "end")):
+                if elem.tag == _W + "tbl":
+                    table_depth += 1 if event == "start" else -1
+                    if event == "end":
+                        elem.clear()
+                    continue
+                if event != "end" or elem.tag != _W + "p":
+                    continue
+                parts = []
+                for node in elem.iter():
+                    if node.tag == _W + "t":
+                        parts.append(node.text or "")
+                    elif node.tag in (_W + "tab", _W + "br"):
+                        parts.append(" ")
+                style = elem.find(f"{_W}pPr/{_W}pStyle")
+                style = (style.get(_W + "val") or "").lower() if style is not None else ""
+                numbered = elem.find(f"{_W}pPr/{_W}numPr") is not None
+                elem.clear()
+                text = re.sub(r"\s+", " ", "".join(parts)).strip()
+                if not text:
+                    continue
+                if table_depth:
+                    kind = "table_cell"
+                elif style.startswith(("heading", "title")):
+                    kind = "heading"
+                elif numbered or style.startswith("list"):
+                    kind = "list_item"
+                else:
+                    kind = "paragraph"
+                yield text, kind
+                count += 1
+                if on_progress is not None and count % _PROGRESS_EVERY == 0:
+                    on_progress(min(1.0, xml.tell() / total))
+
+
+def iter_txt_raw(source, on_progress=None, encoding="utf-8"):
+    """(text, kind) for the paragraphs, list items and heading lines of a plain-text policy."""
+    total = _source_size(source) or 1
+    consumed = 0
+    count = 0
+    paragraph, size = [], 0
+    with _open_binary(source) as f:
+        for raw in f:
+            consumed += len(raw)
+            line = raw.decode(encoding, errors="replace").strip()
+            heading = bool(line) and _looks_like_heading(line)
+            list_item = bool(line) and not heading and (_LIST_MARKER.match(line) is not None
+                                                        or _CLAUSE_NUMBER.match(line) is not None)
+            if line and not heading and not list_item:
+                paragraph.append(line)
+                size += len(line)
+                if size < _MAX_PARAGRAPH_CHARS:
+                    continue
+            if paragraph:
+                yield " ".join(paragraph), "paragraph"
+                paragraph, size = [], 0
+            if heading:
+                yield line, "heading"
+            elif list_item:
+                yield line, "list_item"
+            count += 1
+            if on_progress is not None and count % _PROGRESS_EVERY == 0:
+                on_progress(min(1.0, consumed / total))
+    if paragraph:
+        yield " ".join(paragraph), "paragraph"
+
+
+def iter_blocks(source, filename=None, on_progress=None):
+    """
+    Blocks of a .docx or .txt policy with the heading and clause number
+    they fall under. source is a path or a binary file object (such as a
+    Streamlit UploadedFile); filename decides the format when source is a
+    file object.
+    """
+    name = (filename or str(source)).lower()
+    raw = iter_docx_raw(source, on_progress) if name.endswith(".docx") else iter_txt_raw(source, on_progress)
+    heading = None
+    clause = None
+    for text, kind in raw:
+        number = _clause_number(text)
+        if kind == "heading":
+            heading = text
+            clause = number
+        elif number is not None and kind != "table_cell":
+            clause = number
+        yield Block(text, kind, heading, clause)
+    if on_progress is not None:
+        on_progress(1.0)
+
+
+def iter_sentences(source, filename=None, on_progress=None):
+    """Sentences of a policy document, produced lazily; headings are kept as metadata only."""
+    for block in iter_blocks(source, filename, on_progress):
+        if block.kind == "heading":
+            continue
+        for sentence in sent_tokenize(block.text):
+            if sentence.strip():
+                yield PolicySentence(sentence.strip(), block.kind, block.heading, block.clause)
+
+
+def _clause_title(heading, clause):
+    if heading and (clause is None or _clause_number(heading) == clause):
+        return heading
+    if heading:
+        return f"{heading} / {clause}"
+    return f"Clause {clause}" if clause else None
+
+
+def group_clauses(sentences, max_sentences=CLAUSE_MAX_SENTENCES):
+    """
+    Group PolicySentences (from iter_sentences) into Clauses: runs of
+    sentences under the same heading and clause number, split into parts
+    of at most max_sentences. Text without any headings or numbering is
+    cut into plain parts of max_sentences sentences.
+    """
+    runs = []  # [heading, clause, part, first sentence number, texts]
+    for number, sentence in enumerate(sentences, 1):
+        last = runs[-1] if runs else None
+        if last is None or (last[0], last[1]) != (sentence.heading, sentence.clause):
+            runs.append([sentence.heading, sentence.clause, 0, number, []])
+        elif len(last[4]) >= max_sentences:
+            runs.append([sentence.heading, sentence.clause, last[2] + 1, number, []])
+        runs[-1][4].append(sentence.text)
+    clauses = []
+    for heading, clause, part, first, texts in runs:
+        title = _clause_title(heading, clause)
+        if title is None:
+            title = f"Sentences {first}-{first + len(texts) - 1}"
+        elif part:
+            title = f"{title} (part {part + 1})"
+        clauses.append(Clause(title, texts))
+    return clauses
@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+DEFAULT_JOB_DB_PATH = os.environ.get("DPDPA_JOB_DB_PATH", os.path.join(".dpdpa_cache", "jobs.sqlite3"))
+LEASE_SECONDS = 60   # a running job without a heartbeat for this long is taken over by another worker
+MAX_ATTEMPTS = 3     # claims before a job that keeps killing its worker is marked failed
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobQueue:
+    """
+    Durable queue of compliance-check jobs in SQLite, shared by the app
+    (which submits and polls) and the worker processes (which claim and
+    run; see job_worker.py).
+
+    A job is claimed under a lease that the worker renews with every
+    progress update. If the worker dies, or the whole server restarts, the
+    lease runs out and the next claim picks the job up again, up to
+    MAX_ATTEMPTS times. Safe to share across threads; every process opens
+    its own JobQueue on the same file.
+    """
+
+    def __init__(self, path=DEFAULT_JOB_DB_PATH, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                label TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                submitted REAL NOT NULL,
+                started REAL,
+                heartbeat REAL,
+                finished REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, submitted)")
+
+    def submit(self, payload, label=""):
+        """Queue a job; payload is JSON-able (see job_worker.run_job). Returns the job ID."""
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, label, payload, submitted) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, label, json.dumps(payload, ensure_ascii=False), time.time()))
+        return job_id
+
+    def claim(self, worker):
+        """
+        Take the oldest queued job, or a running one whose lease has run out,
+        for worker. Returns (job_id, payload), or None when there is nothing
+        to do.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished = ?, "
+                    "error = 'gave up after ' || attempts || ' attempts (worker lost)' "
+                    "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                    (now, now - self.lease_seconds, self.max_attempts))
+                row = self._conn.execute(
+                    "SELECT id, payload FROM jobs WHERE status = 'queued' OR (status = 'running' AND heartbeat < ?) "
+                    "ORDER BY submitted LIMIT 1", (now - self.lease_seconds,)).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                    "started = COALESCE(started, ?), heartbeat = ? WHERE id = ?",
+                    (worker, now, now, row[0]))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0], json.loads(row[1])
+
+    def _update_running(self, job_id, worker, sql, params):
+        # Only the worker holding the lease may write; a worker that lost it stops (see LeaseLost).
+        with self._lock:
+            cursor = self._conn.execute(f"UPDATE jobs SET {sql} WHERE id = ? AND worker = ? AND status = 'running'",
+                                        (*params, job_id, worker))
+        if cursor.rowcount == 0:
+            raise LeaseLost(f"job {job_id} is no longer held by {worker}")
+
+    def heartbeat(self, job_id, worker, progress=None):
+        """Renew the lease, optionally recording progress (JSON-able)."""
+        if progress is None:
+            self._update_running(job_id, worker, "heartbeat = ?", (time.time(),))
+        else:
+            self._update_running(job_id, worker, "heartbeat = ?, progress = ?",
+                                 (time.time(), json.dumps(progress, ensure_ascii=False)))
+
+    def complete(self, job_id, worker, result):
+        now = time.time()
+        self._update_running(job_id, worker, "status = 'done', result = ?, heartbeat = ?, finished = ?",
+                             (json.dumps(result, ensure_ascii=False), now, now))
+
+    def fail(self, job_id, worker, error):
+        now = time.time()
+        self._update_running(job_id, worker, "status = 'failed', error = ?, heartbeat = ?, finished = ?",
+                             (str(error), now, now))
+
+    def release(self, job_id, worker):
+        """Hand a running job back to the queue at once (a worker shutting down cleanly)."""
+        try:
+            self._update_running(job_id, worker, "status = 'queued', worker = NULL, attempts = attempts - 1", ())
+        except LeaseLost:
+            pass
+
+    def get(self, job_id, with_result=True):
+        """The job as a dict (status, progress, result, ...), or None for an unknown ID."""
+        columns = "id, status, label, progress, error, worker, attempts, submitted, started, finished" + \
+            (", result" if with_result else "")
+        with self._lock:
+            row = self._conn.execute(f"SELECT {columns} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else self._job(columns, row)
+
+    def jobs(self, status=None, limit=50):
+        """Most recent jobs first, without their results."""
+        columns = "id, status, label, progress, error, worker, attempts, submitted, started, finished"
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {columns} FROM jobs {where} ORDER BY submitted DESC LIMIT ?",
+                                      (*params, limit)).fetchall()
+        return [self._job(columns, row) for row in rows]
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in JOB_STATUSES} | dict(rows)
+
+    @staticmethod
+    def _job(columns, row):
+        job = dict(zip([c.strip() for c in columns.split(",")], row))
+        for field in ("progress", "result"):
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+
+class LeaseLost(RuntimeError):
+    """The job was taken over by another worker (this one stalled past the lease)."""
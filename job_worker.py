@@ -0,0 +1,191 @@
+"""
+Worker processes that drain the compliance-check job queue.
+
+    python job_worker.py --workers 4
+
+Each worker claims a job from the queue (job_queue.JobQueue), runs it the
+way the checker does and stores the results, writing progress back as it
+goes. Jobs left running by a crashed worker or a restarted server are
+picked up again once their lease runs out; a worker stopped with Ctrl+C
+or SIGTERM hands its job back at once. The OpenAI request limits
+(OPENAI_RPM_LIMIT / OPENAI_TPM_LIMIT) are split evenly between the
+workers, since they all draw on the same account; a pool started by the
+app gets the app's settings and only the share of the limits the app
+leaves for background jobs, and stops when the app does.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from dpdpa_engine import analyze_policy, candidate_sentences, configure, dpdpa_sections, new_run_telemetry, settings
+from history_store import ComplianceHistory
+from job_queue import DEFAULT_JOB_DB_PATH, JobQueue, LeaseLost
+
+HEARTBEAT_SECONDS = 5  # how often a running job's progress is written back (and its lease renewed)
+
+
+def run_job(payload, on_progress=None):
+    """
+    Run one job payload: {"policy": text or sentences, "sections": [...]
+    (default: all), "run_options": {...} for run_sections_concurrently,
+    "history": {"organization", "policy"} to record it in the compliance
+    history (optional, used by process_job)}.
+    Returns {"results", "errors", "telemetry", "sentences", "verdicts",
+    "sections"},
+    the same pieces the checker keeps for a finished run.
+    """
+    sections = payload.get("sections") or dpdpa_sections
+    candidates = candidate_sentences(payload["policy"])
+    verdicts_out = {}
+    telemetry = new_run_telemetry()
+    results, errors = analyze_policy(candidates, sections, verdicts_out=verdicts_out, on_progress=on_progress,
+                                     telemetry=telemetry, **payload.get("run_options", {}))
+    return {
+        "results": results,
+        "errors": {section: str(error) for section, error in errors.items()},
+        "telemetry": telemetry.summary(),
+        "sentences": candidates,
+        "verdicts": {section: verdicts for section, verdicts in verdicts_out.items() if section not in errors},
+        "sections": sections,
+    }
+
+
+def process_job(queue, worker, job_id, payload):
+    """Run a claimed job, keeping its lease alive with progress heartbeats."""
+    sections = payload.get("sections") or dpdpa_sections
+    progress = {"sentences": len(candidate_sentences(payload["policy"])), "sections": dict.fromkeys(sections, 0)}
+    progress_lock = threading.Lock()
+    finished = threading.Event()
+
+    def on_progress(section, done, rows):
+        with progress_lock:
+            progress["sections"][section] += done
+
+    def beat():
+        while not finished.wait(HEARTBEAT_SECONDS):
+            with progress_lock:
+                snapshot = {"sentences": progress["sentences"], "sections": dict(progress["sections"])}
+            try:
+                queue.heartbeat(job_id, worker, snapshot)
+            except LeaseLost:
+                return
+
+    heart = threading.Thread(target=beat, daemon=True)
+    heart.start()
+    try:
+        result = run_job(payload, on_progress)
+    except Exception as e:
+        queue.fail(job_id, worker, f"{type(e).__name__}: {e}")
+        return
+    finally:
+        finished.set()
+    queue.complete(job_id, worker, result)
+    if "history" in payload and not result["errors"]:
+        # Keyed by job ID, so a job finished twice (after a lost lease) is counted once.
+        ComplianceHistory().record_run(result["results"], section_count=len(sections), ref=job_id,
+                                       sentences=len(result["sentences"]), telemetry=result["telemetry"],
+                                       **payload["history"])
+
+
+def work(db_path, worker, poll_seconds=1.0, exit_when_idle=False):
+    """Claim and run jobs until stopped (or, with exit_when_idle, until the queue is empty)."""
+    queue = JobQueue(db_path)
+    current = None
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while True:
+            claimed = queue.claim(worker)
+            if claimed is None:
+                if exit_when_idle:
+                    return
+                time.sleep(poll_seconds)
+                continue
+            current = claimed[0]
+            try:
+                process_job(queue, worker, *claimed)
+            except LeaseLost:
+                pass  # stalled past the lease; another worker has the job now
+            except Exception as e:
+                # E.g. the database stayed locked past its timeout. The job's lease runs out and it is
+                # tried again (up to its attempt limit); this worker carries on with the next one.
+                print(f"{worker}: job {current} failed: {type(e).__name__}: {e}", file=sys.stderr)
+            current = None
+    except KeyboardInterrupt:
+        if current is not None:
+            queue.release(current, worker)
+
+
+def _worker_main(db_path, worker, poll_seconds, exit_when_idle, workers):
+    configure(api_key=os.environ.get("OPENAI_API_KEY"),
+              rpm_limit=max(1, settings["rpm_limit"] // workers),
+              tpm_limit=max(1, settings["tpm_limit"] // workers))
+    work(db_path, worker, poll_seconds, exit_when_idle)
+
+
+def start_workers(count, db_path=DEFAULT_JOB_DB_PATH, env=None):
+    """
+    Launch `python job_worker.py --workers count` in the background (e.g.
+    from the app), with env added to this process's environment. The pool
+    exits by itself if this process dies; returns the Popen, for
+    stop_workers.
+    """
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--workers", str(count), "--db", db_path,
+                             "--parent", str(os.getpid())],
+                            env={**os.environ, **(env or {})})
+
+
+def stop_workers(pool, timeout=10):
+    """Stop a pool from start_workers; its workers hand their jobs back first."""
+    if pool.poll() is None:
+        pool.terminate()
+        try:
+            pool.wait(timeout)
+        except subprocess.TimeoutExpired:
+            pool.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run compliance-check jobs from the job queue.")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes")
+    parser.add_argument("--db", default=DEFAULT_JOB_DB_PATH, help="job queue database")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between checks of an empty queue")
+    parser.add_argument("--exit-when-idle", action="store_true", help="stop once the queue is empty")
+    parser.add_argument("--parent", type=int, default=None, help="stop when the process with this PID is gone")
+    args = parser.parse_args(argv)
+
+    JobQueue(args.db)  # create the database before the workers race to
+    workers = max(1, args.workers)
+    names = [f"{socket.gethostname()}-{os.getpid()}-{n}" for n in range(workers)]
+    processes = [multiprocessing.Process(target=_worker_main, name=name,
+                                         args=(args.db, name, args.poll, args.exit_when_idle, workers))
+                 for name in names]
+    for process in processes:
+        process.start()
+    # Pass a SIGTERM on, so every worker hands its job back before exiting.
+    signal.signal(signal.SIGTERM, lambda signum, frame: [process.terminate() for process in processes])
+    try:
+        while any(process.is_alive() for process in processes):
+            if args.parent is not None and os.getppid() != args.parent:
+                # The app that started the pool is gone (e.g. killed); hand the jobs back rather than linger.
+                args.parent = None
+                for process in processes:
+                    process.terminate()
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()  # each worker got the Ctrl+C too and hands its job back
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import threading
+from collections import namedtuple
+
+Usage = namedtuple("Usage", "prompt_tokens completion_tokens total_tokens cached_tokens", defaults=(0,))
+Completion = namedtuple("Completion", "content usage")  # usage may be None
+# A prompt as a system message of fixed instructions followed by a user
+# message with the text to judge; the shared prefix lets the provider
+# serve the instructions from its prompt cache. Plain strings are sent as
+# one user message.
+Prompt = namedtuple("Prompt", "system user")
+
+BACKEND_MODES = ("live", "record", "replay")
+DEFAULT_LOG_PATH = os.path.join(".dpdpa_cache", "model_log.jsonl")
+
+
+class ReplayMissError(LookupError):
+    """Replay mode was asked for a request that was never recorded."""
+
+
+def prompt_messages(prompt):
+    if isinstance(prompt, Prompt):
+        return [{"role": "system", "content": prompt.system}, {"role": "user", "content": prompt.user}]
+    return [{"role": "user", "content": prompt}]
+
+
+def request_key(model, temperature, json_mode, prompt):
+    """Identity of one model request; two requests with the same key get the same recorded answer."""
+    text = "\x1e".join(prompt) if isinstance(prompt, Prompt) else prompt
+    payload = "\x1f".join([model, str(temperature), str(bool(json_mode)), text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class OpenAIBackend:
+    """Live chat completions through an openai.OpenAI client."""
+
+    rate_limited = True  # calls go through the request scheduler
+
+    def __init__(self, client):
+        self.client = client
+
+    def complete(self, model, prompt, temperature, json_mode):
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=prompt_messages(prompt),
+            temperature=temperature,
+            **extra
+        )
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            # Some OpenAI-compatible servers leave out total_tokens.
+            prompt_tokens, completion_tokens = usage.prompt_tokens or 0, usage.completion_tokens or 0
+            usage = Usage(prompt_tokens, completion_tokens,
+                          getattr(usage, "total_tokens", None) or prompt_tokens + completion_tokens,
+                          getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None) or 0)
+        return Completion(response.choices[0].message.content, usage)
+
+
+class ResponseLog:
+    """
+    Append-only JSONL log of model answers, one compact line per request:
+    {"key": request_key(...), "content": ..., "usage": [prompt, completion, cached]}.
+    Prompts are not stored, only their key. The index of key -> line offset
+    is built by one scan when the log is opened, so lookups are a single
+    seek; a line cut short by an interrupted run is skipped, and a later
+    line for the same key wins. Safe to share across threads. A readonly
+    log (for replay) must already exist: opening a missing one raises
+    FileNotFoundError instead of creating it empty.
+    """
+
+    def __init__(self, path=DEFAULT_LOG_PATH, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._offsets = {}
+        self._lock = threading.Lock()
+        if readonly:
+            self._file = open(path, "rb")
+        else:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = open(path, "a+b")
+        self._file.seek(0)
+        offset = 0
+        line = b""
+        for line in self._file:
+            try:
+                self._offsets[json.loads(line)["key"]] = offset
+            except (ValueError, KeyError, TypeError):
+                pass
+            offset += len(line)
+        if line and not line.endswith(b"\n") and not readonly:
+            self._file.write(b"\n")  # keep the next record off the truncated line
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def get(self, key):
+        """The recorded Completion for key, or None."""
+        with self._lock:
+            offset = self._offsets.get(key)
+            if offset is None:
+                return None
+            self._file.seek(offset)
+            record = json.loads(self._file.readline())
+        usage = record.get("usage")
+        return Completion(record["content"], Usage(usage[0], usage[1], usage[0] + usage[1], *usage[2:3])
+                          if usage else None)
+
+    def append(self, key, completion):
+        usage = completion.usage
+        line = json.dumps({"key": key, "content": completion.content,
+                           "usage": [usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens]
+                           if usage else None},
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self._offsets[key] = offset
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RecordingBackend:
+    """Answers from another backend, appending every answer to a ResponseLog."""
+
+    rate_limited = True
+
+    def __init__(self, inner, log):
+        self.inner = inner
+        self.log = log
+
+    def complete(self, model, prompt, temperature, json_mode):
+        completion = self.inner.complete(model, prompt, temperature, json_mode)
+        self.log.append(request_key(model, temperature, json_mode, prompt), completion)
+        return completion
+
+
+class ReplayBackend:
+    """
+    Answers only from a ResponseLog, instantly and without a network;
+    a request that was not recorded raises ReplayMissError.
+    """
+
+    rate_limited = False  # nothing is sent, so the account limits do not apply
+
+    def __init__(self, log):
+        self.log = log
+
+    def complete(self, model, prompt, temperature, json_mode):
+        key = request_key(model, temperature, json_mode, prompt)
+        completion = self.log.get(key)
+        if completion is None:
+            raise ReplayMissError(f"no recorded answer for request {key[:12]} in {self.log.path}")
+        return completion
@@ -0,0 +1,88 @@
+import math
+import re
+
+DEFAULT_THRESHOLD = 1.0
+
+STOPWORDS = frozenset("""
+a an and are as at be been being by can do does for from has have how if in into is it its may must not of on
+or our such that the their them they this to under upon use used uses using was we were what when where which who
+will with you your
+""".split())
+
+# Legal vocabulary shared by every section of the Act.
+DPDPA_VOCABULARY = [
+    "personal data", "data principal", "data fiduciary", "data processor", "processing", "process",
+    "Digital Personal Data Protection Act", "DPDPA", "Data Protection Board", "lawful", "law", "legal",
+]
+
+_WORD = re.compile(r"[a-z]+")
+_SUFFIXES = ("ations", "ation", "ments", "ment", "ings", "ing", "ies", "ied", "ed", "es", "s", "ly")
+
+
+def stem(word):
+    """Very small suffix stripper so consent/consents/consented share one term."""
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text):
+    return [stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+class LexicalPrefilter:
+    """
+    Cheap local relevance score of a sentence for each DPDPA section.
+
+    Built once from each section's checklist items plus legal vocabulary.
+    Every term gets an IDF weight across sections, so words shared by all
+    sections ("data", "personal") count for little and section-specific
+    words ("withdraw", "breach") count for a lot. A sentence's score for a
+    section is the summed weight of the distinct section terms it contains.
+    """
+
+    def __init__(self, section_texts):
+        documents = {section: set(t for text in texts for t in terms(text))
+                     for section, texts in section_texts.items()}
+        n = len(documents)
+        document_frequency = {}
+        for vocabulary in documents.values():
+            for term in vocabulary:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        self.weights = {
+            section: {term: math.log(1 + n / document_frequency[term]) for term in vocabulary}
+            for section, vocabulary in documents.items()
+        }
+
+    def score(self, sentence, section):
+        weights = self.weights.get(section)
+        if weights is None:
+            return math.inf
+        return sum(weights.get(term, 0.0) for term in set(terms(sentence)))
+
+    def is_relevant(self, sentence, section, threshold=DEFAULT_THRESHOLD):
+        return threshold <= 0 or self.score(sentence, section) >= threshold
+
+    def recall_report(self, sentences, verdicts, section, threshold=DEFAULT_THRESHOLD):
+        """
+        How many sentences the model matched for a section would have been
+        dropped at this threshold. verdicts are the per-sentence results of
+        an unfiltered run.
+        """
+        matched = [s for s, v in zip(sentences, verdicts) if v.get("Matched Items")]
+        lost = [s for s in matched if not self.is_relevant(s, section, threshold)]
+        return {
+            "Matched Sentences": len(matched),
+            "Would Be Dropped": len(lost),
+            "Recall": 1.0 - len(lost) / len(matched) if matched else 1.0,
+            "Dropped Examples": lost[:5],
+        }
+
+
+def build_prefilter(section_texts):
+    """LexicalPrefilter over {section: checklist items and section vocabulary} plus DPDPA_VOCABULARY."""
+    return LexicalPrefilter({
+        section: [*texts, *DPDPA_VOCABULARY]
+        for section, texts in section_texts.items()
+    })
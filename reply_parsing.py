@@ -0,0 +1,119 @@
+import difflib
+import json
+import re
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_ITEM_NUMBER = re.compile(r"^\s*(?:item\s*)?#?(\d+)[.):]?(?:\s+|$)", re.IGNORECASE)
+_ITEM_ID = re.compile(r"^\s*\[?(S\d+)\]?\s*[.:/-]\s*(\d+)\s*$", re.IGNORECASE)
+FUZZY_CUTOFF = 0.6
+
+
+class ReplyFormatError(ValueError):
+    """The model's reply is not the JSON object the prompt asked for."""
+
+
+def parse_json_reply(content):
+    """
+    Parse a JSON object out of a model reply, tolerating code fences,
+    prose around the object and trailing commas.
+    """
+    text = _FENCE.sub("", (content or "").strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ReplyFormatError(f"no JSON object in reply: {text[:80]!r}")
+    text = text[start:end + 1]
+    for candidate in (text, _TRAILING_COMMA.sub(r"\1", text)):
+        try:
+            reply = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(reply, dict):
+            return reply
+    raise ReplyFormatError(f"unparseable JSON in reply: {text[:80]!r}")
+
+
+def resolve_checklist_item(name, checklist):
+    """
+    Map the model's "Item" (or "Checklist Item") to the checklist entry it
+    means: by its number (3, "3", "Item 3", "3. ..."), verbatim, ignoring
+    case/whitespace, as a shortened quote, or by close wording. Returns
+    None when nothing fits.
+    """
+    if isinstance(name, int) and not isinstance(name, bool):
+        name = str(name)
+    if not isinstance(name, str) or not name.strip():
+        return None
+    name = name.strip()
+    if name in checklist:
+        return name
+    normalized = {" ".join(item.split()).casefold(): item for item in checklist}
+    key = " ".join(name.split()).casefold()
+    if key in normalized:
+        return normalized[key]
+    number = _ITEM_NUMBER.match(name)
+    if number and 1 <= int(number.group(1)) <= len(checklist):
+        rest = name[number.end():].strip()
+        item = checklist[int(number.group(1)) - 1]
+        key = " ".join(rest.split()).casefold()
+        if not key or key in item.casefold() or \
+                difflib.SequenceMatcher(None, key, item.casefold()).ratio() >= FUZZY_CUTOFF:
+            return item
+    containing = [item for norm, item in normalized.items() if key in norm]
+    if len(containing) == 1 and len(key) >= 12:
+        return containing[0]  # a shortened quote of one item
+    close = difflib.get_close_matches(key, list(normalized), n=1, cutoff=FUZZY_CUTOFF)
+    return normalized[close[0]] if close else None
+
+
+def validate_matched_items(matched_items, checklist):
+    """
+    Clean one sentence's "Matched Items": every entry names a real
+    checklist item (at most once) and has a justification. The prompts ask
+    for an item's number in "Item"; it is replaced by the item's text in
+    "Checklist Item". Entries that name no recognizable item are dropped.
+    """
+    if not isinstance(matched_items, list):
+        raise ReplyFormatError(f'"Matched Items" is not a list: {matched_items!r:.80}')
+    cleaned = {}
+    for match in matched_items:
+        if not isinstance(match, dict):
+            continue
+        item = resolve_checklist_item(match.get("Item"), checklist) or \
+            resolve_checklist_item(match.get("Checklist Item"), checklist)
+        if item is None or item in cleaned:
+            continue
+        justification = match.get("Justification")
+        extra = {key: value for key, value in match.items() if key not in ("Item", "Checklist Item", "Justification")}
+        cleaned[item] = {"Checklist Item": item, **extra,
+                         "Justification": justification.strip() if isinstance(justification, str) else ""}
+    return list(cleaned.values())
+
+
+def split_item_id(item_id):
+    """("S2", 3) for a multi-section item ID like "S2.3" (section code, item number); None if it is not one."""
+    match = _ITEM_ID.match(item_id) if isinstance(item_id, str) else None
+    return (match.group(1).upper(), int(match.group(2))) if match else None
+
+
+def batch_entries(reply, sentence_count, id_field="Sentence ID"):
+    """
+    {sentence index: entry} from a batch reply's "Results". Entries with a
+    missing or out-of-range id_field ("Sentence ID", or "Clause ID" for
+    clause screening) are ignored, so the caller can re-ask only for the
+    sentences left out.
+    """
+    results = reply.get("Results")
+    if not isinstance(results, list):
+        raise ReplyFormatError('reply has no "Results" list')
+    entries = {}
+    for entry in results:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            idx = int(entry.get(id_field)) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < sentence_count:
+            entries.setdefault(idx, entry)
+    return entries
@@ -0,0 +1,76 @@
+import io
+
+from section_registry import section_registry
+
+REPORT_FILENAME = "DPDPA_Compliance_Report.xlsx"
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+SUMMARY_COLUMNS = ["DPDPA Section", "Meaning", "Match Level", "Severity", "Score", "Items Matched", "Items Total",
+                   "Unchecked Sentences"]
+ITEM_COLUMNS = ["DPDPA Section", "Checklist Item", "Status", "Evidence Sentences", "Justification"]
+EVIDENCE_COLUMNS = ["DPDPA Section", "Checklist Item", "Sentence", "Justification", "Clause"]
+
+
+def _checklist(result):
+    spec = section_registry.get(result["DPDPA Section"])
+    return spec.checklist if spec is not None else tuple(result["Checklist Items Matched"])
+
+
+def iter_summary_rows(results):
+    for result in results:
+        yield [result["DPDPA Section"], result.get("DPDPA Section Meaning") or "Not applicable",
+               result["Match Level"], result["Severity"], float(result["Compliance Points"]),
+               len(result["Checklist Items Matched"]), len(_checklist(result)),
+               result.get("Unchecked Sentences", 0)]
+
+
+def iter_item_rows(results):
+    """One row per checklist item of every section: matched or missing, with its evidence count."""
+    for result in results:
+        evidence = {}
+        for match in result["Matched Sentences"]:
+            evidence.setdefault(match["Checklist Item"], []).append(match)
+        matched = set(result["Checklist Items Matched"])
+        for item in _checklist(result):
+            found = evidence.get(item, [])
+            yield [result["DPDPA Section"], item, "Matched" if item in matched else "Missing", len(found),
+                   found[0]["Justification"] if found else ""]
+
+
+def iter_evidence_rows(results):
+    for result in results:
+        for match in result["Matched Sentences"]:
+            yield [result["DPDPA Section"], match["Checklist Item"], match["Sentence"], match["Justification"],
+                   match.get("Clause", "")]  # set by clause-level runs only
+
+
+def write_excel_report(results, out):
+    """
+    Write the compliance report for results (the section result dicts) to
+    out, a path or binary file object: sheets "Summary", "Checklist Items"
+    and "Evidence". Rows are streamed (openpyxl write-only mode), so memory
+    does not grow with the number of evidence sentences.
+    """
+    # Imported here so that loading the app does not pay for openpyxl.
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    workbook = Workbook(write_only=True)
+    sheets = [("Summary", SUMMARY_COLUMNS, iter_summary_rows), ("Checklist Items", ITEM_COLUMNS, iter_item_rows),
+              ("Evidence", EVIDENCE_COLUMNS, iter_evidence_rows)]
+    for title, columns, rows in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.freeze_panes = "A2"
+        sheet.append(columns)
+        for row in rows(results):
+            # Control characters from pasted or .docx text make openpyxl refuse the cell.
+            sheet.append([ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value for value in row])
+    workbook.save(out)
+
+
+def excel_report(results):
+    """The report as an in-memory .xlsx file (io.BytesIO), e.g. for a download button."""
+    buffer = io.BytesIO()
+    write_excel_report(results, buffer)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """Refills continuously at rate_per_minute; acquire() blocks until enough is available."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.available = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(min(wait, 1.0))
+
+    def adjust(self, amount):
+        """Debit (positive) or refund (negative) tokens once the real cost is known."""
+        with self._lock:
+            self._refill()
+            self.available = min(self.capacity, self.available - amount)
+
+
+class RequestScheduler:
+    """
+    Central gate for every model call.
+
+    Each call waits for a concurrency slot and for room in the
+    requests-per-minute and tokens-per-minute buckets, then runs. The
+    concurrency limit follows AIMD: it grows by one after a full window of
+    successful calls and halves on every rate-limit error. Rate-limit and
+    transient errors are retried with jittered exponential backoff (or the
+    server's Retry-After, when given); anything else is raised at once.
+    """
+
+    def __init__(self, rpm, tpm, max_concurrency=32, initial_concurrency=4, min_concurrency=1,
+                 max_retries=6, base_delay=1.0, max_delay=60.0,
+                 rate_limit_errors=(), transient_errors=()):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = max(min_concurrency, min(initial_concurrency, max_concurrency))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limit_errors = tuple(rate_limit_errors)
+        self.transient_errors = tuple(transient_errors)
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self._successes_in_window = 0
+        self._cond = threading.Condition()
+
+    def _acquire_slot(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def _release_slot(self, outcome):
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self.calls += 1
+                self._successes_in_window += 1
+                if self._successes_in_window >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes_in_window = 0
+            elif outcome == "rate_limited":
+                self.rate_limited += 1
+                self.limit = max(self.min_concurrency, self.limit // 2)
+                self._successes_in_window = 0
+            self._cond.notify_all()
+
+    def _backoff(self, attempt, error):
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError, AttributeError):
+                retry_after = None
+        if retry_after is None:
+            retry_after = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+        time.sleep(retry_after)
+
+    def call(self, fn, estimated_tokens=0):
+        """Run fn() under the limits, retrying rate-limit and transient errors."""
+        for attempt in range(self.max_retries + 1):
+            self.requests.acquire(1)
+            self.tokens.acquire(estimated_tokens)
+            self._acquire_slot()
+            try:
+                result = fn()
+            except self.rate_limit_errors as e:
+                self._release_slot("rate_limited")
+                error = e
+            except self.transient_errors as e:
+                self._release_slot("error")
+                error = e
+            except Exception:
+                self._release_slot("error")
+                raise
+            else:
+                self._release_slot("ok")
+                usage = getattr(result, "usage", None)
+                total = getattr(usage, "total_tokens", None)
+                if isinstance(total, int):
+                    self.tokens.adjust(total - estimated_tokens)
+                return result
+            if attempt == self.max_retries:
+                raise error
+            with self._cond:
+                self.retries += 1
+            self._backoff(attempt, error)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "concurrency_limit": self.limit,
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+            }
@@ -0,0 +1,339 @@
+"""
+Registry of the sections a policy is checked against.
+
+Each SectionSpec carries everything the engine needs to evaluate and score
+one section: the checklist, the prompt intro and matching rules that frame
+it, the meaning shown in reports, the scoring bands and the extra
+vocabulary the lexical prefilter scores sentences with. Adding a section
+(e.g. from the DPDP Rules, 2025) is a register_section() call here; the
+matching, caching, batching and concurrency code in dpdpa_engine is shared.
+"""
+from collections import namedtuple
+
+SectionSpec = namedtuple("SectionSpec", "id title meaning checklist intro rules scoring_bands source vocabulary")
+
+# The instruments sections come from, and which of them each scope of
+# evaluation offered in the checker covers.
+DPDP_ACT = "DPDP Act 2023"
+DPDP_RULES = "DPDP Rules 2025"
+SCOPES = {
+    "DPDP Act 2023 (default)": (DPDP_ACT,),
+    "DPDP Rules 2025": (DPDP_RULES,),
+    "DPDP Act + Rules": (DPDP_ACT, DPDP_RULES),
+}
+CUSTOM_SCOPE = "Custom Sections"
+
+# (most items matched, Match Level, Compliance Points, Severity), checked in
+# order for a partial match; all items matched is always "Fully Compliant"
+# and none matched always "Non-Compliant".
+DEFAULT_SCORING_BANDS = (
+    (1, "Partially Compliant", 0.75, "Minor"),
+    (3, "Partially Compliant", 0.5, "Medium"),
+    (None, "Partially Compliant", 0.25, "Major"),
+)
+
+section_registry = {}
+
+
+def register_section(id, title, checklist, intro, rules, meaning="", scoring_bands=DEFAULT_SCORING_BANDS,
+                     source=DPDP_ACT, vocabulary=()):
+    """Add a section to the registry; sections are checked in registration order."""
+    spec = SectionSpec(id, title, meaning, tuple(checklist), intro, rules, tuple(scoring_bands), source,
+                       tuple(vocabulary))
+    section_registry[title] = spec
+    return spec
+
+
+def sections_in_scope(scope, custom_sections=()):
+    """
+    Titles of the registered sections a scope covers (one of SCOPES, or
+    CUSTOM_SCOPE with the chosen custom_sections), in registration order.
+    """
+    if scope == CUSTOM_SCOPE:
+        chosen = set(custom_sections)
+        return [title for title in section_registry if title in chosen]
+    sources = SCOPES.get(scope, (DPDP_ACT,))
+    return [title for title, spec in section_registry.items() if spec.source in sources]
+
+
+# --- DPDPA, 2023 ---
+section_4_checklist = [
+    "Personal data is processed only for a lawful purpose.",
+    "Lawful purpose means a purpose not expressly forbidden by law.",
+    "Lawful purpose must be backed by explicit consent from the Data Principal or fall under legitimate uses.",
+]
+section_5_checklist = [
+    "A notice is given before or at the time of requesting consent.",
+    "Notice clearly mentions what personal data is being collected.",
+    "Notice clearly mentions the purpose for which the personal data is proposed to be processed.",
+    "Notice describes how the Data Principal can exercise her rights under Section 6(4) and Section 13.",
+    "Notice explains how the Data Principal can file a complaint with the Data Protection Board.",
+    "For data collected before commencement of the Act, retrospective notice is given as soon as reasonably practicable.",
+    "Retrospective notice includes: data processed, purpose, rights under Section 6(4) and 13, and complaint mechanism.",
+    "Data Fiduciary may continue processing pre-Act personal data until consent is withdrawn.",
+    "Notice must be available in English or any language under the Eighth Schedule of the Constitution."
+]
+
+# --- Section 6 Checklist ---
+section_6_checklist = [
+    # A. Nature and Validity of Consent (Section 6(1))
+    "Consent is free — voluntarily given, not coerced or forced.",
+    "Consent is specific to a clearly defined purpose.",
+    "Consent is informed — based on full disclosure before collection.",
+    "Consent is unconditional — not bundled with unrelated terms.",
+    "Consent is unambiguous — clear in intent and meaning.",
+    "Consent is given through clear affirmative action (e.g., ticking a box, clicking 'I agree').",
+    "Consent is limited strictly to the specified purpose.",
+    "Only personal data necessary for the specified purpose is processed.",
+
+    # B. Consent Request Requirements (Section 6(3))
+    "Consent request is written in clear and plain language.",
+    "Consent request is available in English or one of the 22 Eighth Schedule languages.",
+    "Consent request includes contact details of the Data Protection Officer (DPO) or authorized representative.",
+
+    # C. Legal Integrity of Consent (Section 6(2))
+    "Any clause in the consent request that infringes on the Act is void to that extent.",
+
+    # D. Withdrawal and Post-Withdrawal Compliance (Section 6(4), 6(5), 6(6))
+    "Consent can be withdrawn at any time by the Data Principal.",
+    "Consequences of withdrawal (e.g., loss of service) are borne by the Data Principal.",
+    "Withdrawal does not affect the legality of processing done before the withdrawal.",
+    "Processing of personal data must stop upon withdrawal, unless legally mandated to continue.",
+
+    # E. Consent Manager Requirements (Section 6(7), 6(8), 6(9))
+    "Consent can be given, managed, and withdrawn through a Consent Manager.",
+    "Consent Manager acts on behalf of the Data Principal and is accountable to them.",
+    "Consent Manager is registered with the Data Protection Board of India.",
+    "Consent Manager enables easy management of consent (granting, auditing, withdrawing).",
+
+    # F. Record-Keeping and Proof of Validity (Section 6(10))
+    "Data Fiduciary must demonstrate that valid notice was provided to the Data Principal.",
+    "Data Fiduciary must prove that consent was validly obtained."
+]
+section_7_checklist = [
+    "Personal data is processed without consent only if it falls within specific legal grounds under Section 7.",
+    "Each legitimate use must be necessary, proportionate, and in accordance with applicable laws or standards.",
+
+    # (a) Voluntary Provision
+    "Data Principal voluntarily provided personal data for a specified purpose and did not object to its use for that purpose.",
+
+    # (b) State-Issued Subsidies/Benefits
+    "Processing is done by the State or its instrumentalities to issue a subsidy, benefit, service, certificate, licence or permit.",
+    "Data Principal has previously consented for such processing by the State or its instrumentalities.",
+    "Personal data is sourced from officially maintained registers or databases and notified by the Central Government.",
+    "Processing follows standards or policies notified by the Central Government or law for personal data governance.",
+
+    # (c) State Function
+    "Processing is necessary for the performance of any legal function by the State or its instrumentalities related to sovereignty, integrity, or security of India.",
+
+    # (d) Statutory Obligation
+    "Processing is required under any law for disclosing information to the State or its instrumentalities, subject to applicable provisions.",
+
+    # (e) Court Order
+    "Processing is required to comply with a judgment, decree, or order under Indian or foreign law related to civil or contractual claims.",
+
+    # (f) Medical Emergency
+    "Processing is required to respond to a medical emergency involving threat to life or health of the Data Principal or another person.",
+
+    # (g) Epidemic or Public Health
+    "Processing is required to provide medical treatment or health services during an epidemic, outbreak, or other public health threat.",
+
+    # (h) Disaster or Public Order
+    "Processing is required to ensure safety or provide assistance or services during a disaster or public order breakdown.",
+    "Disaster is as defined under clause (d) of Section 2 of the Disaster Management Act, 2005.",
+
+    # (i) Employment-Related Purposes
+    "Processing is necessary for employment-related purposes or to safeguard the employer from loss or liability.",
+    "Examples include prevention of corporate espionage, protection of IP, or provision of services/benefits to employees."
+]
+section_8_checklist = [
+    "Data Fiduciary is accountable for compliance with the Act even if processing is done by a Data Processor.",
+    "Data Fiduciary may engage a Data Processor only under a valid contract.",
+    "If personal data is used to make decisions about or is disclosed to another Fiduciary, ensure completeness, accuracy, and consistency.",
+    "Implement appropriate technical and organisational measures to ensure compliance with the Act and rules.",
+    "Ensure reasonable security safeguards to prevent personal data breaches.",
+    "Notify the Board and affected Data Principals of a personal data breach in prescribed form and manner.",
+    "Erase personal data upon withdrawal of consent or if the specified purpose is no longer being served, unless retention is legally required.",
+    "Cause Data Processor to erase data shared with them once consent is withdrawn or purpose is no longer served.",
+    "The purpose is deemed no longer served if the Data Principal does not approach the Fiduciary or exercise any rights for a prescribed time.",
+    "Publish business contact details of the Data Protection Officer or responsible contact person.",
+    "Establish an effective grievance redressal mechanism.",
+    "Clarify that Data Principal inactivity implies purpose is no longer served (as per clause 8)."
+]
+
+section_4_prompt_intro = "You are a DPDPA compliance auditor. Your task is to evaluate whether the following policy sentence clearly satisfies **any** of the obligations listed under **Section 4: Grounds for Processing Personal Data** of the **Digital Personal Data Protection Act, 2023 (India).**"
+section_4_prompt_rules = """
+**Evaluation Instructions:**
+
+You must ONLY mark a checklist item as matched if:
+
+- The sentence **explicitly states** a lawful ground for processing personal data (e.g., consent, legal obligation, legitimate use).
+- It uses **unambiguous legal terms** or policy language like "lawful purpose", "explicit consent", "permitted under law", or "in accordance with Section 4".
+- It clearly describes a basis that is **not prohibited** by law and **is supported by user consent or valid legal grounds**.
+
+---
+
+**You MUST NOT match** if:
+
+- The sentence merely says "we collect information" or "we use your data" without stating **why** (the legal ground).
+- The sentence talks about **benefits to the user** (e.g., personalization, service improvement) without identifying a **lawful purpose**.
+- The sentence uses vague or generic language like "to serve you better", "to help improve services", or "we process data" without citing any valid basis.
+- You have to **infer** or **guess** a legal justification — this is **non-compliant**.
+
+✅ Match ONLY when the legal obligation is directly stated, precise, and clear.  
+❌ Do NOT rely on assumptions or indirect phrasing.
+
+> **Self-check before matching:**  
+> “Would a data protection auditor accept this sentence as evidence of compliance with Section 4?”  
+> If the answer is not a confident YES, do not match.
+"""
+
+
+section_5_prompt_intro = "You are a DPDPA compliance expert. Your job is to determine whether the following policy sentence complies and fulfills any obligations listed under Section 5 (Notice) of the Digital Personal Data Protection Act, 2023 (India)."
+section_5_prompt_rules = """
+**Important Instructions:**
+
+1. Match ONLY if the sentence **explicitly** refers to the checklist item using clear legal language.
+2. **DO NOT** infer, imply, interpret user behavior, or stretch meaning.
+3. DO NOT mark a sentence as a match if it:
+
+Only count a checklist item as matched if the sentence **explicitly and unambiguously** addresses the legal obligation — either through exact terminology or unmistakable legal phrasing.
+
+DO NOT match if:
+- The sentence **implies** or **suggests** compliance without clearly stating it.
+
+✅ Match only when the legal requirement is **explicit**, **contextually precise**, and **linguistically unambiguous**.
+
+> **Ask yourself for each match:**  
+> “Would a data protection auditor accept this as proof of compliance for this clause?”  
+> If the answer is “maybe” or “only if interpreted generously,” then the item should **NOT** be marked as matched.
+"""
+
+
+section_6_prompt_intro = "You are a DPDPA compliance expert. Your job is to determine whether the following policy sentence complies and fulfills any obligations listed under Section 6 (Consent and Its Management)of the Digital Personal Data Protection Act, 2023 (India)."
+section_6_prompt_rules = """
+**Important Instructions:**
+
+1. Match ONLY if the sentence **explicitly** refers to the checklist item using clear legal language.
+2. **DO NOT** infer, imply, interpret user behavior, or stretch meaning.
+3. DO NOT mark a sentence as a match if it:
+   - Merely describes UI/UX behavior (e.g., “you can save preferences”) without explicitly referencing **consent** or legal control.
+   - Vaguely discusses data collection without mentioning **consent**, **affirmative action**, **withdrawal**, or **data principal control**.
+   - Contains generic statements like “we collect data to improve services” or “we store information”.
+
+4. Match ONLY IF:
+   - The sentence clearly mentions: consent, withdrawal, specified purpose, unambiguous agreement, consent manager, etc.
+   - The sentence reflects a **policy-level commitment**, not just a description of technical functionality.
+
+Only count a checklist item as matched if the sentence **explicitly and unambiguously** addresses the legal obligation — either through exact terminology or unmistakable legal phrasing.
+
+DO NOT match if:
+- The sentence **implies** or **suggests** compliance without clearly stating it.
+- It refers to **data/account controls** but does not mention **consent or legal intent**.
+- It discusses user actions (e.g., “signing up”, “saving preferences”, “contacting support”) without framing them as part of **consent management**.
+- The term “consent” or a legal synonym (e.g., “authorization”, “agreement”, “permission”) is **not present**, and the legal obligation is not unmistakably addressed.
+
+---
+
+**Examples that should NOT be matched:**
+- “Users can delete data from their account” → ❌ Not equivalent to consent withdrawal.
+- “We collect information when you use our services” → ❌ Does not indicate clear affirmative action.
+- “You may adjust your settings” → ❌ Too vague to imply informed consent or legal control.
+
+---
+
+✅ Match only when the legal requirement is **explicit**, **contextually precise**, and **linguistically unambiguous**.
+
+> **Ask yourself for each match:**  
+> “Would a data protection auditor accept this as proof of compliance for this clause?”  
+> If the answer is “maybe” or “only if interpreted generously,” then the item should **NOT** be marked as matched.
+"""
+
+
+section_7_prompt_intro = "You are a DPDPA compliance expert. Your job is to determine whether the following policy sentence complies and fulfills any obligations listed under Section 7 (Certain Legitimate Uses) of the Digital Personal Data Protection Act, 2023 (India)."
+section_7_prompt_rules = """
+**Important Instructions:**
+
+1. Match ONLY if the sentence **explicitly** refers to the checklist item using clear legal language.
+2. **DO NOT** infer, imply, interpret user behavior, or stretch meaning.
+3. DO NOT mark a sentence as a match if it:
+
+Only count a checklist item as matched if the sentence **explicitly and unambiguously** addresses the legal obligation — either through exact terminology or unmistakable legal phrasing.
+
+DO NOT match if:
+- The sentence **implies** or **suggests** compliance without clearly stating it.
+
+✅ Match only when the legal requirement is **explicit**, **contextually precise**, and **linguistically unambiguous**.
+
+> **Ask yourself for each match:**  
+> “Would a data protection auditor accept this as proof of compliance for this clause?”  
+> If the answer is “maybe” or “only if interpreted generously,” then the item should **NOT** be marked as matched.
+"""
+
+
+section_8_prompt_intro = "You are a DPDPA compliance expert. Your job is to determine whether the following policy sentence complies and fulfills any obligations listed under Section 8 (General Obligations of Data Fiduciary) of the Digital Personal Data Protection Act, 2023 (India)."
+section_8_prompt_rules = """
+**Important Instructions:**
+
+1. Match ONLY if the sentence **explicitly** refers to the checklist item using clear legal language.
+2. **DO NOT** infer, imply, interpret user behavior, or stretch meaning.
+3. DO NOT mark a sentence as a match if it:
+
+Only count a checklist item as matched if the sentence **explicitly and unambiguously** addresses the legal obligation — either through exact terminology or unmistakable legal phrasing.
+
+DO NOT match if:
+- The sentence **implies** or **suggests** compliance without clearly stating it.
+
+✅ Match only when the legal requirement is **explicit**, **contextually precise**, and **linguistically unambiguous**.
+
+> **Ask yourself for each match:**  
+> “Would a data protection auditor accept this as proof of compliance for this clause?”  
+> If the answer is “maybe” or “only if interpreted generously,” then the item should **NOT** be marked as matched.
+"""
+
+
+# Extra terms per section that a compliant policy sentence is likely to use
+# even when it does not repeat the checklist wording (see prefilter).
+section_4_vocabulary = [
+    "lawful purpose", "legal basis", "legal ground", "permitted by law", "consent", "legitimate use",
+    "forbidden", "prohibited", "authorised", "authorized",
+]
+section_5_vocabulary = [
+    "notice", "notify", "inform", "informed", "privacy policy", "collect", "collection", "purpose",
+    "rights", "grievance", "complaint", "English", "language", "languages", "Eighth Schedule",
+]
+section_6_vocabulary = [
+    "consent", "agree", "agreement", "permission", "authorization", "opt in", "opt out", "withdraw",
+    "withdrawal", "revoke", "consent manager", "affirmative", "tick", "checkbox", "Data Protection Officer",
+    "DPO", "contact", "plain language", "specified purpose",
+]
+section_7_vocabulary = [
+    "legitimate use", "voluntarily", "State", "government", "subsidy", "benefit", "licence", "license",
+    "permit", "certificate", "sovereignty", "security of India", "court", "judgment", "decree", "order",
+    "medical emergency", "epidemic", "public health", "disaster", "public order", "employment",
+    "employee", "employer", "required by law", "legal obligation",
+]
+section_8_vocabulary = [
+    "accountable", "accountability", "processor", "contract", "accuracy", "accurate", "complete",
+    "security", "safeguard", "safeguards", "encryption", "breach", "notify", "erase", "erasure",
+    "delete", "deletion", "retain", "retention", "Data Protection Officer", "DPO", "grievance",
+    "redressal", "contact", "technical and organisational measures",
+]
+
+
+register_section("dpdpa-4", "Section 4 — Grounds for Processing Personal Data",
+                 section_4_checklist, section_4_prompt_intro, section_4_prompt_rules,
+                 vocabulary=section_4_vocabulary)
+register_section("dpdpa-5", "Section 5 — Notice",
+                 section_5_checklist, section_5_prompt_intro, section_5_prompt_rules,
+                 vocabulary=section_5_vocabulary)
+register_section("dpdpa-6", "Section 6 — Consent",
+                 section_6_checklist, section_6_prompt_intro, section_6_prompt_rules,
+                 vocabulary=section_6_vocabulary,
+                 meaning="This section outlines the requirements for obtaining and managing consent from data principals for the processing of their personal data.")
+register_section("dpdpa-7", "Section 7 — Certain Legitimate Uses",
+                 section_7_checklist, section_7_prompt_intro, section_7_prompt_rules,
+                 vocabulary=section_7_vocabulary)
+register_section("dpdpa-8", "Section 8 — General Obligations of Data Fiduciary",
+                 section_8_checklist, section_8_prompt_intro, section_8_prompt_rules,
+                 vocabulary=section_8_vocabulary)
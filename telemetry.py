@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+
+# USD per million (prompt, completion) tokens; used for cost estimates only.
+MODEL_PRICES_PER_MILLION = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+RUN_LABEL = "Run total"
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of values by linear interpolation; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """USD cost of the tokens at MODEL_PRICES_PER_MILLION (0 for an unknown model)."""
+    prompt_price, completion_price = MODEL_PRICES_PER_MILLION.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class _Counters:
+    __slots__ = ("calls", "errors", "retries", "cache_hits", "cache_misses", "prompt_tokens", "completion_tokens",
+                 "cached_tokens", "latencies")
+
+    def __init__(self):
+        self.calls = self.errors = self.retries = self.cache_hits = self.cache_misses = 0
+        self.prompt_tokens = self.completion_tokens = self.cached_tokens = 0
+        self.latencies = []
+
+
+class RunTelemetry:
+    """
+    Metrics of one compliance run, per section and in total: model calls,
+    failed calls, retries, verdict-cache hits/misses, latency percentiles,
+    prompt/completion tokens (and the prompt tokens the provider served
+    from its prompt cache) and estimated cost. Safe to record into from
+    worker threads.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.started = time.time()
+        self.finished = None
+        self._sections = {}
+        self._lock = threading.Lock()
+
+    def _counters(self, section):
+        return self._sections.setdefault(section or "Unattributed", _Counters())
+
+    def record_call(self, section, latency, prompt_tokens, completion_tokens, retries=0, error=False,
+                    cached_tokens=0):
+        with self._lock:
+            counters = self._counters(section)
+            counters.calls += 1
+            counters.errors += bool(error)
+            counters.retries += retries
+            counters.prompt_tokens += prompt_tokens
+            counters.completion_tokens += completion_tokens
+            counters.cached_tokens += cached_tokens
+            counters.latencies.append(latency)
+
+    def record_cache(self, section, hits, misses):
+        with self._lock:
+            counters = self._counters(section)
+            counters.cache_hits += hits
+            counters.cache_misses += misses
+
+    def finish(self):
+        self.finished = time.time()
+
+    def cost(self, prompt_tokens, completion_tokens):
+        return estimate_cost(self.model, prompt_tokens, completion_tokens)
+
+    def _summarize(self, counters_list):
+        latencies = [latency for c in counters_list for latency in c.latencies]
+        prompt_tokens = sum(c.prompt_tokens for c in counters_list)
+        completion_tokens = sum(c.completion_tokens for c in counters_list)
+        return {
+            "Calls": sum(c.calls for c in counters_list),
+            "Failed Calls": sum(c.errors for c in counters_list),
+            "Retries": sum(c.retries for c in counters_list),
+            "Cache Hits": sum(c.cache_hits for c in counters_list),
+            "Cache Misses": sum(c.cache_misses for c in counters_list),
+            "Latency p50 (s)": _round(percentile(latencies, 50)),
+            "Latency p95 (s)": _round(percentile(latencies, 95)),
+            "Latency p99 (s)": _round(percentile(latencies, 99)),
+            "Prompt Tokens": prompt_tokens,
+            "Completion Tokens": completion_tokens,
+            "Cached Prompt Tokens": sum(c.cached_tokens for c in counters_list),
+            "Estimated Cost (USD)": round(self.cost(prompt_tokens, completion_tokens), 6),
+        }
+
+    def summary(self):
+        """{"Model", "Elapsed Seconds", "Run", "Sections": {section: metrics}} as plain JSON-able data."""
+        with self._lock:
+            sections = {section: self._summarize([c]) for section, c in self._sections.items()}
+            run = self._summarize(list(self._sections.values()))
+        return {
+            "Model": self.model,
+            "Started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "Elapsed Seconds": round((self.finished or time.time()) - self.started, 2),
+            "Run": run,
+            "Sections": sections,
+        }
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2, ensure_ascii=False)
+
+
+def summary_rows(summary):
+    """A RunTelemetry summary as table rows: one per section, then the run total."""
+    return [{"Section": section, **metrics} for section, metrics in summary["Sections"].items()] + \
+        [{"Section": RUN_LABEL, **summary["Run"]}]
+
+
+def _round(value):
+    return None if value is None else round(value, 3)
@@ -0,0 +1,107 @@
+import pytest
+
+from reply_parsing import (
+    ReplyFormatError, batch_entries, parse_json_reply, resolve_checklist_item, split_item_id, validate_matched_items,
+)
+
+CHECKLIST = [
+    "Personal data is processed only for a lawful purpose.",
+    "Lawful purpose means a purpose not expressly forbidden by law.",
+    "Consent must be free, specific and informed.",
+]
+
+
+def test_parse_fenced_reply():
+    reply = parse_json_reply('```json\n{"Results": [{"Sentence ID": 1, "Matched Items": []}]}\n```')
+    assert reply == {"Results": [{"Sentence ID": 1, "Matched Items": []}]}
+
+
+def test_parse_reply_with_prose_and_trailing_commas():
+    reply = parse_json_reply('Here is the result:\n{"Matched Items": [{"Item": 1, "Justification": "x",},],}\nDone.')
+    assert reply == {"Matched Items": [{"Item": 1, "Justification": "x"}]}
+
+
+@pytest.mark.parametrize("content", ["", None, "no json here", "[1, 2, 3]", '{"Results": [}'])
+def test_parse_rejects_non_objects(content):
+    with pytest.raises(ReplyFormatError):
+        parse_json_reply(content)
+
+
+@pytest.mark.parametrize("name, expected", [
+    (1, CHECKLIST[0]),
+    ("3", CHECKLIST[2]),
+    ("Item 2", CHECKLIST[1]),
+    ("#3", CHECKLIST[2]),
+    ("1. Personal data is processed only for a lawful purpose.", CHECKLIST[0]),
+    ("  consent must be FREE,  specific and informed. ", CHECKLIST[2]),
+    ("expressly forbidden by law", CHECKLIST[1]),
+])
+def test_resolve_checklist_item(name, expected):
+    assert resolve_checklist_item(name, CHECKLIST) == expected
+
+
+def test_resolve_prefers_text_over_a_wrong_number():
+    # The reply quotes item 1 under item 2's number; the wording decides.
+    assert resolve_checklist_item("2. Personal data is processed only for a lawful purpose.", CHECKLIST) == \
+        CHECKLIST[0]
+
+
+@pytest.mark.parametrize("name", [0, 4, "Item 7", True, None, "", "   ", "We sell data to advertisers", 2.0])
+def test_resolve_phantom_items(name):
+    assert resolve_checklist_item(name, CHECKLIST) is None
+
+
+def test_validate_matched_items():
+    cleaned = validate_matched_items([
+        {"Item": 2, "Justification": " says so "},
+        {"Item": "2", "Justification": "again"},
+        {"Item": 9, "Justification": "phantom"},
+        {"Checklist Item": CHECKLIST[2], "Justification": None},
+        "not an entry",
+    ], CHECKLIST)
+    assert cleaned == [
+        {"Checklist Item": CHECKLIST[1], "Justification": "says so"},
+        {"Checklist Item": CHECKLIST[2], "Justification": ""},
+    ]
+
+
+def test_validate_rejects_non_list():
+    with pytest.raises(ReplyFormatError):
+        validate_matched_items({"Item": 1}, CHECKLIST)
+
+
+@pytest.mark.parametrize("item_id, expected", [
+    ("S2.3", ("S2", 3)),
+    ("s1/4", ("S1", 4)),
+    ("[S3]: 1", ("S3", 1)),
+    ("3", None),
+    ("S2", None),
+    (3, None),
+])
+def test_split_item_id(item_id, expected):
+    assert split_item_id(item_id) == expected
+
+
+def test_batch_entries():
+    entries = batch_entries({"Results": [
+        {"Sentence ID": 2, "Matched Items": ["first"]},
+        {"Sentence ID": "2", "Matched Items": ["duplicate"]},
+        {"Sentence ID": 0},
+        {"Sentence ID": 4},
+        {"Sentence ID": "one"},
+        {"Matched Items": []},
+        "not an entry",
+        {"Sentence ID": "1", "Matched Items": []},
+    ]}, 3)
+    assert entries == {0: {"Sentence ID": "1", "Matched Items": []},
+                       1: {"Sentence ID": 2, "Matched Items": ["first"]}}
+
+
+def test_batch_entries_clause_ids():
+    assert batch_entries({"Results": [{"Clause ID": 1, "Sections": []}]}, 1, id_field="Clause ID") == \
+        {0: {"Clause ID": 1, "Sections": []}}
+
+
+def test_batch_entries_without_results():
+    with pytest.raises(ReplyFormatError):
+        batch_entries({"Matched Items": []}, 1)
@@ -0,0 +1,54 @@
+import pytest
+
+from segmenter import dedupe_sentences, iter_segments, normalize_sentence
+
+
+def split(text):
+    return [segment.text for segment in iter_segments(text)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("We collect data, e.g. your name. We keep it safe.", ["We collect data, e.g. your name.", "We keep it safe."]),
+    ("See Sec. 6 of the Act. It applies.", ["See Sec. 6 of the Act.", "It applies."]),
+    ("A fee of Rs. 500 applies. Pay online.", ["A fee of Rs. 500 applies.", "Pay online."]),
+    ("Refer to No. 12 below. Thanks.", ["Refer to No. 12 below.", "Thanks."]),
+    ("We say no. Then we stop.", ["We say no.", "Then we stop."]),
+    ("Write to Dr. A. Sharma today. She replies.", ["Write to Dr. A. Sharma today.", "She replies."]),
+    ("We work with XYZ Pvt. Ltd. and others.", ["We work with XYZ Pvt. Ltd. and others."]),
+    ("Data is held by ABC Ltd. Our partners see none.", ["Data is held by ABC Ltd.", "Our partners see none."]),
+    ("As set out in cl. 3 we comply.", ["As set out in cl. 3 we comply."]),
+])
+def test_abbreviations(text, expected):
+    assert split(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1. We collect data. 2. We share data.", ["1. We collect data.", "2. We share data."]),
+    ("We keep it for 30 days. 5 categories are collected.",
+     ["We keep it for 30 days.", "5 categories are collected."]),
+])
+def test_sentence_end_before_a_number(text, expected):
+    assert split(text) == expected
+
+
+def test_list_items_and_blank_lines():
+    text = "Purposes\n1. We process data lawfully\n2. We notify breaches\n\nWe erase data on request."
+    assert split(text) == ["Purposes", "1. We process data lawfully", "2. We notify breaches",
+                           "We erase data on request."]
+
+
+def test_offsets_index_the_input():
+    text = "  First   sentence here.\n\nSecond one!  "
+    segments = list(iter_segments(text))
+    assert [s.text for s in segments] == ["First sentence here.", "Second one!"]
+    assert [text[s.start:s.end] for s in segments] == ["First   sentence here.", "Second one!"]
+
+
+def test_normalize_sentence():
+    assert normalize_sentence("  We  Collect\tDATA. ") == "we collect data."
+
+
+def test_dedupe_sentences():
+    unique, index_of = dedupe_sentences(["Footer text.", "We collect data.", "FOOTER   text.", "Footer text."])
+    assert unique == ["Footer text.", "We collect data."]
+    assert index_of == [0, 1, 0, 0]
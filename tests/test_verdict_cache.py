@@ -0,0 +1,59 @@
+import pytest
+
+import verdict_cache
+from verdict_cache import VerdictCache, section_fingerprint, verdict_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(verdict_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_round_trip_and_counters():
+    cache = VerdictCache(":memory:")
+    cache.put_many("Section 6", [("a", {"Matched Items": []})])
+    assert cache.get_many(["a", "b", "a"]) == {"a": {"Matched Items": []}}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.cached_keys(["a", "b"]) == {"a"}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = VerdictCache(":memory:", ttl_seconds=60)
+    cache.put_many("Section 6", [("a", {})])
+    clock[0] += 59
+    assert cache.get_many(["a"]) == {"a": {}}
+    clock[0] += 2
+    assert cache.get_many(["a"]) == {}
+    assert cache.cached_keys(["a"]) == set()
+    cache.evict()
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_are_evicted(clock):
+    cache = VerdictCache(":memory:", max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put_many("Section 6", [(key, {"key": key})])
+        clock[0] += 1
+    cache.get_many(["a"])  # "a" is now the most recently used
+    cache.evict()
+    assert cache.cached_keys(["a", "b", "c"]) == {"a", "c"}
+
+
+def test_invalidate_one_section():
+    cache = VerdictCache(":memory:")
+    cache.put_many("Section 5", [("a", {})])
+    cache.put_many("Section 6", [("b", {})])
+    cache.invalidate("Section 6")
+    assert cache.cached_keys(["a", "b"]) == {"a"}
+
+
+def test_verdict_key():
+    fingerprint = section_fingerprint("Section 6", ["Consent is free."], "intro", "rules")
+    key = verdict_key("gpt-3.5-turbo", 0, fingerprint, "We ask for consent.")
+    assert key == verdict_key("gpt-3.5-turbo", 0, fingerprint, "  we ASK for   consent. ")
+    assert key != verdict_key("gpt-4o", 0, fingerprint, "We ask for consent.")
+    assert key != verdict_key("gpt-3.5-turbo", 0, section_fingerprint("Section 6", ["Consent is free."], "intro",
+                                                                      "other rules"), "We ask for consent.")
@@ -1,786 +1,40 @@
 import streamlit as st
 
-import openai
+import atexit
 import json
-import pandas as pd
-import re
-def sent_tokenize(text):
-    """A basic fallback sentence tokenizer using regex."""
-    text = text.replace("\n", " ")
-    return re.split(r'(?<=[.!?]) +', text)
-
-
-# --- OpenAI Setup ---
-api_key = st.secrets["OPENAI_API_KEY"]
-client = openai.OpenAI(api_key=api_key)
-
-# --- DPDPA Sections ---
-dpdpa_sections = [
-    "Section 4 — Grounds for Processing Personal Data",
-    "Section 5 — Notice",
-    "Section 6 — Consent",
-    "Section 7 — Certain Legitimate Uses",
-    "Section 8 — General Obligations of Data Fiduciary"
-]
-
-section_4_checklist = [
-    "Personal data is processed only for a lawful purpose.",
-    "Lawful purpose means a purpose not expressly forbidden by law.",
-    "Lawful purpose must be backed by explicit consent from the Data Principal or fall under legitimate uses.",
-]
-section_5_checklist = [
-    "A notice is given before or at the time of requesting consent.",
-    "Notice clearly mentions what personal data is being collected.",
-    "Notice clearly mentions the purpose for which the personal data is proposed to be processed.",
-    "Notice describes how the Data Principal can exercise her rights under Section 6(4) and Section 13.",
-    "Notice explains how the Data Principal can file a complaint with the Data Protection Board.",
-    "For data collected before commencement of the Act, retrospective notice is given as soon as reasonably practicable.",
-    "Retrospective notice includes: data processed, purpose, rights under Section 6(4) and 13, and complaint mechanism.",
-    "Data Fiduciary may continue processing pre-Act personal data until consent is withdrawn.",
-    "Notice must be available in English or any language under the Eighth Schedule of the Constitution."
-]
-
-# --- Section 6 Checklist ---
-section_6_checklist = [
-    # A. Nature and Validity of Consent (Section 6(1))
-    "Consent is free — voluntarily given, not coerced or forced.",
-    "Consent is specific to a clearly defined purpose.",
-    "Consent is informed — based on full disclosure before collection.",
-    "Consent is unconditional — not bundled with unrelated terms.",
-    "Consent is unambiguous — clear in intent and meaning.",
-    "Consent is given through clear affirmative action (e.g., ticking a box, clicking 'I agree').",
-    "Consent is limited strictly to the specified purpose.",
-    "Only personal data necessary for the specified purpose is processed.",
-
-    # B. Consent Request Requirements (Section 6(3))
-    "Consent request is written in clear and plain language.",
-    "Consent request is available in English or one of the 22 Eighth Schedule languages.",
-    "Consent request includes contact details of the Data Protection Officer (DPO) or authorized representative.",
-
-    # C. Legal Integrity of Consent (Section 6(2))
-    "Any clause in the consent request that infringes on the Act is void to that extent.",
-
-    # D. Withdrawal and Post-Withdrawal Compliance (Section 6(4), 6(5), 6(6))
-    "Consent can be withdrawn at any time by the Data Principal.",
-    "Consequences of withdrawal (e.g., loss of service) are borne by the Data Principal.",
-    "Withdrawal does not affect the legality of processing done before the withdrawal.",
-    "Processing of personal data must stop upon withdrawal, unless legally mandated to continue.",
-
-    # E. Consent Manager Requirements (Section 6(7), 6(8), 6(9))
-    "Consent can be given, managed, and withdrawn through a Consent Manager.",
-    "Consent Manager acts on behalf of the Data Principal and is accountable to them.",
-    "Consent Manager is registered with the Data Protection Board of India.",
-    "Consent Manager enables easy management of consent (granting, auditing, withdrawing).",
-
-    # F. Record-Keeping and Proof of Validity (Section 6(10))
-    "Data Fiduciary must demonstrate that valid notice was provided to the Data Principal.",
-    "Data Fiduciary must prove that consent was validly obtained."
-]
-section_7_checklist = [
-    "Personal data is processed without consent only if it falls within specific legal grounds under Section 7.",
-    "Each legitimate use must be necessary, proportionate, and in accordance with applicable laws or standards.",
-
-    # (a) Voluntary Provision
-    "Data Principal voluntarily provided personal data for a specified purpose and did not object to its use for that purpose.",
-
-    # (b) State-Issued Subsidies/Benefits
-    "Processing is done by the State or its instrumentalities to issue a subsidy, benefit, service, certificate, licence or permit.",
-    "Data Principal has previously consented for such processing by the State or its instrumentalities.",
-    "Personal data is sourced from officially maintained registers or databases and notified by the Central Government.",
-    "Processing follows standards or policies notified by the Central Government or law for personal data governance.",
-
-    # (c) State Function
-    "Processing is necessary for the performance of any legal function by the State or its instrumentalities related to sovereignty, integrity, or security of India.",
-
-    # (d) Statutory Obligation
-    "Processing is required under any law for disclosing information to the State or its instrumentalities, subject to applicable provisions.",
-
-    # (e) Court Order
-    "Processing is required to comply with a judgment, decree, or order under Indian or foreign law related to civil or contractual claims.",
-
-    # (f) Medical Emergency
-    "Processing is required to respond to a medical emergency involving threat to life or health of the Data Principal or another person.",
-
-    # (g) Epidemic or Public Health
-    "Processing is required to provide medical treatment or health services during an epidemic, outbreak, or other public health threat.",
-
-    # (h) Disaster or Public Order
-    "Processing is required to ensure safety or provide assistance or services during a disaster or public order breakdown.",
-    "Disaster is as defined under clause (d) of Section 2 of the Disaster Management Act, 2005.",
-
-    # (i) Employment-Related Purposes
-    "Processing is necessary for employment-related purposes or to safeguard the employer from loss or liability.",
-    "Examples include prevention of corporate espionage, protection of IP, or provision of services/benefits to employees."
-]
-section_8_checklist = [
-    "Data Fiduciary is accountable for compliance with the Act even if processing is done by a Data Processor.",
-    "Data Fiduciary may engage a Data Processor only under a valid contract.",
-    "If personal data is used to make decisions about or is disclosed to another Fiduciary, ensure completeness, accuracy, and consistency.",
-    "Implement appropriate technical and organisational measures to ensure compliance with the Act and rules.",
-    "Ensure reasonable security safeguards to prevent personal data breaches.",
-    "Notify the Board and affected Data Principals of a personal data breach in prescribed form and manner.",
-    "Erase personal data upon withdrawal of consent or if the specified purpose is no longer being served, unless retention is legally required.",
-    "Cause Data Processor to erase data shared with them once consent is withdrawn or purpose is no longer served.",
-    "The purpose is deemed no longer served if the Data Principal does not approach the Fiduciary or exercise any rights for a prescribed time.",
-    "Publish business contact details of the Data Protection Officer or responsible contact person.",
-    "Establish an effective grievance redressal mechanism.",
-    "Clarify that Data Principal inactivity implies purpose is no longer served (as per clause 8)."
-]
-
-# --- Sentence-wise GPT match function ---
-    
-def match_sentence_to_checklist4(sentence, checklist_items):
-    prompt = f"""
-    You are a DPDPA compliance auditor. Your task is to evaluate whether the following policy sentence clearly satisfies **any** of the obligations listed under **Section 4: Grounds for Processing Personal Data** of the **Digital Personal Data Protection Act, 2023 (India).**
-    
-    ---
-    
-    **Policy Sentence:**
-    \"{sentence}\"
-    
-    ---
-    
-    **Checklist Items from Section 4:**
-    {chr(10).join([f"{i+1}. {item}" for i, item in enumerate(checklist_items)])}
-    
-    ---
-    
-    **Evaluation Instructions:**
-    
-    You must ONLY mark a checklist item as matched if:
-    
-    - The sentence **explicitly states** a lawful ground for processing personal data (e.g., consent, legal obligation, legitimate use).
-    - It uses **unambiguous legal terms** or policy language like "lawful purpose", "explicit consent", "permitted under law", or "in accordance with Section 4".
-    - It clearly describes a basis that is **not prohibited** by law and **is supported by user consent or valid legal grounds**.
-    
-    ---
-    
-    **You MUST NOT match** if:
-    
-    - The sentence merely says "we collect information" or "we use your data" without stating **why** (the legal ground).
-    - The sentence talks about **benefits to the user** (e.g., personalization, service improvement) without identifying a **lawful purpose**.
-    - The sentence uses vague or generic language like "to serve you better", "to help improve services", or "we process data" without citing any valid basis.
-    - You have to **infer** or **guess** a legal justification — this is **non-compliant**.
-    
-    ✅ Match ONLY when the legal obligation is directly stated, precise, and clear.  
-    ❌ Do NOT rely on assumptions or indirect phrasing.
-    
-    > **Self-check before matching:**  
-    > “Would a data protection auditor accept this sentence as evidence of compliance with Section 4?”  
-    > If the answer is not a confident YES, do not match.
-    
-    ---
-    
-    **Response Format (strict JSON):**
-    
-    {{
-      "Matched Items": [
-        {{
-          "Checklist Item": "...",
-          "Justification": "..."
-        }}
-      ]
-    }}
-    
-    If none of the checklist items are satisfied, return:
-    "Matched Items": []
-    """
-
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    return json.loads(response.choices[0].message.content)
-
-
-# --- Full analyzer using sentence loop for Section 4 only ---
-def analyze_policy_section4(policy_text):
-    policy_sentences = sent_tokenize(policy_text)
-    match_results = []
-
-    for sentence in policy_sentences:
-        if len(sentence.strip().split()) < 5:  # Skip vague/short phrases
-            continue
-        result = match_sentence_to_checklist4(sentence, section_4_checklist)
-        for match in result.get("Matched Items", []):
-            match_results.append({
-                "Sentence": sentence.strip(),
-                "Checklist Item": match["Checklist Item"].strip(),
-                "Justification": match["Justification"].strip()
-            })
-
-    # Deduplicate matched checklist items
-    matched_items = {}
-    for r in match_results:
-        if r["Checklist Item"] not in matched_items:
-            matched_items[r["Checklist Item"]] = r
-
-    matched_count = len(matched_items)
-    total_items = len(section_4_checklist)
-
-    # Classification logic
-    if matched_count == total_items:
-        match_level = "Fully Compliant"
-        points = 1.0
-        severity = "N/A"
-    elif matched_count == 0:
-        match_level = "Non-Compliant"
-        points = 0.0
-        severity = "Major"
-    elif matched_count == 1:
-        match_level = "Partially Compliant"
-        points = 0.75
-        severity = "Minor"
-    elif matched_count <= 3:
-        match_level = "Partially Compliant"
-        points = 0.5
-        severity = "Medium"
-    else:
-        match_level = "Partially Compliant"
-        points = 0.25
-        severity = "Major"
-
-    # Suggested Rewrites
-    missing_items = [item for item in section_4_checklist if item not in matched_items]
-    if missing_items:
-        suggested_rewrite = "### Suggested Rewrite for Missing Items:\n" + \
-            "\n".join([f"- Add this statement: *{item}*" for item in missing_items])
-    else:
-        suggested_rewrite = "All checklist items are covered."
-
-    # Final Output
-    final_output = {
-        "DPDPA Section": "Section 4 — Grounds for Processing Personal Data",
-        "DPDPA Section Meaning": "",
-        "Checklist Items Matched": list(set(matched_items.keys())),
-        "Matched Sentences": list(matched_items.values()),
-        "Match Level": match_level,
-        "Severity": severity,
-        "Compliance Points": points,
-        "Suggested Rewrite": suggested_rewrite
-    }
-    return final_output
-def match_sentence_to_checklist5(sentence, checklist_items):
-    prompt = f"""
-    You are a DPDPA compliance expert. Your job is to determine whether the following policy sentence complies and fulfills any obligations listed under Section 5 (Notice) of the Digital Personal Data Protection Act, 2023 (India).
-
-    ---
-    
-    **Policy Sentence:**
-    \"{sentence}\"
-    
-    ---
-    
-    **Checklist Items:**
-    {chr(10).join([f"{i+1}. {item}" for i, item in enumerate(checklist_items)])}
-    
-    ---
-    
-    **Important Instructions:**
-    
-    1. Match ONLY if the sentence **explicitly** refers to the checklist item using clear legal language.
-    2. **DO NOT** infer, imply, interpret user behavior, or stretch meaning.
-    3. DO NOT mark a sentence as a match if it:
-       
-    Only count a checklist item as matched if the sentence **explicitly and unambiguously** addresses the legal obligation — either through exact terminology or unmistakable legal phrasing.
-    
-    DO NOT match if:
-    - The sentence **implies** or **suggests** compliance without clearly stating it.
-    
-    ✅ Match only when the legal requirement is **explicit**, **contextually precise**, and **linguistically unambiguous**.
-    
-    > **Ask yourself for each match:**  
-    > “Would a data protection auditor accept this as proof of compliance for this clause?”  
-    > If the answer is “maybe” or “only if interpreted generously,” then the item should **NOT** be marked as matched.
-    
-    ---
-    
-    Please return your response strictly in the following JSON format:
-    
-    {{
-      "Matched Items": [
-        {{
-          "Checklist Item": "...",
-          "Justification": "..."
-        }}
-      ]
-    }}
-    
-    If no checklist item is clearly satisfied, return: "Matched Items": []
-    """
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    return json.loads(response.choices[0].message.content)
-
-
-# --- Full analyzer using sentence loop for Section 4 only ---
-def analyze_policy_section5(policy_text):
-    policy_sentences = sent_tokenize(policy_text)
-    match_results = []
-
-    for sentence in policy_sentences:
-        if len(sentence.strip().split()) < 5:  # Skip vague/short phrases
-            continue
-        result = match_sentence_to_checklist5(sentence, section_5_checklist)
-        for match in result.get("Matched Items", []):
-            match_results.append({
-                "Sentence": sentence.strip(),
-                "Checklist Item": match["Checklist Item"].strip(),
-                "Justification": match["Justification"].strip()
-            })
-
-    # Deduplicate matched checklist items
-    matched_items = {}
-    for r in match_results:
-        if r["Checklist Item"] not in matched_items:
-            matched_items[r["Checklist Item"]] = r
-
-    matched_count = len(matched_items)
-    total_items = len(section_5_checklist)
-
-    # Classification logic
-    if matched_count == total_items:
-        match_level = "Fully Compliant"
-        points = 1.0
-        severity = "N/A"
-    elif matched_count == 0:
-        match_level = "Non-Compliant"
-        points = 0.0
-        severity = "Major"
-    elif matched_count == 1:
-        match_level = "Partially Compliant"
-        points = 0.75
-        severity = "Minor"
-    elif matched_count <= 3:
-        match_level = "Partially Compliant"
-        points = 0.5
-        severity = "Medium"
-    else:
-        match_level = "Partially Compliant"
-        points = 0.25
-        severity = "Major"
-
-    # Suggested Rewrites
-    missing_items = [item for item in section_5_checklist if item not in matched_items]
-    if missing_items:
-        suggested_rewrite = "### Suggested Rewrite for Missing Items:\n" + \
-            "\n".join([f"- Add this statement: *{item}*" for item in missing_items])
-    else:
-        suggested_rewrite = "All checklist items are covered."
-
-    # Final Output
-    final_output = {
-        "DPDPA Section": "Section 5 — Notice",
-        "DPDPA Section Meaning": "",
-        "Checklist Items Matched": list(set(matched_items.keys())),
-        "Matched Sentences": list(matched_items.values()),
-        "Match Level": match_level,
-        "Severity": severity,
-        "Compliance Points": points,
-        "Suggested Rewrite": suggested_rewrite
-    }
-    return final_output
-
-def match_sentence_to_checklist6(sentence, checklist_items):
-    prompt = f"""
-    You are a DPDPA compliance expert. Your job is to determine whether the following policy sentence complies and fulfills any obligations listed under Section 6 (Consent and Its Management)of the Digital Personal Data Protection Act, 2023 (India).
-
-    ---
-    
-    **Policy Sentence:**
-    \"{sentence}\"
-    
-    ---
-    
-    **Checklist Items:**
-    {chr(10).join([f"{i+1}. {item}" for i, item in enumerate(checklist_items)])}
-    
-    ---
-    
-    **Important Instructions:**
-    
-    1. Match ONLY if the sentence **explicitly** refers to the checklist item using clear legal language.
-    2. **DO NOT** infer, imply, interpret user behavior, or stretch meaning.
-    3. DO NOT mark a sentence as a match if it:
-       - Merely describes UI/UX behavior (e.g., “you can save preferences”) without explicitly referencing **consent** or legal control.
-       - Vaguely discusses data collection without mentioning **consent**, **affirmative action**, **withdrawal**, or **data principal control**.
-       - Contains generic statements like “we collect data to improve services” or “we store information”.
-    
-    4. Match ONLY IF:
-       - The sentence clearly mentions: consent, withdrawal, specified purpose, unambiguous agreement, consent manager, etc.
-       - The sentence reflects a **policy-level commitment**, not just a description of technical functionality.
-    
-    Only count a checklist item as matched if the sentence **explicitly and unambiguously** addresses the legal obligation — either through exact terminology or unmistakable legal phrasing.
-    
-    DO NOT match if:
-    - The sentence **implies** or **suggests** compliance without clearly stating it.
-    - It refers to **data/account controls** but does not mention **consent or legal intent**.
-    - It discusses user actions (e.g., “signing up”, “saving preferences”, “contacting support”) without framing them as part of **consent management**.
-    - The term “consent” or a legal synonym (e.g., “authorization”, “agreement”, “permission”) is **not present**, and the legal obligation is not unmistakably addressed.
-    
-    ---
-    
-    **Examples that should NOT be matched:**
-    - “Users can delete data from their account” → ❌ Not equivalent to consent withdrawal.
-    - “We collect information when you use our services” → ❌ Does not indicate clear affirmative action.
-    - “You may adjust your settings” → ❌ Too vague to imply informed consent or legal control.
-    
-    ---
-    
-    ✅ Match only when the legal requirement is **explicit**, **contextually precise**, and **linguistically unambiguous**.
-    
-    > **Ask yourself for each match:**  
-    > “Would a data protection auditor accept this as proof of compliance for this clause?”  
-    > If the answer is “maybe” or “only if interpreted generously,” then the item should **NOT** be marked as matched.
-    
-    ---
-    
-    Please return your response strictly in the following JSON format:
-    
-    {{
-      "Matched Items": [
-        {{
-          "Checklist Item": "...",
-          "Justification": "..."
-        }}
-      ]
-    }}
-    
-    If no checklist item is clearly satisfied, return: "Matched Items": []
-    """
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    return json.loads(response.choices[0].message.content)
-
-
-
-# --- Full analyzer using sentence loop for Section 6 only ---
-def analyze_policy_section6(policy_text):
-    policy_sentences = sent_tokenize(policy_text)
-    match_results = []
-
-    for sentence in policy_sentences:
-        if len(sentence.strip().split()) < 5:  # Skip vague/short phrases
-            continue
-        result = match_sentence_to_checklist6(sentence, section_6_checklist)
-        for match in result.get("Matched Items", []):
-            match_results.append({
-                "Sentence": sentence.strip(),
-                "Checklist Item": match["Checklist Item"].strip(),
-                "Justification": match["Justification"].strip()
-            })
-
-    # Deduplicate matched checklist items
-    matched_items = {}
-    for r in match_results:
-        if r["Checklist Item"] not in matched_items:
-            matched_items[r["Checklist Item"]] = r
-
-    matched_count = len(matched_items)
-    total_items = len(section_6_checklist)
-
-    # Classification logic
-    if matched_count == total_items:
-        match_level = "Fully Compliant"
-        points = 1.0
-        severity = "N/A"
-    elif matched_count == 0:
-        match_level = "Non-Compliant"
-        points = 0.0
-        severity = "Major"
-    elif matched_count == 1:
-        match_level = "Partially Compliant"
-        points = 0.75
-        severity = "Minor"
-    elif matched_count <= 3:
-        match_level = "Partially Compliant"
-        points = 0.5
-        severity = "Medium"
-    else:
-        match_level = "Partially Compliant"
-        points = 0.25
-        severity = "Major"
-
-    # Suggested Rewrites
-    missing_items = [item for item in section_6_checklist if item not in matched_items]
-    if missing_items:
-        suggested_rewrite = "### Suggested Rewrite for Missing Items:\n" + \
-            "\n".join([f"- Add this statement: *{item}*" for item in missing_items])
-    else:
-        suggested_rewrite = "All checklist items are covered."
-
-    # Final Output
-    final_output = {
-        "DPDPA Section": "Section 6 — Consent",
-        "DPDPA Section Meaning": "This section outlines the requirements for obtaining and managing consent from data principals for the processing of their personal data.",
-        "Checklist Items Matched": list(set(matched_items.keys())),
-        "Matched Sentences": list(matched_items.values()),
-        "Match Level": match_level,
-        "Severity": severity,
-        "Compliance Points": points,
-        "Suggested Rewrite": suggested_rewrite
-    }
-    return final_output
-    
-def match_sentence_to_checklist7(sentence, checklist_items):
-    prompt = f"""
-    You are a DPDPA compliance expert. Your job is to determine whether the following policy sentence complies and fulfills any obligations listed under Section 7 (Certain Legitimate Uses) of the Digital Personal Data Protection Act, 2023 (India).
-
-    ---
-    
-    **Policy Sentence:**
-    \"{sentence}\"
-    
-    ---
-    
-    **Checklist Items:**
-    {chr(10).join([f"{i+1}. {item}" for i, item in enumerate(checklist_items)])}
-    
-    ---
-    
-    **Important Instructions:**
-    
-    1. Match ONLY if the sentence **explicitly** refers to the checklist item using clear legal language.
-    2. **DO NOT** infer, imply, interpret user behavior, or stretch meaning.
-    3. DO NOT mark a sentence as a match if it:
-       
-    Only count a checklist item as matched if the sentence **explicitly and unambiguously** addresses the legal obligation — either through exact terminology or unmistakable legal phrasing.
-    
-    DO NOT match if:
-    - The sentence **implies** or **suggests** compliance without clearly stating it.
-    
-    ✅ Match only when the legal requirement is **explicit**, **contextually precise**, and **linguistically unambiguous**.
-    
-    > **Ask yourself for each match:**  
-    > “Would a data protection auditor accept this as proof of compliance for this clause?”  
-    > If the answer is “maybe” or “only if interpreted generously,” then the item should **NOT** be marked as matched.
-    
-    ---
-    
-    Please return your response strictly in the following JSON format:
-    
-    {{
-      "Matched Items": [
-        {{
-          "Checklist Item": "...",
-          "Justification": "..."
-        }}
-      ]
-    }}
-    
-    If no checklist item is clearly satisfied, return: "Matched Items": []
-    """
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    return json.loads(response.choices[0].message.content)
-
-
-# --- Full analyzer using sentence loop for Section 6 only ---
-def analyze_policy_section7(policy_text):
-    policy_sentences = sent_tokenize(policy_text)
-    match_results = []
-
-    for sentence in policy_sentences:
-        if len(sentence.strip().split()) < 5:  # Skip vague/short phrases
-            continue
-        result = match_sentence_to_checklist7(sentence, section_7_checklist)
-        for match in result.get("Matched Items", []):
-            match_results.append({
-                "Sentence": sentence.strip(),
-                "Checklist Item": match["Checklist Item"].strip(),
-                "Justification": match["Justification"].strip()
-            })
-
-    # Deduplicate matched checklist items
-    matched_items = {}
-    for r in match_results:
-        if r["Checklist Item"] not in matched_items:
-            matched_items[r["Checklist Item"]] = r
-
-    matched_count = len(matched_items)
-    total_items = len(section_7_checklist)
-
-    # Classification logic
-    if matched_count == total_items:
-        match_level = "Fully Compliant"
-        points = 1.0
-        severity = "N/A"
-    elif matched_count == 0:
-        match_level = "Non-Compliant"
-        points = 0.0
-        severity = "Major"
-    elif matched_count == 1:
-        match_level = "Partially Compliant"
-        points = 0.75
-        severity = "Minor"
-    elif matched_count <= 3:
-        match_level = "Partially Compliant"
-        points = 0.5
-        severity = "Medium"
-    else:
-        match_level = "Partially Compliant"
-        points = 0.25
-        severity = "Major"
-
-    # Suggested Rewrites
-    missing_items = [item for item in section_7_checklist if item not in matched_items]
-    if missing_items:
-        suggested_rewrite = "### Suggested Rewrite for Missing Items:\n" + \
-            "\n".join([f"- Add this statement: *{item}*" for item in missing_items])
-    else:
-        suggested_rewrite = "All checklist items are covered."
-
-    # Final Output
-    final_output = {
-        "DPDPA Section": "Section 7 — Certain Legitimate Uses",
-        "DPDPA Section Meaning": "",
-        "Checklist Items Matched": list(set(matched_items.keys())),
-        "Matched Sentences": list(matched_items.values()),
-        "Match Level": match_level,
-        "Severity": severity,
-        "Compliance Points": points,
-        "Suggested Rewrite": suggested_rewrite
-    }
-    return final_output
-    
-def match_sentence_to_checklist8(sentence, checklist_items):
-    prompt = f"""
-    You are a DPDPA compliance expert. Your job is to determine whether the following policy sentence complies and fulfills any obligations listed under Section 8 (General Obligations of Data Fiduciary) of the Digital Personal Data Protection Act, 2023 (India).
-
-    ---
-    
-    **Policy Sentence:**
-    \"{sentence}\"
-    
-    ---
-    
-    **Checklist Items:**
-    {chr(10).join([f"{i+1}. {item}" for i, item in enumerate(checklist_items)])}
-    
-    ---
-    
-    **Important Instructions:**
-    
-    1. Match ONLY if the sentence **explicitly** refers to the checklist item using clear legal language.
-    2. **DO NOT** infer, imply, interpret user behavior, or stretch meaning.
-    3. DO NOT mark a sentence as a match if it:
-       
-    Only count a checklist item as matched if the sentence **explicitly and unambiguously** addresses the legal obligation — either through exact terminology or unmistakable legal phrasing.
-    
-    DO NOT match if:
-    - The sentence **implies** or **suggests** compliance without clearly stating it.
-    
-    ✅ Match only when the legal requirement is **explicit**, **contextually precise**, and **linguistically unambiguous**.
-    
-    > **Ask yourself for each match:**  
-    > “Would a data protection auditor accept this as proof of compliance for this clause?”  
-    > If the answer is “maybe” or “only if interpreted generously,” then the item should **NOT** be marked as matched.
-    
-    ---
-    
-    Please return your response strictly in the following JSON format:
-    
-    {{
-      "Matched Items": [
-        {{
-          "Checklist Item": "...",
-          "Justification": "..."
-        }}
-      ]
-    }}
-    
-    If no checklist item is clearly satisfied, return: "Matched Items": []
-    """
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0
-    )
-    return json.loads(response.choices[0].message.content)
-
-
-# --- Full analyzer using sentence loop for Section 6 only ---
-def analyze_policy_section8(policy_text):
-    policy_sentences = sent_tokenize(policy_text)
-    match_results = []
-
-    for sentence in policy_sentences:
-        if len(sentence.strip().split()) < 5:  # Skip vague/short phrases
-            continue
-        result = match_sentence_to_checklist8(sentence, section_8_checklist)
-        for match in result.get("Matched Items", []):
-            match_results.append({
-                "Sentence": sentence.strip(),
-                "Checklist Item": match["Checklist Item"].strip(),
-                "Justification": match["Justification"].strip()
-            })
-
-    # Deduplicate matched checklist items
-    matched_items = {}
-    for r in match_results:
-        if r["Checklist Item"] not in matched_items:
-            matched_items[r["Checklist Item"]] = r
-
-    matched_count = len(matched_items)
-    total_items = len(section_8_checklist)
-
-    # Classification logic
-    if matched_count == total_items:
-        match_level = "Fully Compliant"
-        points = 1.0
-        severity = "N/A"
-    elif matched_count == 0:
-        match_level = "Non-Compliant"
-        points = 0.0
-        severity = "Major"
-    elif matched_count == 1:
-        match_level = "Partially Compliant"
-        points = 0.75
-        severity = "Minor"
-    elif matched_count <= 3:
-        match_level = "Partially Compliant"
-        points = 0.5
-        severity = "Medium"
-    else:
-        match_level = "Partially Compliant"
-        points = 0.25
-        severity = "Major"
-
-    # Suggested Rewrites
-    missing_items = [item for item in section_8_checklist if item not in matched_items]
-    if missing_items:
-        suggested_rewrite = "### Suggested Rewrite for Missing Items:\n" + \
-            "\n".join([f"- Add this statement: *{item}*" for item in missing_items])
-    else:
-        suggested_rewrite = "All checklist items are covered."
-
-    # Final Output
-    final_output = {
-        "DPDPA Section": "Section 8 — General Obligations of Data Fiduciary",
-        "DPDPA Section Meaning": "",
-        "Checklist Items Matched": list(set(matched_items.keys())),
-        "Matched Sentences": list(matched_items.values()),
-        "Match Level": match_level,
-        "Severity": severity,
-        "Compliance Points": points,
-        "Suggested Rewrite": suggested_rewrite
-    }
-    return final_output
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from dpdpa_engine import (
+    CLAUSE_LABEL, MAX_CONCURRENT_REQUESTS, align_sentences, candidate_sentences, classify_section, configure,
+    PLAN_CALL_SECONDS, dpdpa_sections, get_prefilter, get_request_scheduler, get_result_cache, get_verdict_cache,
+    new_run_telemetry, plan_run, run_key, score_changes, sent_tokenize, settings_env, stream_section_events,
+)
+from history_store import ALL_POLICIES, DEFAULT_ORGANIZATION, DEFAULT_POLICY, OVERALL, ComplianceHistory
+from ingestion import PolicySentence, group_clauses, iter_sentences
+from job_queue import JobQueue
+from job_worker import start_workers, stop_workers
+from prefilter import DEFAULT_THRESHOLD
+from report_export import EXCEL_MIME, REPORT_FILENAME, excel_report
+from section_registry import CUSTOM_SCOPE, SCOPES, section_registry, sections_in_scope
+from telemetry import summary_rows
+
+# With job workers, background jobs get DPDPA_JOB_SHARE of the account's request limits (split between the
+# workers) and the app's own runs the rest, so together they stay within the limits.
+JOB_WORKERS = int(st.secrets.get("DPDPA_JOB_WORKERS", 0))
+JOB_SHARE = float(st.secrets.get("DPDPA_JOB_SHARE", 0.5)) if JOB_WORKERS else 0.0
+RPM_LIMIT = int(st.secrets.get("OPENAI_RPM_LIMIT", 3500))
+TPM_LIMIT = int(st.secrets.get("OPENAI_TPM_LIMIT", 200_000))
+configure(
+    api_key=st.secrets["OPENAI_API_KEY"],
+    rpm_limit=max(1, int(RPM_LIMIT * (1 - JOB_SHARE))),
+    tpm_limit=max(1, int(TPM_LIMIT * (1 - JOB_SHARE))),
+    max_concurrency=int(st.secrets.get("OPENAI_MAX_CONCURRENCY", 32)),
+    model_backend=st.secrets.get("DPDPA_MODEL_BACKEND"),
+    model_log=st.secrets.get("DPDPA_MODEL_LOG"),
+)
+# Shared objects (client, caches, scheduler, prefilter) are built by the
+# engine on first use, so pages that never call the model stay fast.
 
 def set_custom_css():
     st.markdown("""
@@ -916,6 +170,53 @@ def set_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_job_queue():
+    queue = JobQueue()
+    if JOB_WORKERS:
+        # One worker pool per server process; the workers outlive reruns and sessions, not the server.
+        pool = start_workers(JOB_WORKERS, queue.path, env=settings_env(
+            rpm_limit=max(1, int(RPM_LIMIT * JOB_SHARE)), tpm_limit=max(1, int(TPM_LIMIT * JOB_SHARE))))
+        atexit.register(stop_workers, pool)
+    return queue
+
+
+@st.cache_resource
+def get_history():
+    return ComplianceHistory()
+
+
+def job_progress(job):
+    """Fraction of a job's sentence checks done, from its last heartbeat."""
+    if job["status"] == "done":
+        return 1.0
+    progress = job["progress"]
+    if not progress or not progress["sentences"]:
+        return 0.0
+    sections = progress["sections"]
+    return sum(min(done, progress["sentences"]) for done in sections.values()) / \
+        (progress["sentences"] * len(sections))
+
+
+def keep_report(report, previous_run):
+    """Make report the page's current result (kept across reruns) and the base for the next incremental run."""
+    results = report["results"]
+    if previous_run:
+        changes = score_changes(previous_run["results"], results)
+        if changes:
+            st.info("Score changes since the last run:\n" + "\n".join(
+                f"- **{section}**: {before['Match Level']} ({before['Compliance Points']}) → "
+                f"{after['Match Level']} ({after['Compliance Points']})"
+                for section, before, after in changes))
+        else:
+            st.info("No section scores changed since the last run.")
+    st.session_state["last_run"] = {
+        "sentences": report["sentences"],
+        "verdicts": report["verdicts"],
+        "results": {r["DPDPA Section"]: r for r in results},
+    }
+    st.session_state["checker_report"] = report
+
 # --- Sidebar Navigation ---
 st.set_page_config(page_title="DPDPA Compliance Tool", layout="wide")
 set_custom_css()
@@ -980,6 +281,7 @@ elif menu == "Policy Generator":
 
 # --- Policy Compliance Checker ---
 elif menu == "Policy Compliance Checker":
+    import pandas as pd  # imported by the pages that show tables only; it is slow to load
     #st.title("Match Policy to DPDPA")
     st.markdown("<h1 style='font-size:38px; font-weight:800;'>Match Policy to DPDPA</h1>", unsafe_allow_html=True)
     
@@ -1000,14 +302,14 @@ elif menu == "Policy Compliance Checker":
 
     #st.header("3. Select Scope of Evaluation")
     st.markdown("<h3 style='font-size:24px; font-weight:700;'>3. Select Scope of Evaluation</h3>", unsafe_allow_html=True)
-    scope = st.selectbox("", [
-        "DPDP Act 2023 (default)", "DPDP Rules 2025", "DPDP Act + Rules", "Custom Sections"], index=0)
-    if scope == "Custom Sections":
-        custom_sections = st.multiselect("Select specific sections to match against", [
-        "Section 4 — Grounds for Processing Personal Data", "Section 5 — Notice", "Section 6 — Consent", "Section 7 — Certain Legitimate Uses",
-        "Section 8 — General Obligations of Data Fiduciary"])
+    scope = st.selectbox("", [*SCOPES, CUSTOM_SCOPE], index=0)
+    if scope == CUSTOM_SCOPE:
+        custom_sections = st.multiselect("Select specific sections to match against", dpdpa_sections)
     else:
         custom_sections = []
+    run_sections = sections_in_scope(scope, custom_sections)
+    if not run_sections:
+        st.caption("No sections are registered for this scope yet, so there is nothing to check against.")
 
     #st.header("4. Industry Context (Optional)")
     st.markdown("<h3 style='font-size:24px; font-weight:700;'>4. Industry Context (Optional)</h3>", unsafe_allow_html=True)
@@ -1019,152 +321,402 @@ elif menu == "Policy Compliance Checker":
 
     #st.header("5. Run Compliance Check")
     st.markdown("<h3 style='font-size:24px; font-weight:700;'>5. Run Compliance Check</h3>", unsafe_allow_html=True)
+    max_concurrency = st.slider("Parallel requests to OpenAI", 1, 32, MAX_CONCURRENT_REQUESTS)
+    unified_matching = st.checkbox("Unified matching (check all sections in one request per sentence batch)")
+    early_exit = st.checkbox("Early exit (stop asking about checklist items once they are matched)",
+                             disabled=unified_matching)
+    evidence_depth = st.number_input("Evidence depth (supporting sentences kept per checklist item)", 1, 10, 1)
+    prefilter_threshold = st.slider("Prefilter threshold (0 = send every sentence)", 0.0, 5.0, 0.0, 0.25,
+                                    help=f"Skips sentences the local word-overlap prefilter rates below the "
+                                         f"threshold, without asking the model; {DEFAULT_THRESHOLD} is a good start. "
+                                         "Run a recall check before relying on it.")
+    recall_check = st.checkbox("Prefilter recall check (evaluate every sentence and report what the threshold would drop)")
+    previous_run = st.session_state.get("last_run")
+    incremental = st.checkbox("Incremental re-analysis (only re-check sentences changed since the last run)",
+                              value=previous_run is not None, disabled=previous_run is None)
+    background_job = st.checkbox("Run as a background job (keeps running if you leave the page; needs job workers)")
+    if background_job and not JOB_WORKERS:
+        st.warning("⚠️ This app starts no job workers (DPDPA_JOB_WORKERS is 0), so background jobs stay queued "
+                   "until `python job_worker.py` is run against the same job queue.")
+    col1, col2 = st.columns(2)
+    organization = col1.text_input("Organization (for the dashboard history)",
+                                   value=st.session_state.get("organization", DEFAULT_ORGANIZATION))
+    policy_name = col2.text_input("Policy name", value=policy_file.name if policy_file is not None else DEFAULT_POLICY)
+    st.session_state["organization"] = organization
     if st.button("Run Compliance Check"):
-        if policy_text:
-            results = []
-            with st.spinner("Running GPT-based compliance evaluation..."):
-                for section in dpdpa_sections:
+        if policy_file is not None:
+            extract_progress = st.progress(0.0, text=f"Extracting text from {policy_file.name}...")
+            try:
+                policy_sentences = list(iter_sentences(
+                    policy_file, policy_file.name,
+                    on_progress=lambda done: extract_progress.progress(done, text=f"Extracting text from {policy_file.name}...")))
+            except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+                policy_sentences = []
+                st.error(f"❌ Could not read {policy_file.name}: {e}")
+            extract_progress.empty()
+            if policy_sentences:
+                headings = len({s.heading for s in policy_sentences if s.heading})
+                st.caption(f"Extracted {len(policy_sentences)} sentences under {headings} headings "
+                           f"from {policy_file.name}.")
+            policy_text = [s.text for s in policy_sentences]
+        elif policy_text:
+            # Split pasted text with sent_tokenize at every matching level, so the same text gives the
+            # same sentences whichever level is chosen; clause-level runs group them into plain parts.
+            policy_sentences = [PolicySentence(s, "paragraph", None, None) for s in sent_tokenize(policy_text)]
+            policy_text = [s.text for s in policy_sentences]
+        if policy_text and run_sections:
+            candidates = candidate_sentences(policy_text)
+            clauses = group_clauses(policy_sentences) if match_level == "Clause-level Match" else None
+            run_options = {
+                "clauses": clauses,
+                "unified": unified_matching,
+                "early_exit": early_exit and not recall_check,
+                "evidence_depth": int(evidence_depth),
+                "prefilter_threshold": 0 if recall_check else prefilter_threshold,
+            }
+            report_key = run_key(candidates, run_sections, (scope, *custom_sections),
+                                 custom_industry or industry, **run_options)
+            report = None if recall_check else get_result_cache().get(report_key)
+            if report is not None:
+                st.success("⚡ Same policy and settings as an earlier check: showing its saved results "
+                           "(no API calls made).")
+                keep_report(report, previous_run)
+            else:
+                # Work out what the run will send before sending it; big runs wait for a confirmation.
+                previous = previous_run if incremental else None
+                last_telemetry = st.session_state.get("last_telemetry")
+                call_seconds = (last_telemetry and last_telemetry["Run"]["Latency p50 (s)"]) or PLAN_CALL_SECONDS
+                plan = plan_run(candidates, run_sections, max_concurrency=max_concurrency, previous=previous,
+                                call_seconds=call_seconds, **run_options)
+                st.session_state["pending_run"] = {
+                    "policy_text": policy_text, "candidates": candidates, "run_options": run_options,
+                    "report_key": report_key, "sections": run_sections, "background_job": background_job,
+                    "max_concurrency": max_concurrency, "recall_check": recall_check, "previous": previous,
+                    "organization": organization, "policy_name": policy_name, "plan": plan,
+                    "label": policy_file.name if policy_file is not None else " ".join(candidates[:1])[:60],
+                    "confirmed": plan["Total"]["Calls"] <= int(st.secrets.get("DPDPA_CONFIRM_CALLS", 100)),
+                }
+        elif policy_text:
+            st.warning("⚠️ No sections are registered for the selected scope yet.")
+        else:
+            st.warning("⚠️ Please paste policy text or upload a policy file to proceed.")
+
+    pending_run = st.session_state.get("pending_run")
+    if pending_run is not None:
+        total = pending_run["plan"]["Total"]
+        st.caption(f"Plan: {total['Sections']} sections, {total['Sentences']} sentences → "
+                   f"{'up to ' if total['Upper Bound'] else ''}{total['Calls']} API calls, about "
+                   f"{total['Prompt Tokens'] + total['Completion Tokens']:,} tokens, "
+                   f"~{total['Estimated Seconds']:.0f}s and ~${total['Estimated Cost (USD)']:.4f}.")
+        with st.expander("Execution plan by section"):
+            st.dataframe(pd.DataFrame(pending_run["plan"]["Sections"]))
+        if not pending_run["confirmed"]:
+            st.warning(f"⚠️ This check needs {total['Calls']} API calls. Run it?")
+            col1, col2 = st.columns(2)
+            if col1.button("Confirm and run"):
+                pending_run["confirmed"] = True
+            elif col2.button("Cancel"):
+                st.session_state.pop("pending_run")
+                st.rerun()
+    if pending_run is not None and pending_run["confirmed"]:
+        del st.session_state["pending_run"]
+        policy_text, candidates, run_options, report_key, sections, background_job, max_concurrency, \
+            recall_check, previous, organization, policy_name, label = (pending_run[k] for k in (
+                "policy_text", "candidates", "run_options", "report_key", "sections", "background_job",
+                "max_concurrency", "recall_check", "previous", "organization", "policy_name", "label"))
+        report = None
+        if background_job:
+            job_id = get_job_queue().submit(
+                {"policy": policy_text, "sections": sections,
+                 "run_options": {**run_options, "max_concurrency": max_concurrency},
+                 "history": {"organization": organization, "policy": policy_name}},
+                label=label)
+            st.session_state.setdefault("jobs", {})[job_id] = report_key
+            st.info(f"📨 Queued as background job `{job_id}`. Its progress is shown below; you can leave "
+                    "this page and come back, or look the job up by ID from any session.")
+        else:
+            section_results = [None] * len(sections)
+            section_verdicts_out = {}
+            prefilter_stats = {}
+            early_exit_stats = {}
+            clause_stats = {}
+            run_telemetry = new_run_telemetry()
+            if previous:
+                changed = sum(1 for i in align_sentences(previous["sentences"], candidates) if i is None)
+                st.caption(f"Incremental run: {changed} of {len(candidates)} sentences are new or edited.")
+            # Live view: progress, running score and matches so far, updated as verdicts arrive
+            live_view = st.empty()
+            with live_view.container():
+                live_score = st.empty()
+                live_panels = {}
+                for section in sections:
                     st.markdown(f"##### Analyzing: {section}")
-                    try:
-                        if section == "Section 4 — Grounds for Processing Personal Data":
-                            st.markdown(f"Inside if Analyzing: {section}")
-                            validated_section = analyze_policy_section4(policy_text)
-                            results.append(validated_section)
-                        elif section == "Section 5 — Notice":
-                            st.markdown(f"Inside if Analyzing: {section}")
-                            validated_section = analyze_policy_section5(policy_text)
-                            results.append(validated_section)
-                        elif section == "Section 6 — Consent":
-                            st.markdown(f"Inside if Analyzing: {section}")
-                            validated_section = analyze_policy_section6(policy_text)
-                            results.append(validated_section)
-                        elif section == "Section 7 — Certain Legitimate Uses":
-                            st.markdown(f"Inside if Analyzing: {section}")
-                            validated_section = analyze_policy_section7(policy_text)
-                            results.append(validated_section)
-                        elif section == "Section 8 — General Obligations of Data Fiduciary":
-                            st.markdown(f"Inside if Analyzing: {section}")
-                            validated_section = analyze_policy_section8(policy_text)
-                            results.append(validated_section)
-
+                    live_panels[section] = {
+                        "progress": st.progress(0.0),
+                        "matches": st.expander("Matched sentences so far").empty(),
+                    }
+            total_sentences = max(1, len(candidates))
+            sentences_done = {section: 0 for section in sections}
+            live_matches = {section: {} for section in sections}
+            section_errors = {}
+            with st.spinner("Running GPT-based compliance evaluation..."):
+                for event in stream_section_events(
+                        policy_text, sections, max_concurrency=max_concurrency,
+                        previous=previous, verdicts_out=section_verdicts_out,
+                        prefilter_stats=prefilter_stats, early_exit_stats=early_exit_stats,
+                        clause_stats=clause_stats,
+                        telemetry=run_telemetry, **run_options):
+                    if event[0] == "progress":
+                        _, section, done, rows = event
+                        sentences_done[section] += done
+                        live_panels[section]["progress"].progress(
+                            min(1.0, sentences_done[section] / total_sentences),
+                            text=f"{min(sentences_done[section], len(candidates))} / {len(candidates)} sentences")
+                        if rows:
+                            for row in rows:
+                                live_matches[section].setdefault(row["Checklist Item"], row)
+                            live_panels[section]["matches"].markdown("\n".join(
+                                f"- ✅ **{row['Checklist Item']}** — {row['Sentence']}"
+                                for row in live_matches[section].values()))
+                    else:
+                        _, i, section, validated_section, error = event
+                        if error is None:
+                            section_results[i] = validated_section
+                            live_panels[section]["progress"].progress(1.0, text="✅ Completed")
+                        else:
+                            section_errors[section] = error
+                            live_panels[section]["progress"].progress(1.0, text=f"❌ Error: {error}")
+                    running_points = sum(
+                        section_results[i]["Compliance Points"] if section_results[i] is not None
+                        else classify_section(len(live_matches[section]), len(section_registry[section].checklist),
+                                              section_registry[section].scoring_bands)[1]
+                        for i, section in enumerate(sections))
+                    live_score.metric("🎯 Running Compliance Score",
+                                      f"{running_points / len(sections) * 100:.2f}%")
+            with live_view.container():
+                for section in sections:
+                    if section in section_errors:
+                        st.error(f"❌ Error analyzing {section}: {section_errors[section]}")
+                    else:
                         st.success(f"✅ Completed: {section}")
+            results = [r for r in section_results if r is not None]
+            telemetry_summary = run_telemetry.summary()
+            st.caption(f"Verdict cache: {telemetry_summary['Run']['Cache Hits']} hits, "
+                       f"{telemetry_summary['Run']['Cache Misses']} misses")
+            st.session_state["last_telemetry"] = telemetry_summary
+            if recall_check:
+                st.markdown(f"**Prefilter recall at threshold {prefilter_threshold}:**")
+                st.dataframe(pd.DataFrame([
+                    {"DPDPA Section": section,
+                     **get_prefilter().recall_report(candidates, verdicts, section, prefilter_threshold)}
+                    for section, verdicts in section_verdicts_out.items()
+                ]))
+            elif prefilter_stats:
+                saved = sum(s["Calls Saved"] for s in prefilter_stats.values())
+                skipped = sum(s["Sentences Skipped"] for s in prefilter_stats.values())
+                st.caption(f"Prefilter: skipped {skipped} sentence checks, saving about {saved} API calls.")
+            if clause_stats:
+                screened = clause_stats.pop(CLAUSE_LABEL)
+                skipped = sum(s["Sentences Skipped"] for s in clause_stats.values())
+                saved = sum(s.get("Calls Saved", 0) for s in clause_stats.values())
+                screening_calls = telemetry_summary["Sections"].get(CLAUSE_LABEL, {}).get("Calls", 0)
+                st.caption(f"Clause-level: {screened['Clauses']} clauses screened in {screening_calls} calls; "
+                           f"skipped {skipped} sentence checks outside relevant clauses, saving about "
+                           f"{saved} API calls.")
+            if early_exit_stats:
+                skipped = sum(s["Sentences Skipped"] for s in early_exit_stats.values())
+                tokens = sum(s["Prompt Tokens Saved"] for s in early_exit_stats.values())
+                st.caption(f"Early exit: skipped {skipped} sentence checks, saving about {tokens} prompt tokens.")
+            report = {
+                "sentences": candidates,
+                "verdicts": {s: v for s, v in section_verdicts_out.items()
+                             if any(r["DPDPA Section"] == s for r in results)},
+                "results": results,
+                "sections": sections,
+                "telemetry": telemetry_summary,
+            }
+            # Only complete runs are shared: a failed section or unreadable reply should be retried.
+            if not recall_check and not section_errors and not any(r["Unchecked Sentences"] for r in results):
+                get_result_cache().put(report_key, report)
+            if not section_errors:
+                get_history().record_run(results, organization, policy_name, section_count=len(sections),
+                                         sentences=len(candidates), telemetry=telemetry_summary)
+        if report is not None:
+            keep_report(report, previous_run)
+
+    # Background jobs of this session (or looked up by ID), polled while any is still queued or running
+    lookup_id = st.text_input("Look up a background job by ID").strip()
+    if lookup_id:
+        st.session_state.setdefault("jobs", {}).setdefault(lookup_id, None)
+    session_jobs = st.session_state.get("jobs", {})
+    if session_jobs:
+        jobs = {job_id: get_job_queue().get(job_id, with_result=False) for job_id in session_jobs}
+        pending = any(job and job["status"] in ("queued", "running") for job in jobs.values())
+
+        @st.fragment(run_every=3 if pending else None)
+        def background_jobs():
+            st.markdown("##### Background jobs")
+            for job_id in session_jobs:
+                job = get_job_queue().get(job_id, with_result=False)
+                if job is None:
+                    st.warning(f"No job with ID `{job_id}`.")
+                    continue
+                st.progress(job_progress(job), text=f"`{job_id}` · {job['label']} · {job['status']}")
+                if job["status"] == "failed":
+                    st.error(f"Job `{job_id}` failed: {job['error']}")
+                elif job["status"] == "done" and st.button("Show results", key=f"show-job-{job_id}"):
+                    report = get_job_queue().get(job_id)["result"]
+                    for section, error in report["errors"].items():
+                        st.error(f"❌ Error analyzing {section}: {error}")
+                    report_key = session_jobs[job_id]
+                    if report_key and not report["errors"] and \
+                            not any(r["Unchecked Sentences"] for r in report["results"]):
+                        get_result_cache().put(report_key, report)
+                    st.session_state["last_telemetry"] = report["telemetry"]
+                    keep_report(report, st.session_state.get("last_run"))
+                    st.rerun()
+            if pending and not any(job and job["status"] in ("queued", "running")
+                                   for job in (get_job_queue().get(j, with_result=False) for j in session_jobs)):
+                st.rerun()  # stop polling once the last job has finished
+
+        background_jobs()
+
+    # Results of the last check stay on the page across reruns (expanders, downloads, other widgets).
+    report = st.session_state.get("checker_report")
+    if report and report["results"]:
+        results = report["results"]
+        st.markdown("---")
+        with st.expander("📈 Run telemetry (calls, latency, tokens, cost)"):
+            st.dataframe(pd.DataFrame(summary_rows(report["telemetry"])))
+            st.download_button("Download telemetry (JSON)", json.dumps(report["telemetry"], indent=2),
+                               file_name="dpdpa_run_telemetry.json", mime="application/json", on_click="ignore")
+
+        # Flatten results for table display (avoid [object Object])
+        flat_data = []
+        for row in results:
+            flat_data.append({
+                "DPDPA Section": row.get("DPDPA Section", ""),
+                "Meaning": row.get("DPDPA Section Meaning", "Not applicable"),
+                "Match Level": row.get("Match Level", ""),
+                "Severity": row.get("Severity", ""),
+                "Score": row.get("Compliance Points", row.get("Compliance Score", ""))
+            })
 
-                    except Exception as e:
-                        st.error(f"❌ Error analyzing {section}: {e}")
-    
-            st.markdown("---")
-            if results:
-                # Flatten results for table display (avoid [object Object])
-                flat_data = []
-                for row in results:
-                    flat_data.append({
-                        "DPDPA Section": row.get("DPDPA Section", ""),
-                        "Meaning": row.get("DPDPA Section Meaning", "Not applicable"),
-                        "Match Level": row.get("Match Level", ""),
-                        "Severity": row.get("Severity", ""),
-                        "Score": row.get("Compliance Points", row.get("Compliance Score", ""))
-                    })
-
-                df = pd.DataFrame(flat_data)
-            
-                # Display clean table
-                st.success("✅ Full Analysis Complete!")
-                st.dataframe(df.style.set_properties(**{
-                    'background-color': 'white',
-                    'color': 'black'
-                }))
-            
-                # Show detailed expanders
-                # Show detailed expanders
-                for row in results:
-                    with st.expander(f"🔍 {row['DPDPA Section']} — Full Checklist & Suggestions"):
-                        if row['DPDPA Section'] == "Section 6 — Consent" and "Checklist Items" not in row:
-                            # st.markdown(f"**Match Level:** {row['Match Level']} | **Score:** {row['Compliance Score']}")
-                            st.markdown(f"**Match Level:** {row.get('Match Level', '')} | **Score:** {row.get('Compliance Points', row.get('Compliance Score', 'N/A'))}")
-                            st.markdown("**Matched Checklist Items:**")
-                            for item in row["Checklist Items Matched"]:
-                                st.markdown(f"- ✅ {item}")
-                            st.markdown("**Matched Sentences & Justifications:**")
-                            for s in row["Matched Sentences"]:
-                                st.markdown(f"- **Sentence:** {s['Sentence']}")
-                                st.markdown(f"  - **Checklist Item:** {s['Checklist Item']}")
-                                st.markdown(f"  - **Justification:** {s['Justification']}")
-
-                        elif row['DPDPA Section'] == "Section 4 — Grounds for Processing Personal Data" and "Checklist Items" not in row:
-                            # st.markdown(f"**Match Level:** {row['Match Level']} | **Score:** {row['Compliance Score']}")
-                            st.markdown(f"**Match Level:** {row.get('Match Level', '')} | **Score:** {row.get('Compliance Points', row.get('Compliance Score', 'N/A'))}")
-                            st.markdown("**Matched Checklist Items:**")
-                            for item in row["Checklist Items Matched"]:
-                                st.markdown(f"- ✅ {item}")
-                            st.markdown("**Matched Sentences & Justifications:**")
-                            for s in row["Matched Sentences"]:
-                                st.markdown(f"- **Sentence:** {s['Sentence']}")
-                                st.markdown(f"  - **Checklist Item:** {s['Checklist Item']}")
-                                st.markdown(f"  - **Justification:** {s['Justification']}")
-                        
-                        elif row['DPDPA Section'] == "Section 5 — Notice" and "Checklist Items" not in row:
-                            # st.markdown(f"**Match Level:** {row['Match Level']} | **Score:** {row['Compliance Score']}")
-                            st.markdown(f"**Match Level:** {row.get('Match Level', '')} | **Score:** {row.get('Compliance Points', row.get('Compliance Score', 'N/A'))}")
-                            st.markdown("**Matched Checklist Items:**")
-                            for item in row["Checklist Items Matched"]:
-                                st.markdown(f"- ✅ {item}")
-                            st.markdown("**Matched Sentences & Justifications:**")
-                            for s in row["Matched Sentences"]:
-                                st.markdown(f"- **Sentence:** {s['Sentence']}")
-                                st.markdown(f"  - **Checklist Item:** {s['Checklist Item']}")
-                                st.markdown(f"  - **Justification:** {s['Justification']}")
-                        elif row['DPDPA Section'] == "Section 7 — Certain Legitimate Uses" and "Checklist Items" not in row:
-                            # st.markdown(f"**Match Level:** {row['Match Level']} | **Score:** {row['Compliance Score']}")
-                            st.markdown(f"**Match Level:** {row.get('Match Level', '')} | **Score:** {row.get('Compliance Points', row.get('Compliance Score', 'N/A'))}")
-                            st.markdown("**Matched Checklist Items:**")
-                            for item in row["Checklist Items Matched"]:
-                                st.markdown(f"- ✅ {item}")
-                            st.markdown("**Matched Sentences & Justifications:**")
-                            for s in row["Matched Sentences"]:
-                                st.markdown(f"- **Sentence:** {s['Sentence']}")
-                                st.markdown(f"  - **Checklist Item:** {s['Checklist Item']}")
-                                st.markdown(f"  - **Justification:** {s['Justification']}")
-                        elif row['DPDPA Section'] == "Section 8 — General Obligations of Data Fiduciary" and "Checklist Items" not in row:
-                            # st.markdown(f"**Match Level:** {row['Match Level']} | **Score:** {row['Compliance Score']}")
-                            st.markdown(f"**Match Level:** {row.get('Match Level', '')} | **Score:** {row.get('Compliance Points', row.get('Compliance Score', 'N/A'))}")
-                            st.markdown("**Matched Checklist Items:**")
-                            for item in row["Checklist Items Matched"]:
-                                st.markdown(f"- ✅ {item}")
-                            st.markdown("**Matched Sentences & Justifications:**")
-                            for s in row["Matched Sentences"]:
-                                st.markdown(f"- **Sentence:** {s['Sentence']}")
-                                st.markdown(f"  - **Checklist Item:** {s['Checklist Item']}")
-                                st.markdown(f"  - **Justification:** {s['Justification']}")
-
-            
-                # Excel Download
-                excel_filename = "DPDPA_Compliance_Report.xlsx"
-                df.to_excel(excel_filename, index=False)
-                with open(excel_filename, "rb") as f:
-                    st.download_button("📥 Download Excel", f, file_name=excel_filename)
-            
-                # Score
-                try:
-                    scored_points = df['Score'].astype(float).sum()
-                    total_points = len(dpdpa_sections)
-                    score = (scored_points / total_points) * 100
-                    st.metric("🎯 Overall Compliance", f"{score:.2f}%")
-                except:
-                    st.warning("⚠️ Could not compute score. Check data types.")
-
-        else:
-            st.warning("⚠️ Please paste policy text to proceed.")
+        df = pd.DataFrame(flat_data)
+
+        # Display clean table
+        st.success("✅ Full Analysis Complete!")
+        st.dataframe(df.style.set_properties(**{
+            'background-color': 'white',
+            'color': 'black'
+        }))
+
+        # Show detailed expanders
+        for row in results:
+            with st.expander(f"🔍 {row['DPDPA Section']} — Full Checklist & Suggestions"):
+                if row.get("Unchecked Sentences"):
+                    st.warning(f"⚠️ {row['Unchecked Sentences']} sentence(s) could not be checked "
+                               "(unreadable model reply); run again to retry them.")
+                st.markdown(f"**Match Level:** {row.get('Match Level', '')} | **Score:** {row.get('Compliance Points', row.get('Compliance Score', 'N/A'))}")
+                st.markdown("**Matched Checklist Items:**")
+                for item in row["Checklist Items Matched"]:
+                    st.markdown(f"- ✅ {item}")
+                if row.get("Clause Evidence"):
+                    st.markdown("**Evidence by Clause:**")
+                    for clause in row["Clause Evidence"]:
+                        st.markdown(f"- **{clause['Clause']}** — {len(clause['Evidence Sentences'])} sentence(s): "
+                                    + "; ".join(clause["Checklist Items"]))
+                st.markdown("**Matched Sentences & Justifications:**")
+                for s in row["Matched Sentences"]:
+                    st.markdown(f"- **Sentence:** {s['Sentence']}")
+                    st.markdown(f"  - **Checklist Item:** {s['Checklist Item']}")
+                    st.markdown(f"  - **Justification:** {s['Justification']}")
+
+        # Excel Download (built in memory, only when clicked)
+        st.download_button("📥 Download Excel", lambda: excel_report(results), file_name=REPORT_FILENAME,
+                           mime=EXCEL_MIME, on_click="ignore")
+
+        # Score
+        try:
+            scored_points = df['Score'].astype(float).sum()
+            total_points = len(report.get("sections", dpdpa_sections))
+            score = (scored_points / total_points) * 100
+            st.metric("🎯 Overall Compliance", f"{score:.2f}%")
+        except:
+            st.warning("⚠️ Could not compute score. Check data types.")
 
 # --- Dashboard & Reports ---
 elif menu == "Dashboard & Reports":
+    import pandas as pd
     st.title("Dashboard & Reports")
-    st.metric("Overall Compliance", "82%", "+7%")
-    st.progress(0.82)
-    st.subheader("Risk & GPT Insights")
-    st.write("\n- Consent missing in 2 sections\n- Breach response undefined\n")
-    st.subheader("Activity Tracker")
-    st.dataframe({"Task": ["Upload Policy", "Review Results"], "Status": ["Done", "Pending"]})
-    st.download_button("Download Full Report", "Sample Report Data...", file_name="dpdpa_report.txt")
+    history = get_history()
+    organizations = history.organizations()
+    if organizations:
+        col1, col2 = st.columns(2)
+        default_organization = st.session_state.get("organization")
+        organization = col1.selectbox("Organization", organizations,
+                                      index=organizations.index(default_organization)
+                                      if default_organization in organizations else 0)
+        policy = col2.selectbox("Policy", [ALL_POLICIES] + history.policies(organization),
+                                format_func=lambda name: name or "All policies")
+        summary = history.summary(organization, policy)
+        overall = summary.pop(OVERALL)
+        delta = None if overall["prev_points"] is None else \
+            f"{(overall['last_points'] - overall['prev_points']) * 100:+.0f}%"
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Overall Compliance", f"{overall['last_points'] * 100:.0f}%", delta,
+                    help="Average of each policy's latest overall score" if policy == ALL_POLICIES else None)
+        col2.metric("Average over Runs", f"{overall['average'] * 100:.0f}%")
+        col3.metric("Runs", overall["runs"])
+        st.progress(min(1.0, overall["last_points"]))
+        trend = history.trend(organization, policy)
+        if len(trend) > 1:
+            st.subheader("Compliance Trend (last 90 days)")
+            st.line_chart(pd.DataFrame([(day, average * 100) for day, _, average in trend],
+                                       columns=["Day", "Overall Compliance (%)"]).set_index("Day"))
+        st.subheader("Sections")
+        st.dataframe(pd.DataFrame([{
+            "DPDPA Section": section,
+            "Match Level": row["last_match_level"],
+            "Severity": row["last_severity"],
+            "Score": row["last_points"],
+            "Change": None if row["prev_points"] is None else round(row["last_points"] - row["prev_points"], 2),
+            "Average": round(row["average"], 2),
+            "Best": row["best"],
+            "Worst": row["worst"],
+            "Runs": row["runs"],
+        } for section, row in summary.items()]))
+        st.subheader("Risk & GPT Insights")
+        risks = [f"- **{section}**: {row['last_match_level']} ({row['last_severity']} severity)"
+                 for section, row in summary.items() if row["last_severity"] in ("Major", "Medium")]
+        st.markdown("\n".join(risks) if risks else "No major or medium risks in the latest run.")
+    else:
+        st.info("Run a compliance check to populate the dashboard.")
+    last_telemetry = st.session_state.get("last_telemetry")
+    if last_telemetry:
+        st.subheader("Last Run Telemetry")
+        run_metrics = last_telemetry["Run"]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Model Calls", run_metrics["Calls"])
+        col2.metric("p95 Latency", f"{run_metrics['Latency p95 (s)'] or 0:.2f}s")
+        col3.metric("Tokens", run_metrics["Prompt Tokens"] + run_metrics["Completion Tokens"],
+                    help=f"{run_metrics.get('Cached Prompt Tokens', 0)} prompt tokens served from the provider's "
+                         "prompt cache")
+        col4.metric("Estimated Cost", f"${run_metrics['Estimated Cost (USD)']:.4f}")
+        st.dataframe(pd.DataFrame(summary_rows(last_telemetry)))
+        st.download_button("Download telemetry (JSON)", json.dumps(last_telemetry, indent=2),
+                           file_name="dpdpa_run_telemetry.json", mime="application/json")
+    if organizations:
+        st.subheader("Activity Tracker")
+        st.dataframe(pd.DataFrame([{
+            "Finished": time.strftime("%Y-%m-%d %H:%M", time.localtime(run["finished"])),
+            "Policy": run["policy"],
+            "Overall Compliance": f"{run['overall'] * 100:.0f}%",
+            "Sentences": run["sentences"],
+        } for run in history.recent_runs(organization, policy)]))
+        latest_run = overall["last_run"]
+        st.download_button("Download Full Report", lambda: excel_report(history.run_results(latest_run)),
+                           file_name=REPORT_FILENAME, mime=EXCEL_MIME, on_click="ignore")
 
 # --- Knowledge Assistant ---
 elif menu == "Knowledge Assistant":
@@ -1184,9 +736,18 @@ elif menu == "Admin Settings":
     st.subheader("User & Role Management")
     st.write("Admin | Reviewer | Editor")
     st.subheader("Organization Profile")
-    st.text_input("Organization Name")
+    st.session_state["organization"] = st.text_input(
+        "Organization Name", value=st.session_state.get("organization", DEFAULT_ORGANIZATION))
     st.text_input("Sector")
     st.subheader("Audit Log Controls")
     st.checkbox("Enable audit logs")
     st.subheader("Data Backup & Export")
     st.button("Download Backup")
+    st.subheader("Request Scheduler")
+    st.write(get_request_scheduler().stats())
+    st.subheader("Verdict Cache")
+    st.write(get_verdict_cache().stats())
+    cache_scope = st.selectbox("Invalidate cached verdicts for", ["All sections"] + dpdpa_sections)
+    if st.button("Clear Cache"):
+        get_verdict_cache().invalidate(None if cache_scope == "All sections" else cache_scope)
+        st.success("Cached verdicts cleared.")
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from segmenter import normalize_sentence
+
+# Bump when the prompt templates change in a way that alters verdicts.
+PROMPT_TEMPLATE_VERSION = "3"
+
+DEFAULT_CACHE_PATH = os.environ.get("DPDPA_CACHE_PATH", os.path.join(".dpdpa_cache", "verdicts.sqlite3"))
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+def section_fingerprint(section, checklist_items, *prompt_parts):
+    """Hash of everything that defines a section's question to the model."""
+    payload = json.dumps([section, list(checklist_items), list(prompt_parts)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def verdict_key(model, temperature, fingerprint, sentence):
+    payload = "\x1f".join([model, str(temperature), PROMPT_TEMPLATE_VERSION, fingerprint,
+                           normalize_sentence(sentence)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    Persistent, content-addressed store of per-sentence checklist verdicts.
+
+    Keys are produced by verdict_key(); values are the per-sentence result
+    dicts returned by the matching functions. Entries expire after
+    ttl_seconds and the least recently used ones are evicted once the
+    store grows beyond max_entries. Safe to share across threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY,
+                section TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS verdicts_accessed ON verdicts(accessed)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS verdicts_section ON verdicts(section)")
+        self._conn.commit()
+        self.evict()
+
+    def get_many(self, keys):
+        """Return {key: value} for every key that is cached and not expired."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM verdicts WHERE key IN ({','.join('?' * len(chunk))}) AND created >= ?",
+                    (*chunk, now - self.ttl_seconds)).fetchall()
+                found.update((k, json.loads(v)) for k, v in rows)
+            if found:
+                self._conn.executemany("UPDATE verdicts SET accessed = ? WHERE key = ?",
+                                       [(now, k) for k in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def cached_keys(self, keys):
+        """The subset of keys that are cached and not expired; unlike get_many, not a hit or an access."""
+        keys = list(dict.fromkeys(keys))
+        found = set()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key FROM verdicts WHERE key IN ({','.join('?' * len(chunk))}) AND created >= ?",
+                    (*chunk, time.time() - self.ttl_seconds)).fetchall()
+                found.update(k for (k,) in rows)
+        return found
+
+    def put_many(self, section, items):
+        """Store (key, value) pairs for one section."""
+        now = time.time()
+        rows = [(k, section, json.dumps(v, ensure_ascii=False), now, now) for k, v in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._puts_since_evict += len(rows)
+            due = self._puts_since_evict >= 1000
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM verdicts WHERE created < ?", (time.time() - self.ttl_seconds,))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,))
+            self._conn.commit()
+            self._puts_since_evict = 0
+
+    def invalidate(self, section=None):
+        """Forget every verdict, or only those for one section (e.g. after its checklist changed)."""
+        with self._lock:
+            if section is None:
+                self._conn.execute("DELETE FROM verdicts")
+            else:
+                self._conn.execute("DELETE FROM verdicts WHERE section = ?", (section,))
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class ResultCache:
+    """
+    In-memory LRU of whole-run results, keyed by the engine's run_key(), so
+    an identical submission from any session is answered without running
+    again. Values are shared between callers and must be treated as
+    read-only. Safe to share across threads.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)